@@ -9,7 +9,8 @@ nltk.download('averaged_perceptron_tagger_eng')
 
 
 class CodenamesEnv(ta.Env):
-    def __init__(self, hardcore: Optional[bool] = False):
+    def __init__(self, hardcore: Optional[bool] = False, incremental_board: Optional[bool] = False):
+        self.incremental_board = incremental_board # after the first board, only broadcast newly revealed words
         self._load_word_list(hardcore=hardcore)
 
     def _load_word_list(self, hardcore: bool = False) -> None:
@@ -23,6 +24,9 @@ class CodenamesEnv(ta.Env):
         assignments = ["R"]*9 + ["B"]*8 + ["N"]*7 + ["A"] # Create a list of 25 assignments: 9 Red (R), 8 Blue (B), 7 Neutral (N), and 1 Assassin (A)
         random.shuffle(assignments) # Shuffle the assignments to randomize their placement
         self.board = {word: team for word, team in zip(random.sample(self.word_list, 25), assignments)} # Assign each word to a team
+        self.announced_words = set() # revealed words already broadcast in incremental mode
+        self.team_words = {team: {word for word, label in self.board.items() if label == team} for team in "RBNA"} # reverse index, label -> words
+        self.remaining_words = {team: len(words) for team, words in self.team_words.items()} # unguessed words per label, a team wins at 0
         self.state.reset(game_state={"turn": 0, "team_turn": 0, "guessed_words": set(), "last_clue": None, "last_number": 0}, player_prompt_function=self._prompt)
         self.state.add_observation(message=self._render_player_view(), observation_type=ta.ObservationType.GAME_BOARD)
 
@@ -33,6 +37,20 @@ class CodenamesEnv(ta.Env):
             else: view += f"{word:<8} {self.board[word] if word in self.state.game_state['guessed_words'] else ''}\n"
         return view
 
+    def _render_board_delta(self, revealed_words: List[str]):
+        view = "Codenames Words revealed:\n"
+        for word in revealed_words: view += f"{word:<8} {self.board[word]}\n"
+        return view
+
+    def _add_board_observation(self):
+        if not self.incremental_board:
+            self.state.add_observation(message=self._render_player_view(), observation_type=ta.ObservationType.GAME_BOARD)
+            return
+        revealed_words = [word for word in self.board if word in self.state.game_state["guessed_words"] and word not in self.announced_words]
+        if revealed_words:
+            self.announced_words.update(revealed_words)
+            self.state.add_observation(message=self._render_board_delta(revealed_words), observation_type=ta.ObservationType.GAME_BOARD)
+
     def _prompt(self, player_id: int, game_state: Dict[str, Any]) -> str:
         prompt = (
             "You are playing Codenames, a 2v2 word deduction game. Each team (Red and Blue) has a Spymaster and an Operative.\nRules:\n"
@@ -75,11 +93,11 @@ class CodenamesEnv(ta.Env):
                 self.state.game_state["remaining_guesses"] = number + 1 # Operatives can make up to N+1 guesses
                 self.state.add_observation(message=f"Spymaster of {'Red' if current_team=='R' else 'Blue'} team, Player {player_id}, submitted [{word} {number}].", observation_type=ta.ObservationType.GAME_ACTION_DESCRIPTION)
                 self._rotate_player_by_logic() 
-                self.state.add_observation(message=self._render_player_view(), observation_type=ta.ObservationType.GAME_BOARD)
+                self._add_board_observation()
                 return self.state.step()
             else:
                 terminated_by_invalid = self.state.set_invalid_move(reason="Invalid clue. Provide a word and a number (e.g., [dust 2]).")
-                if terminated_by_invalid: self._rotate_player_by_logic(skip_guessing=True); self.state.add_observation(message=self._render_player_view(), observation_type=ta.ObservationType.GAME_BOARD)
+                if terminated_by_invalid: self._rotate_player_by_logic(skip_guessing=True); self._add_board_observation()
                 return self.state.step()
             
         else:  # Operatives guess words, 1 3 indices
@@ -105,6 +123,7 @@ class CodenamesEnv(ta.Env):
                     return self.state.step()
                 
                 self.state.game_state["guessed_words"].add(guessed_word)
+                self.remaining_words[self.board[guessed_word]] -= 1
 
                 # check 2: if guessed word is the assassin word
                 if self.board[guessed_word] == "A": # the other team wins
@@ -114,26 +133,26 @@ class CodenamesEnv(ta.Env):
                 # check 3: if guessed word is correct
                 elif self.board[guessed_word] == current_team:
                     # Check if all words of the current team are guessed
-                    if all(word in self.state.game_state["guessed_words"] for word, team in self.board.items() if team == current_team):
+                    if self.remaining_words[current_team] == 0:
                         self.state.set_winners(player_ids=[0, 1] if current_team == "R" else [2, 3], reason=f"Player {player_id} guessed all their team's words!")
                         return self.state.step()
                     self.state.add_observation(message=f"Operator of {'Red' if current_team=='R' else 'Blue'} team, Player {player_id}, correctly guessed [{guessed_word}].", observation_type=ta.ObservationType.GAME_ACTION_DESCRIPTION)
                     self.state.game_state["remaining_guesses"] -= 1
                     if self.state.game_state["remaining_guesses"] <= 0:  self._rotate_player_by_logic(done_guessing=True); self.state.game_state["remaining_guesses"] = 0 
-                    self.state.add_observation(message=self._render_player_view(), observation_type=ta.ObservationType.GAME_BOARD)
+                    self._add_board_observation()
                     return self.state.step()
                     
                 # check 4: if guessed word is incorrect [opponent's word or neutral word]
                 else:  # Check if all words of the opposing team are guessed
                     opponent_team = "B" if current_team == "R" else "R"
-                    if all(word in self.state.game_state["guessed_words"] for word, team in self.board.items() if team == opponent_team):
+                    if self.remaining_words[opponent_team] == 0:
                         self.state.set_winners(player_ids=[0, 1] if opponent_team == "R" else [2, 3], reason=f"Player {player_id} guessed the opponent team's last word!")
                         return self.state.step()
                     opponent_team_name = "Red" if opponent_team == "R" else "Blue"
                     self.state.add_observation(message=f"Operator of {'Red' if current_team=='R' else 'Blue'} team, Player {player_id}, wrongly guessed [{guessed_word}]. It is a {opponent_team_name + ' Team' if self.board[guessed_word]==opponent_team else 'Neutral'} word.", observation_type=ta.ObservationType.GAME_MESSAGE)
                     self.state.game_state["remaining_guesses"] = 0
                     if self.state.game_state["remaining_guesses"] <= 0:  self._rotate_player_by_logic(done_guessing=True); self.state.game_state["remaining_guesses"] = 0 
-                    self.state.add_observation(message=self._render_player_view(), observation_type=ta.ObservationType.GAME_BOARD)
+                    self._add_board_observation()
                     return self.state.step()
             else:
                 terminated_by_invalid = self.state.set_invalid_move(reason="Provide a word in square brackets (e.g., [apple]).")
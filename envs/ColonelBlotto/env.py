@@ -1,10 +1,14 @@
-import re, string, copy
-from typing import Any, Dict, Optional, Tuple
+import re, string
+from typing import Any, Dict, List, Optional, Tuple
 
 import textarena as ta
 from textarena.envs.ColonelBlotto.renderer import create_game_str
 
 class ColonelBlottoEnv(ta.Env):
+    bracket_pattern = re.compile(r"\[([^\]]+)\]")
+    token_pattern = re.compile(r"([A-Za-z])\s*(?::\s*)?(\d+)", re.IGNORECASE) # "A:5", "A 5", "A5"; one way to split the spaces, so no backtracking
+    separator_pattern = re.compile(r"[\s,]+")
+
     def __init__(self, num_fields: int = 3, num_total_units: int = 20, num_rounds: int = 10):
         """
         Args:
@@ -14,19 +18,30 @@ class ColonelBlottoEnv(ta.Env):
         """
         self.num_fields = min(max(num_fields, 2), 26)
         self.field_names = list(string.ascii_uppercase[:self.num_fields])
+        self.field_index = {field_name: i for i, field_name in enumerate(self.field_names)}
         self.num_total_units = max(num_total_units, self.num_fields)
         self.num_rounds = num_rounds
-        self._player_states = {'units_remaining': self.num_total_units, 'current_allocation': {field_name: 0 for field_name in self.field_names}, 'allocation_complete': False}
 
     def get_board_str(self):  # TODO have to re-check
-        return create_game_str(game_state=self.state.game_state)
+        return create_game_str(game_state=self._renderer_game_state())
+
+    def _renderer_game_state(self) -> Dict[str, Any]:
+        """ Per-field dicts and player states in the layout create_game_str reads, built from the allocation arrays """
+        gs = self.state.game_state
+        allocations, complete = gs['allocations'], gs['allocation_complete']
+        return {
+            'current_round': gs['current_round'], 'scores': gs['scores'],
+            'fields': [{'name': field_name, 'value': 1, 'player_0_units': allocations[0][i], 'player_1_units': allocations[1][i]} for i, field_name in enumerate(self.field_names)],
+            'player_states': {player_id: {'units_remaining': 0 if complete[player_id] else self.num_total_units, 'allocation_complete': complete[player_id],
+                                          'current_allocation': dict(zip(self.field_names, allocations[player_id]))} for player_id in [0, 1]},
+        }
 
     def reset(self, num_players: int, seed: Optional[int] = None):
         self.state = ta.TwoPlayerState(num_players=num_players, seed=seed)
         game_state = {
-            'fields': [{'name': field_name, 'value': 1, 'player_0_units': 0, 'player_1_units': 0} for field_name in self.field_names],
             'current_round': 1, 'scores': {0: 0, 1: 0},
-            'player_states': {0: copy.copy(self._player_states), 1: copy.copy(self._player_states)}
+            'allocations': [[0] * self.num_fields, [0] * self.num_fields], # units per field, indexed like field_names
+            'allocation_complete': [False, False],
         }
         self.state.reset(game_state=game_state, player_prompt_function=self._prompt, role_mapping={0: "Commander Alpha", 1: "Commander Beta"})
         self._render_game_state()
@@ -56,77 +71,56 @@ class ColonelBlottoEnv(ta.Env):
         return self.state.step()
 
     def _execute_player_move(self, action: str):
-        """Parse the action to find the requested allocation. If valid, make the allocation, otherwise set it as an invalid move"""            
-        allocation_dict = self._parse_allocation_input(action)
-        validation_result = self._validate_allocation(allocation_dict)
-        
-        if validation_result != "Allocation is good.":
+        """Parse the action to find the requested allocation. If valid, make the allocation, otherwise set it as an invalid move"""
+        units, validation_result = self._parse_allocation_input(action)
+
+        if units is None:
             self.state.set_invalid_move(reason=validation_result)
             return
-            
+
         # Process valid allocation
         player_id = self.state.current_player_id
-        for field in self.state.game_state['fields']:
-            field[f'player_{player_id}_units'] = allocation_dict[field['name']]
-            self.state.game_state['player_states'][player_id]['current_allocation'][field['name']] = allocation_dict[field['name']]
-        
-        self.state.game_state['player_states'][player_id]['units_remaining'] = 0
-        self.state.game_state['player_states'][player_id]['allocation_complete'] = True
-        
+        self.state.game_state['allocations'][player_id] = units
+        self.state.game_state['allocation_complete'][player_id] = True
+
         # Check if both players have allocated
-        other_player = 1 - player_id
-        if self.state.game_state['player_states'][other_player]['allocation_complete']:
+        if self.state.game_state['allocation_complete'][1 - player_id]:
             self._resolve_battle()
 
-    def _parse_allocation_input(self, action_string: str) -> Optional[Dict[str, int]]:
-        if not action_string or not action_string.strip(): return None
+    def _parse_allocation_input(self, action_string: str) -> Tuple[Optional[List[int]], str]:
+        """Units per field (omitted fields are 0) or None, and the validation message"""
+        invalid_format = "Invalid input format. Use: A:5, B:10, C:5"
+        if not action_string or not action_string.strip(): return None, invalid_format
         raw = action_string.strip()
-        bracket_match = re.search(r"\[([^\]]+)\]", raw)
-        # s = bracket_match.group(1) if bracket_match else raw
+        bracket_match = self.bracket_pattern.search(raw)
         s = (bracket_match.group(1) if bracket_match else raw).strip()
-        if not s: return None
-        token_re = re.compile(r"([A-Za-z])\s*:?\s*(\d+)", re.IGNORECASE)
-        matches = list(token_re.finditer(s))
-        if not matches: return None
-        allocations: Dict[str, int] = {}
-        for m in matches:
-            field = m.group(1).upper()
-            if field in allocations: return None
-            try: units = int(m.group(2))
-            except ValueError: return None
-            allocations[field] = units
-        leftovers = token_re.sub("", s)
-        leftovers = re.sub(r"[\s,]+", "", leftovers)
-        if leftovers: return None
-        for fname in self.field_names: allocations.setdefault(fname, 0)
-        return allocations
-
-    def _validate_allocation(self, allocation_dict: Optional[Dict[str, int]]) -> str:
-        """Validate allocation dictionary, allowing omitted fields (now 0 by default)."""
-        if allocation_dict is None:                                                 return "Invalid input format. Use: A:5, B:10, C:5"
-        if any(f not in self.field_names for f in allocation_dict):                 return f"Invalid field name(s). Valid fields: {', '.join(self.field_names)}"
-        if any(not isinstance(u, int) or u < 0 for u in allocation_dict.values()):  return "All allocations must be non-negative integers."
-        if sum(allocation_dict.values()) > self.num_total_units:                    return f"You cannot allocate more than {self.num_total_units} units. Current sum: {sum(allocation_dict.values())}"
-        return "Allocation is good."
+        if not s: return None, invalid_format
+        tokens = self.token_pattern.findall(s)
+        if not tokens: return None, invalid_format
+        if self.separator_pattern.sub("", self.token_pattern.sub("", s)): return None, invalid_format # only tokens and separators
+        units = [0] * self.num_fields
+        seen, unknown_field = set(), False
+        for field, amount in tokens:
+            field = field.upper()
+            if field in seen: return None, invalid_format
+            seen.add(field)
+            index = self.field_index.get(field)
+            if index is None: unknown_field = True
+            else: units[index] = int(amount)
+        if unknown_field: return None, f"Invalid field name(s). Valid fields: {', '.join(self.field_names)}"
+        total = sum(units)
+        if total > self.num_total_units: return None, f"You cannot allocate more than {self.num_total_units} units. Current sum: {total}"
+        return units, "Allocation is good."
 
     def _resolve_battle(self):
         """Calculate battle results and determine round winner"""
-        # Determine field winners
-        field_winners = []
-        for field in self.state.game_state['fields']:
-            p0_units = field['player_0_units']
-            p1_units = field['player_1_units']
-            if p0_units > p1_units:     field_winners.append(0)
-            elif p1_units > p0_units:   field_winners.append(1)
-            else:                       field_winners.append(None)  # Tie
-        
-        # Extract battle results
-        p0_wins = field_winners.count(0)
-        p1_wins = field_winners.count(1)
-        
+        p0_units, p1_units = self.state.game_state['allocations']
+        p0_wins = sum(a > b for a, b in zip(p0_units, p1_units))
+        p1_wins = sum(b > a for a, b in zip(p0_units, p1_units))
+
         # Add battle summary as observation
-        p0_allocations = ", ".join(f"{field['name']}: {field['player_0_units']:<2}" for field in self.state.game_state["fields"])
-        p1_allocations = ", ".join(f"{field['name']}: {field['player_1_units']:<2}" for field in self.state.game_state["fields"])
+        p0_allocations = ", ".join(f"{field_name}: {units:<2}" for field_name, units in zip(self.field_names, p0_units))
+        p1_allocations = ", ".join(f"{field_name}: {units:<2}" for field_name, units in zip(self.field_names, p1_units))
         message = f"\nRound {self.state.game_state['current_round']}\nCommander Alpha allocated: {p0_allocations}\nCommander Beta allocated:  {p1_allocations}\n"
         if p0_wins > p1_wins:   message += f"Winner: Commander Alpha";  self.state.game_state['scores'][0] += 1
         elif p0_wins < p1_wins: message += f"Winner: Commander Beta";   self.state.game_state['scores'][1] += 1
@@ -136,9 +130,9 @@ class ColonelBlottoEnv(ta.Env):
         # increment round counter
         self.state.game_state['current_round'] += 1
 
-        # Reset player states and field allocations
-        for player_id in [0, 1]: self.state.game_state["player_states"][player_id] = copy.copy(self._player_states)
-        for field in self.state.game_state['fields']: field['player_0_units'] = 0; field['player_1_units'] = 0
+        # Reset allocations, the arrays of the finished round are replaced rather than copied
+        self.state.game_state['allocations'] = [[0] * self.num_fields, [0] * self.num_fields]
+        self.state.game_state['allocation_complete'] = [False, False]
         self._render_game_state()
 
     def _check_gameover(self):
@@ -127,6 +127,7 @@ class SecretMafiaEnv(ta.Env):
             "pending_elimination": None,
         }
         self.state.reset(game_state=game_state, player_prompt_function=self._prompt, secret_roles=self.player_roles)
+        self._option_strings: Dict[int, str] = {} # excluded player id (-1 for none) -> "[0], [1], ...", cleared on elimination
         self._send_phase_prompts() # populate self.next_player_ids
         self.state.manually_set_current_player_id(self.next_player_ids.pop())
     
@@ -143,6 +144,11 @@ class SecretMafiaEnv(ta.Env):
             self.player_roles[pid] = r_name
             self.roles[pid] = self._ROLE_FACTORY[r_name]()
 
+        # role and team indexes, the alive sets are kept up to date by _eliminate_player
+        self.team_members = {"Mafia": [p for p, r in self.player_roles.items() if r == "Mafia"], "Village": [p for p, r in self.player_roles.items() if r != "Mafia"]}
+        self.alive_by_role = {r_name: {p for p, r in self.player_roles.items() if r == r_name} for r_name in self._ROLE_FACTORY}
+        self.num_alive_village = len(self.team_members["Village"])
+
     def _prompt(self, player_id: int, game_state: dict) -> str:
         role_obj = self.roles[player_id]
         return role_obj.get_prompt(player_id = player_id, player_roles = self.player_roles, num_players = self.state.num_players, num_discussion_rounds = self.discussion_rounds)
@@ -173,6 +179,7 @@ class SecretMafiaEnv(ta.Env):
             next_phase = self._compute_next_phase()
             if next_phase == Phase.DAY_DISCUSSION:
                 self._resolve_night_outcome()
+        if self.state.done: return # the vote or the night decided the game, no next phase to queue
 
         # Advance to next phase
         self.phase = self._compute_next_phase()
@@ -181,8 +188,8 @@ class SecretMafiaEnv(ta.Env):
         self.state.manually_set_current_player_id(self.next_player_ids.pop())
 
     def _compute_next_phase(self) -> Phase:
-        doctor_alive     = any(self.player_roles[p] == "Doctor"    for p in self.state.game_state["alive_players"])
-        detective_alive  = any(self.player_roles[p] == "Detective" for p in self.state.game_state["alive_players"])
+        doctor_alive     = bool(self.alive_by_role["Doctor"])
+        detective_alive  = bool(self.alive_by_role["Detective"])
         match self.phase:
             case Phase.NIGHT_MAFIA:     return Phase.NIGHT_DOCTOR if doctor_alive else (Phase.NIGHT_DETECTIVE if detective_alive else Phase.DAY_DISCUSSION)
             case Phase.NIGHT_DOCTOR:    return Phase.NIGHT_DETECTIVE if detective_alive else Phase.DAY_DISCUSSION
@@ -192,28 +199,37 @@ class SecretMafiaEnv(ta.Env):
             case _:                     raise RuntimeError("Unknown phase")
                 
 
+    def _add_group_observation(self, recipients, message: str, observation_type, from_id: int = -1):
+        """ One observation entry shared by all recipients, instead of one add_observation call per recipient """
+        entry = (from_id, message, observation_type)
+        self.state.logs.append((from_id, message))
+        for pid in recipients:
+            self.state.observations[pid].append(entry)
+
+    def _options(self, exclude: int = -1) -> str:
+        if exclude not in self._option_strings:
+            self._option_strings[exclude] = ", ".join(f"[{p}]" for p in self.state.game_state["alive_players"] if p != exclude)
+        return self._option_strings[exclude]
+
     def _send_phase_prompts(self):
         gs = self.state.game_state
         alive = gs["alive_players"]
         self.next_player_ids: List[int] = []
 
         if self.phase == Phase.NIGHT_MAFIA:
-            mafia = [p for p in alive if self.player_roles[p] == "Mafia"]
-            targets = [p for p in alive if p not in mafia]
-            for p in mafia:
-                self.state.add_observation(to_id=p, message=f"Night has fallen. Mafia, agree on a victim.\nValid targets: {', '.join(f'[{t}]' for t in targets)}", observation_type=ta.ObservationType.GAME_MESSAGE)
+            mafia = sorted(self.alive_by_role["Mafia"])
+            targets = [p for p in alive if p not in self.alive_by_role["Mafia"]]
+            self._add_group_observation(mafia, f"Night has fallen. Mafia, agree on a victim.\nValid targets: {', '.join(f'[{t}]' for t in targets)}", ta.ObservationType.GAME_MESSAGE)
             self.next_player_ids = random.sample(mafia, k=len(mafia))
 
         elif self.phase == Phase.NIGHT_DOCTOR:
-            doc = next(p for p in alive if self.player_roles[p] == "Doctor")
-            opts = ", ".join(f"[{t}]" for t in alive if t != doc)
-            self.state.add_observation(to_id=doc, message=f"Night phase - choose one player to protect: {opts}", observation_type=ta.ObservationType.GAME_MESSAGE)
+            doc = next(iter(self.alive_by_role["Doctor"]))
+            self.state.add_observation(to_id=doc, message=f"Night phase - choose one player to protect: {self._options(exclude=doc)}", observation_type=ta.ObservationType.GAME_MESSAGE)
             self.next_player_ids = [doc]
 
         elif self.phase == Phase.NIGHT_DETECTIVE:
-            det = next(p for p in alive if self.player_roles[p] == "Detective")
-            opts = ", ".join(f"[{t}]" for t in alive if t != det)
-            self.state.add_observation(to_id=det, message=f"Night phase - choose one player to investigate: {opts}", observation_type=ta.ObservationType.GAME_MESSAGE)
+            det = next(iter(self.alive_by_role["Detective"]))
+            self.state.add_observation(to_id=det, message=f"Night phase - choose one player to investigate: {self._options(exclude=det)}", observation_type=ta.ObservationType.GAME_MESSAGE)
             self.next_player_ids = [det]
 
         elif self.phase == Phase.DAY_DISCUSSION:
@@ -223,8 +239,7 @@ class SecretMafiaEnv(ta.Env):
             self.next_player_ids = players * rounds
 
         elif self.phase == Phase.DAY_VOTING:
-            opts = ", ".join(f"[{p}]" for p in alive)
-            self.state.add_observation(to_id=-1, message=f"Voting phase - submit one vote in format [X]. Valid: {opts}", observation_type=ta.ObservationType.GAME_MESSAGE)
+            self.state.add_observation(to_id=-1, message=f"Voting phase - submit one vote in format [X]. Valid: {self._options()}", observation_type=ta.ObservationType.GAME_MESSAGE)
             self.next_player_ids = random.sample(alive, k=len(alive))
 
     def _handle_discussion(self, pid: int, action: str):    self.state.add_observation(from_id=pid, message=action, observation_type=ta.ObservationType.PLAYER_ACTION)
@@ -272,9 +287,7 @@ class SecretMafiaEnv(ta.Env):
         if broadcast_to_all:
             self.state.add_observation(from_id=pid, message=action, observation_type=ta.ObservationType.PLAYER_ACTION)
         elif broadcast_to_mafia_only:
-            mafia = [p for p in self.state.game_state["alive_players"] if self.player_roles[p] == "Mafia"]
-            for m in mafia:
-                self.state.add_observation(from_id=pid, to_id=m, message=action, observation_type=ta.ObservationType.PLAYER_ACTION)
+            self._add_group_observation(sorted(self.alive_by_role["Mafia"]), action, ta.ObservationType.PLAYER_ACTION, from_id=pid)
 
     def _mark_invalid(self, pid: int, reason: str):
         fatal = self.state.set_invalid_move(reason)
@@ -312,16 +325,16 @@ class SecretMafiaEnv(ta.Env):
     def _eliminate_player(self, pid: int, reason: str):
         if pid in self.state.game_state["alive_players"]:
             self.state.game_state["alive_players"].remove(pid)
+            self.alive_by_role[self.player_roles[pid]].discard(pid)
+            if self.player_roles[pid] != "Mafia": self.num_alive_village -= 1
+            self._option_strings.clear()
         self.state.add_observation(message=f"Player {pid} {reason}.", observation_type=ta.ObservationType.GAME_MESSAGE)
         self._check_win()
 
     def _check_win(self):
-        alive = self.state.game_state["alive_players"]
-        mafia_alive = [p for p in alive if self.player_roles[p] == "Mafia"]
-
-        if not mafia_alive:
-            villagers = [p for p in range(self.state.num_players) if self.player_roles[p] != "Mafia"]
-            self.state.set_winners(player_ids=villagers, reason="All Mafia were eliminated. Village wins!")
-        elif len(mafia_alive) >= len(alive) / 2:
-            mafia = [p for p in range(self.state.num_players) if self.player_roles[p] == "Mafia"]
-            self.state.set_winners(player_ids=mafia, reason="Mafia reached parity with villagers. Mafia wins!")
\ No newline at end of file
+        num_mafia_alive = len(self.alive_by_role["Mafia"])
+
+        if not num_mafia_alive:
+            self.state.set_winners(player_ids=self.team_members["Village"], reason="All Mafia were eliminated. Village wins!")
+        elif num_mafia_alive >= (num_mafia_alive + self.num_alive_village) / 2:
+            self.state.set_winners(player_ids=self.team_members["Mafia"], reason="Mafia reached parity with villagers. Mafia wins!")
\ No newline at end of file
@@ -0,0 +1,90 @@
+import re
+import itertools
+from math import comb
+from typing import List, Optional
+
+from game_classifier import GameInfo, classify
+from codenames_board import current_board
+
+
+# above this many exact allocations the Blotto answer is constrained by a pattern instead of an enum
+MAX_ENUM_SIZE = 5000
+
+
+def _last_match(pattern: str, observation: str):
+    matches = re.findall(pattern, observation)
+    return matches[-1] if matches else None
+
+
+def _blotto_allocations(fields: List[str], units: int) -> List[str]:
+    allocations = []
+    for cuts in itertools.combinations(range(units + len(fields) - 1), len(fields) - 1):
+        bounds = (-1,) + cuts + (units + len(fields) - 1,)
+        amounts = [bounds[i + 1] - bounds[i] - 1 for i in range(len(fields))]
+        allocations.append("[" + " ".join(f"{f}{a}" for f, a in zip(fields, amounts)) + "]")
+    return allocations
+
+
+def blotto_answer_schema(observation: str) -> dict:
+    fields = (_last_match(r"Available fields: ([A-Z](?:, [A-Z])*)", observation) or "A, B, C").split(", ")
+    units = int(_last_match(r"Units to allocate: (\d+)", observation) or 20)
+    if comb(units + len(fields) - 1, len(fields) - 1) <= MAX_ENUM_SIZE:
+        return {"type": "string", "enum": _blotto_allocations(fields, units)}
+    return {"type": "string", "pattern": r"^\[" + " ".join(rf"{f}\d{{1,{len(str(units))}}}" for f in fields) + r"\]$"}
+
+
+def ipd_answer_schema(info: GameInfo) -> dict:
+    opponents = [p for p in range(3) if p != info.player_id]
+    tokens = [[f"[{p} cooperate]", f"[{p} defect]"] for p in opponents]
+    return {"type": "string", "enum": [" ".join(combo) for combo in itertools.product(*tokens)]}
+
+
+def codenames_answer_schema(observation: str, info: GameInfo) -> dict:
+    if info.role == "Spymaster":
+        return {"type": "string", "pattern": r"^\[[A-Za-z]+ [1-9]\]$"}
+    board = current_board(observation)
+    unrevealed = [word for word, label in board.items() if not label]
+    if not unrevealed:
+        return {"type": "string", "pattern": r"^\[[A-Za-z]+\]$"}
+    return {"type": "string", "enum": [f"[{word}]" for word in unrevealed] + ["[pass]"]}
+
+
+def mafia_options(observation: str) -> List[str]:
+    """ Player ids listed on the last 'Valid targets:' / 'Valid:' line """
+    option_line = max(observation.rfind("Valid targets:"), observation.rfind("Valid:"), observation.rfind("choose one player to"))
+    return re.findall(r"\[(\d+)\]", observation[option_line:].split("\n")[0])
+
+
+def mafia_answer_schema(observation: str) -> dict:
+    options = mafia_options(observation)
+    if not options:
+        return {"type": "string", "pattern": r"^\[\d+\]$"}
+    return {"type": "string", "enum": [f"[{option}]" for option in options]}
+
+
+def action_answer_schema(observation: str) -> Optional[dict]:
+    """ JSON schema of a valid final action for the current turn, or None when the turn is free text """
+    info = classify(observation)
+    if info.is_free_chat:
+        return None
+    if info.game == "ColonelBlotto":
+        return blotto_answer_schema(observation)
+    if info.game == "ThreePlayerIPD":
+        return ipd_answer_schema(info)
+    if info.game == "Codenames":
+        return codenames_answer_schema(observation, info)
+    if info.game == "SecretMafia":
+        return mafia_answer_schema(observation)
+    return None
+
+
+def react_action_schema(observation: str) -> Optional[dict]:
+    """ ReAct schema whose 'answer' can only be a valid action, passed to ollama's structured output """
+    answer_schema = action_answer_schema(observation)
+    if answer_schema is None:
+        return None
+    return {
+        "type": "object",
+        "properties": {"thinking": {"type": "string"}, "answer": answer_schema},
+        "required": ["thinking", "answer"],
+    }
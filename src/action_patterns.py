@@ -0,0 +1,100 @@
+import re
+from typing import Optional
+
+from game_classifier import GameInfo, classify
+
+
+# same regexes the envs use to read an action, see envs/*/env.py
+BLOTTO_BRACKET_PAT = re.compile(r"\[([^\]]+)\]")                                # ColonelBlottoEnv._parse_allocation_input
+BLOTTO_TOKEN_PAT = re.compile(r"([A-Za-z])\s*(?::\s*)?(\d+)", re.IGNORECASE)   # ColonelBlottoEnv._parse_allocation_input
+IPD_TOKEN_PAT = re.compile(r"\[\s*(\d+)\s+(cooperate|defect)\s*\]", re.I)      # ThreePlayerIPDEnv.token_pat
+CODENAMES_CLUE_PAT = re.compile(r"\[(\w+)\s+(\d+)\]")                           # CodenamesEnv.step, spymaster
+CODENAMES_GUESS_PAT = re.compile(r"\[(\w+)\]")                                  # CodenamesEnv.step, operative
+MAFIA_VOTE_PAT = re.compile(r"\[(?:player\s*)?(\d+)\]", re.IGNORECASE)          # SecretMafiaEnv.voting_pattern
+
+
+def _blotto_action(text: str) -> Optional[str]:
+    for m in BLOTTO_BRACKET_PAT.finditer(text):
+        s = m.group(1).strip()
+        tokens = list(BLOTTO_TOKEN_PAT.finditer(s))
+        fields = [t.group(1).upper() for t in tokens]
+        if not tokens or len(set(fields)) != len(fields):
+            continue
+        if re.sub(r"[\s,]+", "", BLOTTO_TOKEN_PAT.sub("", s)):
+            continue
+        return m.group(0)
+    return None
+
+
+def _ipd_action(text: str, num_opponents: int = 2) -> Optional[str]:
+    matches = list(IPD_TOKEN_PAT.finditer(text))
+    if len({m.group(1) for m in matches}) < num_opponents:
+        return None
+    return text[matches[0].start():matches[-1].end()]
+
+
+def _single_match(pattern: re.Pattern):
+    def finder(text: str) -> Optional[str]:
+        m = pattern.search(text)
+        return m.group(0) if m else None
+    return finder
+
+
+ACTION_FINDERS = {
+    ("ColonelBlotto", None): _blotto_action,
+    ("ThreePlayerIPD", None): _ipd_action,
+    ("Codenames", "Spymaster"): _single_match(CODENAMES_CLUE_PAT),
+    ("Codenames", "Operative"): _single_match(CODENAMES_GUESS_PAT),
+    ("SecretMafia", None): _single_match(MAFIA_VOTE_PAT),
+}
+
+
+def finder_key(info: GameInfo):
+    return info.game, info.role if info.game == "Codenames" else None
+
+
+class ActionStopper:
+    """
+    Watches a streamed generation and tells when a complete action for the game has appeared,
+    so the caller can abort the generation instead of waiting for num_predict or a stop string.
+    """
+
+    def __init__(self, game: str, role: str = None, answer_marker: str = None, think_tags=("<think>", "</think>")):
+        self.finder = ACTION_FINDERS[(game, role)]
+        self.answer_marker = answer_marker
+        self.think_tags = think_tags
+
+    @classmethod
+    def from_observation(cls, observation: str, answer_marker: str = None):
+        info = classify(observation)
+        if info.is_free_chat or finder_key(info) not in ACTION_FINDERS:
+            return None
+        return cls(*finder_key(info), answer_marker)
+
+    def _searchable(self, text: str) -> Optional[str]:
+        open_tag, close_tag = self.think_tags
+        if open_tag in text:
+            if close_tag not in text:
+                return None
+            text = text.split(close_tag)[-1]
+        if self.answer_marker:
+            if self.answer_marker not in text:
+                return None
+            text = text.split(self.answer_marker)[-1]
+        return text
+
+    def find(self, text: str) -> Optional[str]:
+        searchable = self._searchable(text)
+        if searchable is None:
+            return None
+        return self.finder(searchable)
+
+    def cut(self, text: str) -> Optional[str]:
+        """
+        Return text truncated right after the first complete action, or None when there is none yet. The prefix can
+        hold brackets the finder skipped ("Round [2] ...") that the env would parse first: submit find(), not this.
+        """
+        action = self.find(text)
+        if action is None:
+            return None
+        return text[:text.rindex(action) + len(action)]
@@ -0,0 +1,123 @@
+"""
+Deterministic action validators keyed like action_patterns.ACTION_FINDERS, reusing the env's own parsing
+(ColonelBlottoEnv._parse_allocation_input, ThreePlayerIPDEnv.token_pat, VoteHandler.parse and the Codenames step
+regexes), so a structured action is accepted or rejected in microseconds instead of by LLM validation.
+Free-chat turns, unknown games and envs that cannot be loaded return None: the caller falls back to the LLM.
+"""
+import functools
+from typing import Optional
+
+from models import ReActWithValidation
+from game_classifier import GameInfo, classify
+from action_grammar import _last_match, mafia_options
+from action_patterns import CODENAMES_CLUE_PAT, CODENAMES_GUESS_PAT, finder_key
+from codenames_board import current_board
+from env_loader import load_env_module
+
+
+@functools.lru_cache(maxsize=None)
+def _env_module(name: str):
+    """ envs/<name>/env.py, or None where textarena (or the env folder) is not available, e.g. the Modal image """
+    try:
+        return load_env_module(name)
+    except Exception:
+        return None
+
+
+@functools.lru_cache(maxsize=64)
+def _blotto_env(num_fields: int, units: int):
+    module = _env_module("ColonelBlotto")
+    return module.ColonelBlottoEnv(num_fields=num_fields, num_total_units=units) if module is not None else None
+
+
+def _result(is_valid: bool, action: str, reasoning: str) -> ReActWithValidation:
+    return ReActWithValidation(reasoning=reasoning, action=action if is_valid else "", is_action_valid=is_valid)
+
+
+def _validate_blotto(observation: str, action: str, info: GameInfo) -> Optional[ReActWithValidation]:
+    fields = (_last_match(r"Available fields: ([A-Z](?:, [A-Z])*)", observation) or "A, B, C").split(", ")
+    units = int(_last_match(r"Units to allocate: (\d+)", observation) or 20)
+    env = _blotto_env(len(fields), units)
+    if env is None:
+        return None
+    allocation, message = env._parse_allocation_input(action)
+    if allocation is None:
+        return _result(False, action, message)
+    return _result(True, "[" + " ".join(f"{field}{unit}" for field, unit in zip(env.field_names, allocation)) + "]", message)
+
+
+def _validate_ipd(observation: str, action: str, info: GameInfo) -> Optional[ReActWithValidation]:
+    module = _env_module("ThreePlayerIPD")
+    if module is None or info.player_id is None:
+        return None
+    decisions = {}
+    for pid, choice in module.ThreePlayerIPDEnv().token_pat.findall(action):
+        if int(pid) != info.player_id and 0 <= int(pid) < 3:
+            decisions[int(pid)] = choice.lower() # the env applies tokens in order, the last one per opponent wins
+    missing = [pid for pid in range(3) if pid != info.player_id and pid not in decisions]
+    if missing:
+        return _result(False, action, f"No decision for player(s) {missing}, give one token per opponent, e.g. [{missing[0]} cooperate]")
+    return _result(True, " ".join(f"[{pid} {choice}]" for pid, choice in sorted(decisions.items())), "One decision per opponent.")
+
+
+def _validate_clue(observation: str, action: str, info: GameInfo) -> Optional[ReActWithValidation]:
+    board = current_board(observation)
+    if not board:
+        return None
+    match = CODENAMES_CLUE_PAT.search(action)
+    if match is None:
+        return _result(False, action, "Invalid clue. Provide a word and a number (e.g., [dust 2]).")
+    # lowercased, unlike the env, so a capitalized board word is caught too
+    word = match.group(1).lower()
+    clashes = [board_word for board_word in board if word in board_word or board_word in word]
+    if clashes:
+        return _result(False, action, f"The clue '{word}' is or contains the board word(s) {clashes}, this loses the game instantly.")
+    return _result(True, match.group(0), "The clue is not on the board.")
+
+
+def _validate_guess(observation: str, action: str, info: GameInfo) -> Optional[ReActWithValidation]:
+    board = current_board(observation)
+    if not board:
+        return None
+    match = CODENAMES_GUESS_PAT.search(action)
+    if match is None:
+        return _result(False, action, "Invalid guess. Provide one word in brackets (e.g., [breeze]) or [pass].")
+    word = match.group(1).lower()
+    if word == "pass":
+        return _result(True, "[pass]", "Passing ends the guessing.")
+    if word not in board:
+        return _result(False, action, f"'{word}' is not on the board.")
+    if board[word]:
+        return _result(False, action, f"'{word}' has already been guessed.")
+    return _result(True, f"[{word}]", "The word is on the board and not guessed yet.")
+
+
+def _validate_vote(observation: str, action: str, info: GameInfo) -> Optional[ReActWithValidation]:
+    module = _env_module("SecretMafia")
+    if module is None:
+        return None
+    target = module.VoteHandler.parse(action)
+    if target is None:
+        return _result(False, action, "Invalid vote. Submit one player id in the format [X].")
+    options = mafia_options(observation)
+    if options and str(target) not in options:
+        return _result(False, action, f"Player {target} is not a valid target, choose one of {', '.join(f'[{o}]' for o in options)}.")
+    return _result(True, f"[{target}]", "The target is valid.")
+
+
+VALIDATORS = {
+    ("ColonelBlotto", None): _validate_blotto,
+    ("ThreePlayerIPD", None): _validate_ipd,
+    ("Codenames", "Spymaster"): _validate_clue,
+    ("Codenames", "Operative"): _validate_guess,
+    ("SecretMafia", None): _validate_vote,
+}
+
+
+def validate_action(observation: str, action: str, info: GameInfo = None) -> Optional[ReActWithValidation]:
+    """ The validation of a structured action with the env's parsing, None when only the LLM can judge it """
+    info = info or classify(observation)
+    validator = VALIDATORS.get(finder_key(info))
+    if info.is_free_chat or validator is None:
+        return None
+    return validator(observation, action or "", info)
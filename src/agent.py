@@ -1,4 +1,7 @@
 from abc import ABC, abstractmethod
+from typing import List
+from action_patterns import ActionStopper
+from observation_budget import ObservationBudgeter
 
 STANDARD_GAME_PROMPT = "You are a competitive game player. Make sure you read the game instructions carefully, and always follow the required format."
 
@@ -19,7 +22,7 @@ class Agent(ABC):
 
 class LLMAgent(Agent):
     def __init__(self, model_name: str, device: str = "auto", quantize: bool = False, max_new_tokens: int = 1024,
-                 hf_kwargs: dict = None,):
+                 hf_kwargs: dict = None, stop_on_action: bool = False, max_context_tokens: int = None, keep_recent_phases: int = 2):
         """
         Initialize the Hugging Face local agent.
         
@@ -27,11 +30,14 @@ class LLMAgent(Agent):
             model_name (str): The name of the model.
             device (str): Device to use for model inference (default: "auto").
             quantize (bool): Whether to load the model in 8-bit quantized format (default: False).
+            stop_on_action (bool): Stop generating as soon as a complete action for the game appears and submit that action alone (default: False).
+            max_context_tokens (int): Context window the prompt plus generation must fit in (default: the model's max_position_embeddings).
+            keep_recent_phases (int): Game phases at the end of the observation kept verbatim when it has to be shortened (default: 2).
         """
         super().__init__()
         
         try:
-            from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
+            from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM, StoppingCriteria, StoppingCriteriaList
         except ImportError:
             raise ImportError("Transformers library is required. Install it with: pip install transformers")
             
@@ -43,6 +49,33 @@ class LLMAgent(Agent):
         else: self.model = AutoModelForCausalLM.from_pretrained(model_name, device_map=device, **hf_kwargs)
         self.system_prompt = STANDARD_GAME_PROMPT
         self.pipeline = pipeline('text-generation', max_new_tokens=max_new_tokens, model=self.model, tokenizer=self.tokenizer) ## Initialize the Hugging Face pipeline
+        self.stop_on_action = stop_on_action
+        self._stopping_criteria_cls = (StoppingCriteria, StoppingCriteriaList)
+        self.max_new_tokens = max_new_tokens
+        self.max_context_tokens = max_context_tokens or getattr(self.model.config, "max_position_embeddings", None)
+        self.budgeter = ObservationBudgeter(lambda text: len(self.tokenizer(text, add_special_tokens=False)["input_ids"]), keep_recent_phases)
+
+    def _prompt(self, observation: str) -> str:
+        """ System prompt and observation, old discussion dropped when they would not leave room for max_new_tokens """
+        if self.max_context_tokens is None:
+            return self.system_prompt+"\n"+observation
+        budget = self.max_context_tokens - self.max_new_tokens - self.budgeter.count_tokens(self.system_prompt+"\n") - 8 # special tokens
+        return self.system_prompt+"\n"+self.budgeter.fit(observation, budget)
+
+    def _action_stopping_criteria(self, prompt: str, action_stopper):
+        """ Build a stopping criteria list that ends generation once the new tokens contain a complete action """
+        StoppingCriteria, StoppingCriteriaList = self._stopping_criteria_cls
+        tokenizer = self.tokenizer
+        prompt_length = len(tokenizer(prompt)["input_ids"])
+
+        class ActionStoppingCriteria(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                import torch
+                text = tokenizer.decode(input_ids[0, prompt_length:], skip_special_tokens=True)
+                done = "]" in text and action_stopper.find(text) is not None
+                return torch.full((input_ids.shape[0],), done, dtype=torch.bool, device=input_ids.device)
+
+        return StoppingCriteriaList([ActionStoppingCriteria()])
     
     def __call__(self, observation: str) -> str:
         """
@@ -55,12 +88,43 @@ class LLMAgent(Agent):
             str: The response generated by the model.
         """
         try: # Generate a response
-            response = self.pipeline(self.system_prompt+"\n"+observation, num_return_sequences=1, return_full_text=False)
+            prompt = self._prompt(observation)
+            action_stopper = ActionStopper.from_observation(observation) if self.stop_on_action else None
+            if action_stopper is None:
+                response = self.pipeline(prompt, num_return_sequences=1, return_full_text=False)
+            else:
+                response = self.pipeline(prompt, num_return_sequences=1, return_full_text=False,
+                                         stopping_criteria=self._action_stopping_criteria(prompt, action_stopper))
             action = response[0]['generated_text'].strip() # Extract and return the text output
+            if action_stopper is not None:
+                # the action alone: the text before it can hold brackets the env would parse first, e.g. "Round [2]"
+                action = action_stopper.find(action) or action
             return action
         except Exception as e:
             return f"An error occurred: {e}"
 
+    def batch(self, observations: List[str], batch_size: int = 8) -> List[str]:
+        """
+        Several independent observations in one padded pipeline call (one forward pass per step for the whole batch).
+        The stop-on-action criteria looks at the first sequence only, so it is not used here; actions are still extracted.
+        """
+        try:
+            if self.tokenizer.pad_token_id is None:
+                self.tokenizer.pad_token_id = self.tokenizer.eos_token_id
+            self.tokenizer.padding_side = "left" # decoder-only models continue from the right edge
+            prompts = [self._prompt(observation) for observation in observations]
+            responses = self.pipeline(prompts, num_return_sequences=1, return_full_text=False, batch_size=batch_size)
+            actions = []
+            for observation, response in zip(observations, responses):
+                action = response[0]['generated_text'].strip()
+                action_stopper = ActionStopper.from_observation(observation) if self.stop_on_action else None
+                if action_stopper is not None:
+                    action = action_stopper.find(action) or action
+                actions.append(action)
+            return actions
+        except Exception as e:
+            return [f"An error occurred: {e}"] * len(observations)
+
 class HumanAgent(Agent):
     """ Human agent class that allows the user to input actions manually """
     def __init__(self):
@@ -0,0 +1,29 @@
+import importlib
+
+
+# agent name -> "module:Class", modules are only imported when the agent is loaded, so
+# heavy dependencies (crewai for Track2, transformers for LLMAgent) are paid for by the agents that use them
+AGENT_REGISTRY = {
+    "LLM": "agent:LLMAgent",
+    "BaseLine": "stars_agent_track2_baseline:StarsAgentTrack2BaseLine",
+    "Track2": "stars_agent_track2:StarsAgentTrack2",
+    "V2": "stars_agent_track2_v2:StarsAgentTrack2V2",
+    "V3": "stars_agent_track2_v3:StarsAgentTrack2V3",
+    "V4": "stars_agent_track2_v4:StarsAgentTrack2V4",
+    "V5": "stars_agent_track2_v5:StarsAgentTrack2V5",
+    "V6": "stars_agent_track2_v6:StarsAgentTrack2V6",
+    "V7": "stars_agent_track2_v7:StarsAgentTrack2V7",
+    "V8": "stars_agent_track2_v8:StarsAgentTrack2V8",
+    "V9": "stars_agent_track2_v9:StarsAgentTrack2V9",
+}
+
+
+def agent_class(name: str):
+    if name not in AGENT_REGISTRY:
+        raise Exception(f"unknown agent {name}, available: {sorted(AGENT_REGISTRY)}")
+    module_name, class_name = AGENT_REGISTRY[name].split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def load_agent(name: str, **kwargs):
+    return agent_class(name)(**kwargs)
@@ -0,0 +1,158 @@
+"""
+Replay benchmark: feeds a corpus of recorded observations through agent versions and reports
+turn latency, LLM calls, tokens, Python executions and action validity per turn.
+
+    uv run benchmark.py --agents V7 V8 V9 --corpus samples.json captures/
+"""
+import os
+import json
+import time
+import argparse
+import statistics
+from datetime import datetime
+from typing import List
+
+import utils
+from action_patterns import ActionStopper
+from action_validators import validate_action
+from game_classifier import classify
+from agent_registry import load_agent
+from sandbox import sandbox_report
+
+
+AGENT_VERSIONS = ["V4", "V5", "V6", "V7", "V8", "V9"]
+CAPTURE_DIR = "captures"
+
+
+def capture_observation(observation: str, game: str = None, capture_dir: str = CAPTURE_DIR):
+    """ Append an observation seen online to today's capture file, so it can be replayed later """
+    os.makedirs(capture_dir, exist_ok=True)
+    path = os.path.join(capture_dir, f"{datetime.now().strftime('%Y%m%d')}.jsonl")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"game": game or classify(observation).game, "observation": observation}, ensure_ascii=False) + "\n")
+
+
+def load_corpus(paths: List[str]) -> List[dict]:
+    """
+    Load observations from samples.json style files ({game: [observation, ...]}), jsonl files with an
+    'observation' field per line, or directories containing either.
+    """
+    corpus = []
+    for path in paths:
+        if os.path.isdir(path):
+            corpus += load_corpus(sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith((".json", ".jsonl"))))
+        elif path.endswith(".jsonl"):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line) if line.strip() else {}
+                    if record.get("observation"):
+                        corpus.append({"game": record.get("game") or classify(record["observation"]).game, "observation": record["observation"]})
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                samples = json.load(f)
+            for game_name, observations in samples.items():
+                corpus += [{"game": game_name, "observation": observation} for observation in observations]
+    return corpus
+
+
+def is_valid_action(observation: str, action: str) -> bool:
+    """ Free-chat turns accept any text, otherwise the env's own parsing must accept the action """
+    validation = validate_action(observation, action)
+    if validation is not None:
+        return validation.is_action_valid
+    stopper = ActionStopper.from_observation(observation)
+    if stopper is None:
+        return bool(action and action.strip())
+    return stopper.find(action) is not None
+
+
+def replay(agent, corpus: List[dict]) -> List[dict]:
+    rows = []
+    for record in corpus:
+        if hasattr(agent, "new_game"):
+            agent.new_game() # records carry no game id, answers kept from another record would count as hits
+        usage_before = dict(getattr(agent, "usage", {}))
+        runs_before = utils.EXECUTION_STATS["runs"]
+        cache_hits_before = utils.EXECUTION_STATS["cache_hits"]
+        python_s_before = utils.EXECUTION_STATS["seconds"]
+        start_time = time.time()
+        try:
+            action, error = agent(record["observation"]), None
+        except Exception as e:
+            action, error = "", repr(e)
+        latency = time.time() - start_time
+        usage = getattr(agent, "usage", {})
+        rows.append({
+            "game": record["game"],
+            "latency_s": latency,
+            "llm_calls": usage.get("llm_calls", 0) - usage_before.get("llm_calls", 0),
+            "prompt_tokens": usage.get("prompt_tokens", 0) - usage_before.get("prompt_tokens", 0),
+            "eval_tokens": usage.get("eval_tokens", 0) - usage_before.get("eval_tokens", 0),
+            "python_runs": utils.EXECUTION_STATS["runs"] - runs_before,
+            "python_cache_hits": utils.EXECUTION_STATS["cache_hits"] - cache_hits_before,
+            "python_s": utils.EXECUTION_STATS["seconds"] - python_s_before,
+            "valid": error is None and is_valid_action(record["observation"], action),
+            "error": error,
+            "action": action,
+        })
+    return rows
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def summarize(version: str, rows: List[dict]) -> dict:
+    latencies = [row["latency_s"] for row in rows]
+    return {
+        "agent": version,
+        "turns": len(rows),
+        "p50_latency_s": statistics.median(latencies),
+        "p95_latency_s": _percentile(latencies, 0.95),
+        "llm_calls_per_turn": statistics.mean(row["llm_calls"] for row in rows),
+        "tokens_per_turn": statistics.mean(row["prompt_tokens"] + row["eval_tokens"] for row in rows),
+        "eval_tokens_per_turn": statistics.mean(row["eval_tokens"] for row in rows),
+        "python_runs_per_turn": statistics.mean(row["python_runs"] for row in rows),
+        "python_cache_hits_per_turn": statistics.mean(row["python_cache_hits"] for row in rows),
+        "python_s_per_turn": statistics.mean(row["python_s"] for row in rows),
+        "valid_rate": sum(row["valid"] for row in rows) / len(rows),
+        "errors": sum(row["error"] is not None for row in rows),
+    }
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", nargs="+", default=["V7", "V8", "V9"], choices=AGENT_VERSIONS)
+    parser.add_argument("--corpus", nargs="+", default=["samples.json"])
+    parser.add_argument("--games", nargs="*", default=None, help="only replay these game names")
+    parser.add_argument("--limit", type=int, default=None, help="max observations per game")
+    parser.add_argument("--model", default="qwen3:8b")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if args.games:
+        corpus = [record for record in corpus if record["game"] in args.games]
+    if args.limit:
+        limited, per_game = [], {}
+        for record in corpus:
+            per_game[record["game"]] = per_game.get(record["game"], 0) + 1
+            if per_game[record["game"]] <= args.limit:
+                limited.append(record)
+        corpus = limited
+
+    summaries = []
+    for version in args.agents:
+        rows = replay(load_agent(version, model_name=args.model), corpus)
+        summaries.append(summarize(version, rows))
+        os.makedirs("eval_results", exist_ok=True)
+        pd.DataFrame(rows).to_csv(f"eval_results/benchmark_{version}.csv", index=False)
+
+    df = pd.DataFrame(summaries)
+    print("\n=== Replay Benchmark ===")
+    print(df.to_markdown(index=False, floatfmt=".3f"))
+    df.to_csv("eval_results/benchmark_summary.csv", index=False)
+    print("\nSaved -> eval_results/benchmark_summary.csv")
+    print(f"Sandbox: {sandbox_report()}")
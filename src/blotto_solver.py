@@ -0,0 +1,284 @@
+"""
+Colonel Blotto solver for any number of fields, units and field values (envs/ColonelBlotto/env.py supports 2-26 fields).
+
+An allocation is a tuple of units per field that uses every unit. A round is won by the side holding more field value
+(the env counts fields, i.e. every value is 1); the solver maximizes the expected round score
+P(win) + P(tie) / 2 against an opponent distribution {allocation: weight}.
+
+    - best_response: exact knapsack DP (leave / tie / win each field) against one opponent allocation
+    - margin_response: DP over fields x units maximizing the expected field-value margin against the distribution
+    - solve: seeds from both, then exhaustive search when the allocation space is small, otherwise sampling and
+      hill climbing; anytime, returns the best allocations found when the time budget runs out
+
+    uv run blotto_solver.py --fields 5 --units 30 --budget 0.5
+"""
+import re
+import time
+import random
+import argparse
+import itertools
+from math import comb
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from game_classifier import GameInfo
+from speculation import CANDIDATE_GENERATORS
+
+
+Allocation = Tuple[int, ...]
+
+# above this many allocations solve() samples and hill climbs instead of enumerating
+MAX_EXHAUSTIVE = 20000
+BLOTTO_TIME_BUDGET_S = 0.3
+BLOTTO_ROUND_PAT = re.compile(r"Commander (Alpha|Beta) allocated:\s*(.*)")
+BLOTTO_FIELD_UNITS_PAT = re.compile(r"([A-Z]):\s*(\d+)")
+
+
+def random_allocation(num_fields: int, units: int, rng: random.Random) -> Allocation:
+    """ Uniform over all allocations using every unit (stars and bars) """
+    cuts = sorted(rng.sample(range(units + num_fields - 1), num_fields - 1))
+    bounds = [-1] + cuts + [units + num_fields - 1]
+    return tuple(bounds[i + 1] - bounds[i] - 1 for i in range(num_fields))
+
+
+def all_allocations(num_fields: int, units: int) -> Iterator[Allocation]:
+    for cuts in itertools.combinations(range(units + num_fields - 1), num_fields - 1):
+        bounds = (-1,) + cuts + (units + num_fields - 1,)
+        yield tuple(bounds[i + 1] - bounds[i] - 1 for i in range(num_fields))
+
+
+def format_allocation(allocation: Sequence[int], field_names: Sequence[str]) -> str:
+    return "[" + " ".join(f"{name}{units}" for name, units in zip(field_names, allocation)) + "]"
+
+
+def normalize(distribution: Dict[Allocation, float]) -> Dict[Allocation, float]:
+    total = sum(distribution.values())
+    return {allocation: weight / total for allocation, weight in distribution.items() if weight > 0} if total else {}
+
+
+def mix(*weighted: Tuple[Dict[Allocation, float], float]) -> Dict[Allocation, float]:
+    """ Weighted mixture of opponent distributions, e.g. mix((history, 0.8), (prior, 0.2)) """
+    mixed = {}
+    for distribution, weight in weighted:
+        for allocation, p in normalize(distribution).items():
+            mixed[allocation] = mixed.get(allocation, 0.0) + weight * p
+    return normalize(mixed)
+
+
+def _past(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.perf_counter() > deadline
+
+
+class BlottoSolver:
+
+    def __init__(self, num_fields: int = 3, units: int = 20, values: Optional[Sequence[float]] = None,
+                 max_exhaustive: int = MAX_EXHAUSTIVE, seed: Optional[int] = None):
+        self.num_fields = num_fields
+        self.units = units
+        self.values = tuple(values) if values is not None else (1,) * num_fields
+        self.max_exhaustive = max_exhaustive
+        self.rng = random.Random(seed)
+        self.space_size = comb(units + num_fields - 1, num_fields - 1)
+
+    def round_score(self, allocation: Allocation, opponent: Allocation) -> float:
+        margin = 0
+        for x, y, v in zip(allocation, opponent, self.values):
+            if x > y: margin += v
+            elif y > x: margin -= v
+        return 1.0 if margin > 0 else (0.5 if margin == 0 else 0.0)
+
+    def expected_score(self, allocation: Allocation, opponent: Dict[Allocation, float]) -> float:
+        return sum(p * self.round_score(allocation, y) for y, p in opponent.items())
+
+    def uniform_opponent(self, samples: int = 200) -> Dict[Allocation, float]:
+        if self.space_size <= samples:
+            return normalize({y: 1.0 for y in all_allocations(self.num_fields, self.units)})
+        return normalize({random_allocation(self.num_fields, self.units, self.rng): 1.0 for _ in range(samples)})
+
+    def even_allocation(self) -> Allocation:
+        return tuple(self.units // self.num_fields + (i < self.units % self.num_fields) for i in range(self.num_fields))
+
+    def best_response(self, opponent: Allocation, deadline: Optional[float] = None) -> Optional[Allocation]:
+        """
+        Multiple-choice knapsack over fields, relative to losing every contested field: field i can be left
+        (0 units), tied (opponent[i] units, gains value_i) or won (opponent[i] + 1 units, gains 2 * value_i, value_i on
+        an empty field). Maximizes the value margin; leftover units go to the won fields. None past the deadline.
+        """
+        options = []
+        for y, v in zip(opponent, self.values):
+            options.append([(0, 0.0), (y, float(v)), (y + 1, 2.0 * v)] if y > 0 else [(0, 0.0), (1, float(v))])
+        neg = float("-inf")
+        best = [[0.0] * (self.units + 1)] + [[neg] * (self.units + 1) for _ in range(self.num_fields)]
+        choice = [[0] * (self.units + 1) for _ in range(self.num_fields)]
+        for i in range(self.num_fields):
+            if _past(deadline):
+                return None
+            for u in range(self.units + 1):
+                for cost, gain in options[i]:
+                    if cost <= u and best[i][u - cost] + gain > best[i + 1][u]:
+                        best[i + 1][u], choice[i][u] = best[i][u - cost] + gain, cost
+        allocation, u = [0] * self.num_fields, self.units
+        for i in reversed(range(self.num_fields)):
+            allocation[i] = choice[i][u]
+            u -= allocation[i]
+        won = [i for i in range(self.num_fields) if allocation[i] > opponent[i]] or [max(range(self.num_fields), key=lambda i: self.values[i])]
+        for k in range(u):
+            allocation[won[k % len(won)]] += 1
+        return tuple(allocation)
+
+    def margin_response(self, opponent: Dict[Allocation, float], deadline: Optional[float] = None) -> Optional[Allocation]:
+        """
+        Maximizes sum_i value_i * (P(opponent_i < x_i) - P(opponent_i > x_i)), separable so exact by DP.
+        O(fields * units^2), None past the deadline.
+        """
+        gains = []
+        for i in range(self.num_fields):
+            mass = [0.0] * (self.units + 2)
+            for y, p in opponent.items():
+                mass[min(y[i], self.units + 1)] += p
+            below, gain = 0.0, []
+            for a in range(self.units + 1):
+                above = 1.0 - below - mass[a]
+                gain.append(self.values[i] * (below - above))
+                below += mass[a]
+            gains.append(gain)
+        neg = float("-inf")
+        best = [[0.0] + [neg] * self.units] + [[neg] * (self.units + 1) for _ in range(self.num_fields)]
+        choice = [[0] * (self.units + 1) for _ in range(self.num_fields)]
+        for i in range(self.num_fields):
+            for u in range(self.units + 1):
+                if u % 64 == 0 and _past(deadline):
+                    return None
+                for a in range(u + 1):
+                    score = best[i][u - a] + gains[i][a]
+                    if score > best[i + 1][u]:
+                        best[i + 1][u], choice[i][u] = score, a
+        allocation, u = [0] * self.num_fields, self.units
+        for i in reversed(range(self.num_fields)):
+            allocation[i] = choice[i][u]
+            u -= allocation[i]
+        return tuple(allocation)
+
+    def _neighbours(self, allocation: Allocation) -> Iterator[Allocation]:
+        """ Move 1 unit, or half of a field, from one field to another """
+        for i in range(self.num_fields):
+            if not allocation[i]:
+                continue
+            for amount in {1, (allocation[i] + 1) // 2}:
+                for j in range(self.num_fields):
+                    if j != i:
+                        moved = list(allocation)
+                        moved[i] -= amount
+                        moved[j] += amount
+                        yield tuple(moved)
+
+    def solve(self, opponent: Optional[Dict[Allocation, float]] = None, time_budget_s: float = BLOTTO_TIME_BUDGET_S,
+              top_k: int = 3) -> dict:
+        """
+        Anytime search for the allocations with the best expected round score against the opponent distribution
+        (uniform over all allocations when None). Returns the top_k found before the time budget ran out;
+        the clock is checked between and inside every step, the even split is always evaluated.
+        """
+        start_time = time.perf_counter()
+        deadline = start_time + time_budget_s
+        opponent = normalize(opponent) if opponent else self.uniform_opponent()
+        scores: Dict[Allocation, float] = {}
+
+        def evaluate(allocation: Allocation) -> float:
+            if allocation not in scores:
+                scores[allocation] = self.expected_score(allocation, opponent)
+            return scores[allocation]
+
+        seeds = [self.even_allocation()]
+        evaluate(seeds[0])
+        seed_makers = [lambda: self.margin_response(opponent, deadline)]
+        seed_makers += [lambda y=y: self.best_response(y, deadline) for y, _ in sorted(opponent.items(), key=lambda item: -item[1])[:20]]
+        for make_seed in seed_makers:
+            seed = make_seed() if not _past(deadline) else None
+            if seed is None:
+                break
+            evaluate(seed)
+            seeds.append(seed)
+
+        exhaustive = self.space_size <= self.max_exhaustive
+        if exhaustive:
+            for n, allocation in enumerate(all_allocations(self.num_fields, self.units)):
+                evaluate(allocation)
+                if n % 256 == 0 and time.perf_counter() > deadline:
+                    exhaustive = False
+                    break
+        else:
+            # hill climb from the seeds, then from random restarts, until the budget is spent
+            starts = seeds
+            while time.perf_counter() < deadline:
+                current = starts.pop() if starts else random_allocation(self.num_fields, self.units, self.rng)
+                improved = True
+                while improved and time.perf_counter() < deadline:
+                    improved = False
+                    for n, neighbour in enumerate(self._neighbours(current)):
+                        if n % 16 == 15 and _past(deadline):
+                            break
+                        if evaluate(neighbour) > scores[current]:
+                            current, improved = neighbour, True
+                            break
+
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:top_k]
+        return {"allocations": [allocation for allocation, _ in ranked], "scores": [round(score, 4) for _, score in ranked],
+                "evaluated": len(scores), "space_size": self.space_size, "exhaustive": exhaustive,
+                "elapsed_s": round(time.perf_counter() - start_time, 4)}
+
+
+def opponent_history(observation: str, player_id: int, field_names: Sequence[str]) -> List[Allocation]:
+    """ Opponent allocations of the finished rounds in the observation, oldest first """
+    opponent = "Beta" if player_id == 0 else "Alpha"
+    history = []
+    for side, allocation in BLOTTO_ROUND_PAT.findall(observation):
+        if side == opponent:
+            units = dict(BLOTTO_FIELD_UNITS_PAT.findall(allocation))
+            history.append(tuple(int(units.get(name, 0)) for name in field_names))
+    return history
+
+
+def history_distribution(history: Sequence[Allocation], decay: float = 0.8) -> Dict[Allocation, float]:
+    """ Recent rounds weigh more, the latest has weight 1 """
+    distribution = {}
+    for age, allocation in enumerate(reversed(history)):
+        distribution[allocation] = distribution.get(allocation, 0.0) + decay ** age
+    return normalize(distribution)
+
+
+def blotto_candidates(observation: str, info: GameInfo, opponent_store=None, prior: Optional[Dict[Allocation, float]] = None,
+                      time_budget_s: float = BLOTTO_TIME_BUDGET_S) -> List[str]:
+    """
+    speculation.CANDIDATE_GENERATORS entry: best allocations against the opponent's past rounds, mixed with a prior
+    (the allocation frequencies in the session's opponent store when it has some, otherwise uniform)
+    """
+    fields = re.findall(r"Available fields: ([A-Z](?:, [A-Z])*)", observation)
+    units = re.findall(r"Units to allocate: (\d+)", observation)
+    field_names = fields[-1].split(", ") if fields else ["A", "B", "C"]
+    solver = BlottoSolver(num_fields=len(field_names), units=int(units[-1]) if units else 20)
+    history = opponent_history(observation, info.player_id or 0, field_names)
+    if prior is None and opponent_store is not None:
+        # the opponent's name is only known once the game is over, so the start of a game uses every opponent's rounds
+        prior = opponent_store.blotto_prior(field_names, solver.units)
+    prior = mix((prior, 0.5), (solver.uniform_opponent(), 0.5)) if prior else solver.uniform_opponent()
+    opponent = mix((history_distribution(history), 0.8), (prior, 0.2)) if history else prior
+    result = solver.solve(opponent, time_budget_s=time_budget_s)
+    return [format_allocation(allocation, field_names) for allocation in result["allocations"]]
+
+
+CANDIDATE_GENERATORS["ColonelBlotto"] = blotto_candidates
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fields", type=int, default=3)
+    parser.add_argument("--units", type=int, default=20)
+    parser.add_argument("--budget", type=float, default=BLOTTO_TIME_BUDGET_S)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    solver = BlottoSolver(args.fields, args.units, seed=args.seed)
+    field_names = [chr(65 + i) for i in range(args.fields)]
+    for budget in [args.budget / 10, args.budget]:
+        result = solver.solve(time_budget_s=budget)
+        print({**result, "allocations": [format_allocation(a, field_names) for a in result["allocations"]], "budget_s": budget})
@@ -0,0 +1,124 @@
+import re
+import ast
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+# a snippet importing any of these (or a submodule) can give a different result on every run
+NONDETERMINISTIC_MODULES = {
+    "random", "secrets", "uuid", "time", "datetime", "calendar", "os", "sys", "io", "pathlib", "shutil", "glob",
+    "tempfile", "subprocess", "socket", "ssl", "http", "urllib", "requests", "threading", "multiprocessing",
+    "asyncio", "concurrent", "signal", "sqlite3", "pickle", "fileinput", "getpass", "platform", "psutil",
+}
+# builtins reading input, files or object addresses (hash of a default object is its address)
+NONDETERMINISTIC_CALLS = {"open", "input", "id", "hash", "eval", "exec", "compile", "__import__", "globals", "locals", "breakpoint"}
+# attribute names that mean randomness or clocks whatever the module, e.g. np.random.choice, pd.Timestamp.now
+NONDETERMINISTIC_ATTRIBUTES = {"random", "now", "today", "utcnow", "urandom", "perf_counter", "time_ns"}
+# default reprs, e.g. print(object()), show an address the source cannot pin down
+ADDRESS_PAT = re.compile(r" at 0x[0-9a-f]+>")
+
+
+def source_key(source: str) -> Optional[str]:
+    """ sha256 of the AST dump, so formatting, comments and blank lines do not change the key; None on a syntax error """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+    return hashlib.sha256(ast.dump(tree, annotate_fields=False).encode("utf-8")).hexdigest()
+
+
+def nondeterminism(source: str) -> Optional[str]:
+    """ The first construct that makes the snippet's output depend on more than its source, or None """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return "syntax error"
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.name.split(".")[0] in NONDETERMINISTIC_MODULES:
+                    return f"import {alias.name}"
+        elif isinstance(node, ast.ImportFrom):
+            if (node.module or "").split(".")[0] in NONDETERMINISTIC_MODULES:
+                return f"from {node.module} import"
+            if any(alias.name in NONDETERMINISTIC_ATTRIBUTES for alias in node.names):
+                return f"from {node.module} import {[alias.name for alias in node.names]}"
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in NONDETERMINISTIC_CALLS:
+            return f"{node.func.id}()"
+        elif isinstance(node, ast.Attribute) and node.attr in NONDETERMINISTIC_ATTRIBUTES:
+            return f".{node.attr}"
+    return None
+
+
+class CodeCache:
+    """
+    Results of generated python snippets, (returncode, stdout, stderr) keyed by source_key.
+    Only deterministic snippets are stored (see nondeterminism), timeouts and output showing object addresses never are;
+    the least recently used entry is evicted beyond max_entries.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[tuple, float]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "uncacheable": 0, "evictions": 0, "saved_s": 0.0}
+        self._lock = threading.Lock()
+
+    def key(self, source: str) -> Optional[str]:
+        """ Cache key of the snippet, None when it must run every time """
+        reason = nondeterminism(source)
+        if reason is not None:
+            with self._lock:
+                self.stats["uncacheable"] += 1
+            return None
+        return source_key(source)
+
+    def get(self, key: Optional[str]) -> Optional[tuple]:
+        if key is None:
+            return None
+        with self._lock:
+            stored = self.entries.get(key)
+            if stored is None:
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            self.stats["saved_s"] += stored[1]
+            return stored[0]
+
+    def put(self, key: Optional[str], result: tuple, seconds: float):
+        if key is None or result[0] < 0: # -1: timeout or the runner itself failed, < 0: killed by a signal
+            return
+        if ADDRESS_PAT.search(result[1]):
+            with self._lock:
+                self.stats["uncacheable"] += 1
+            return
+        with self._lock:
+            self.entries[key] = (result, seconds)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def report(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {**{k: round(v, 3) for k, v in self.stats.items()}, "entries": len(self.entries),
+                    "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0}
+
+
+if __name__ == "__main__":
+    from utils import run_python_blocks, CODE_CACHE
+
+    snippets = [
+        "import itertools\nbest = max(itertools.product(range(21), repeat=2), key=sum)\nprint(best)",
+        "import itertools\n\n# same enumeration, reformatted\nbest = max( itertools.product(range(21), repeat=2), key=sum )\nprint(best)",
+        "import random\nprint(random.randint(0, 20))",
+    ]
+    for snippet in snippets * 2:
+        start_time = time.time()
+        code, out, err = run_python_blocks([snippet])
+        print(f"{time.time() - start_time:6.3f}s rc={code} out={out.strip()!r} reason={nondeterminism(snippet)}")
+    print(CODE_CACHE.report())
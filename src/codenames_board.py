@@ -0,0 +1,72 @@
+from typing import Dict, List, Tuple
+
+
+# block headers written by CodenamesEnv._render_player_view and _render_board_delta, see envs/Codenames/env.py
+BOARD_HEADER = "Codenames Words:"
+DELTA_HEADER = "Codenames Words revealed:"
+
+
+def _board_blocks(lines: List[str]) -> List[Tuple[str, int, int, Dict[str, str]]]:
+    """ (header, first line, end line, word -> label) for every full board or revealed-words block """
+    blocks = []
+    i = 0
+    while i < len(lines):
+        header = lines[i].replace("[GAME]", "").strip()
+        if header not in (BOARD_HEADER, DELTA_HEADER):
+            i += 1
+            continue
+        words = {}
+        end = i + 1
+        while end < len(lines):
+            parts = lines[end].split()
+            if not parts or not parts[0].isalpha() or len(parts) > 3:
+                break
+            words[parts[0]] = " ".join(parts[1:])
+            end += 1
+        blocks.append((header, i, end, words))
+        i = end
+    return blocks
+
+
+def _apply_delta(board: Dict[str, str], revealed: Dict[str, str]):
+    for word, label in revealed.items():
+        # spymaster boards already show every label and mark guesses with 'revealed'
+        board[word] = f"{board[word]} revealed" if board.get(word) else label
+
+
+def current_board(observation: str) -> Dict[str, str]:
+    """ Latest full board with the revealed-words updates sent after it applied, word -> label ('' while hidden) """
+    board = {}
+    for header, _, _, words in _board_blocks(observation.split("\n")):
+        if header == BOARD_HEADER:
+            board = dict(words)
+        else:
+            _apply_delta(board, words)
+    return board
+
+
+def render_board(board: Dict[str, str]) -> str:
+    return BOARD_HEADER + "\n" + "".join(f"{word:<8} {label}\n" for word, label in board.items())
+
+
+def compact_observation(observation: str) -> str:
+    """
+    Keep a single, up to date board: earlier full boards and revealed-words updates are dropped and the last
+    board block is replaced by the reconstructed board. Everything else in the observation is unchanged.
+    """
+    lines = observation.split("\n")
+    blocks = _board_blocks(lines)
+    if len(blocks) <= 1 and not any(header == DELTA_HEADER for header, _, _, _ in blocks):
+        return observation
+    board = current_board(observation)
+    _, last_start, last_end, _ = blocks[-1]
+    prefix = "[GAME] " if lines[last_start].startswith("[GAME]") else ""
+    kept = []
+    position = 0
+    for _, start, end, _ in blocks[:-1]:
+        kept += lines[position:start]
+        position = end
+    kept += lines[position:last_start]
+    kept += (prefix + render_board(board)).rstrip("\n").split("\n")
+    kept += lines[last_end:]
+    return "\n".join(kept)
@@ -0,0 +1,174 @@
+"""
+Benchmarks for the local env copies in envs/: plays scripted games and reports observation size per turn.
+
+    uv run env_benchmark.py codenames --games 5
+    uv run env_benchmark.py mafia --games 20
+    uv run env_benchmark.py blotto --games 200
+"""
+import time
+import random
+import argparse
+import statistics
+from typing import List
+
+from env_loader import load_env_module
+from codenames_board import compact_observation
+
+
+def approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _codenames_action(env, player_id: int) -> str:
+    """ Omniscient scripted players: a clue that is not on the board, then guesses of the team's own words """
+    if player_id in [0, 2]:
+        return "[zyzzyva 2]"
+    team = "R" if player_id < 2 else "B"
+    unrevealed = sorted(env.team_words[team] - env.state.game_state["guessed_words"])
+    return f"[{unrevealed[0]}]" if unrevealed else "[pass]"
+
+
+def play_codenames(incremental_board: bool, seed: int, max_steps: int = 200) -> List[dict]:
+    import textarena as ta
+
+    module = load_env_module("Codenames")
+    base_env = module.CodenamesEnv(incremental_board=incremental_board)
+    env = ta.wrappers.LLMObservationWrapper(base_env)
+    random.seed(seed)
+    env.reset(num_players=4, seed=seed)
+    turns = []
+    done = False
+    while not done and len(turns) < max_steps:
+        player_id, observation = env.get_observation()
+        compacted = compact_observation(observation)
+        turns.append({
+            "player_id": player_id,
+            "chars": len(observation),
+            "tokens": approx_tokens(observation),
+            "compacted_tokens": approx_tokens(compacted),
+            "boards": observation.count("Codenames Words"),
+        })
+        start_time = time.perf_counter()
+        done, _ = env.step(action=_codenames_action(base_env, player_id))
+        turns[-1]["step_s"] = time.perf_counter() - start_time
+    env.close()
+    return turns
+
+
+def summarize_turns(name: str, games: List[List[dict]]) -> dict:
+    turns = [turn for game in games for turn in game]
+    return {
+        "mode": name,
+        "games": len(games),
+        "turns": len(turns),
+        "mean_chars": round(statistics.mean(turn["chars"] for turn in turns)),
+        "mean_prefill_tokens": round(statistics.mean(turn["tokens"] for turn in turns)),
+        "mean_compacted_tokens": round(statistics.mean(turn["compacted_tokens"] for turn in turns)),
+        "last_turn_tokens": round(statistics.mean(game[-1]["tokens"] for game in games if game)),
+        "mean_board_blocks": round(statistics.mean(turn["boards"] for turn in turns), 1),
+        "steps_per_s": round(len(turns) / sum(turn["step_s"] for turn in turns)),
+    }
+
+
+def benchmark_codenames(num_games: int) -> List[dict]:
+    rows = []
+    for name, incremental_board in [("full board", False), ("incremental board", True)]:
+        games = [play_codenames(incremental_board, seed) for seed in range(num_games)]
+        rows.append(summarize_turns(name, games))
+    return rows
+
+
+def _mafia_action(env, player_id: int, rng: random.Random) -> str:
+    """ Random valid scripted players: chat during discussion, otherwise a random alive target """
+    if env.phase.value == "Day-Discussion":
+        return f"I am Player {player_id} and I think we should look carefully at everyone."
+    return f"[{rng.choice([p for p in env.state.game_state['alive_players'] if p != player_id] or [player_id])}]"
+
+
+def play_mafia(num_players: int, seed: int, max_steps: int = 2000) -> dict:
+    module = load_env_module("SecretMafia")
+    env = module.SecretMafiaEnv()
+    rng = random.Random(seed)
+    random.seed(seed)
+    env.reset(num_players=num_players, seed=seed)
+    steps, step_s = 0, 0.0
+    done = False
+    while not done and steps < max_steps:
+        player_id = env.state.current_player_id
+        action = _mafia_action(env, player_id, rng)
+        start_time = time.perf_counter()
+        done, _ = env.step(action=action)
+        step_s += time.perf_counter() - start_time
+        steps += 1
+    entries = sum(len(observations) for observations in env.state.observations.values())
+    return {"steps": steps, "step_s": step_s, "observation_entries": entries}
+
+
+def benchmark_mafia(num_games: int, player_counts=range(6, 16)) -> List[dict]:
+    rows = []
+    for num_players in player_counts:
+        games = [play_mafia(num_players, seed) for seed in range(num_games)]
+        steps = sum(game["steps"] for game in games)
+        seconds = sum(game["step_s"] for game in games)
+        rows.append({
+            "players": num_players,
+            "games": num_games,
+            "steps_per_game": round(steps / num_games, 1),
+            "us_per_step": round(seconds / steps * 1e6, 1),
+            "steps_per_s": round(steps / seconds),
+            "observation_entries_per_game": round(statistics.mean(game["observation_entries"] for game in games)),
+        })
+    return rows
+
+
+def _blotto_action(num_fields: int, num_units: int, rng: random.Random) -> str:
+    """ Random allocation in one of the formats the env accepts, sometimes over budget to exercise invalid moves """
+    cuts = sorted(rng.randint(0, num_units) for _ in range(num_fields - 1))
+    units = [b - a for a, b in zip([0] + cuts, cuts + [num_units])]
+    if rng.random() < 0.05:
+        units[0] += 1
+    separator = rng.choice([" ", ", "])
+    return "[" + separator.join(f"{chr(65 + i)}{':' if rng.random() < 0.5 else ''}{u}" for i, u in enumerate(units)) + "]"
+
+
+def play_blotto(seed: int, num_fields: int = 3, num_units: int = 20, max_steps: int = 500) -> dict:
+    module = load_env_module("ColonelBlotto")
+    env = module.ColonelBlottoEnv(num_fields=num_fields, num_total_units=num_units)
+    rng = random.Random(seed)
+    env.reset(num_players=2, seed=seed)
+    steps, step_s = 0, 0.0
+    done = False
+    while not done and steps < max_steps:
+        action = _blotto_action(num_fields, num_units, rng)
+        start_time = time.perf_counter()
+        done, _ = env.step(action=action)
+        step_s += time.perf_counter() - start_time
+        steps += 1
+    return {"steps": steps, "step_s": step_s}
+
+
+def benchmark_blotto(num_games: int, field_counts=(3, 5, 10)) -> List[dict]:
+    rows = []
+    for num_fields in field_counts:
+        games = [play_blotto(seed, num_fields=num_fields) for seed in range(num_games)]
+        steps = sum(game["steps"] for game in games)
+        seconds = sum(game["step_s"] for game in games)
+        rows.append({"fields": num_fields, "games": num_games, "steps_per_game": round(steps / num_games, 1),
+                     "us_per_step": round(seconds / steps * 1e6, 2), "steps_per_s": round(steps / seconds)})
+    return rows
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("benchmark", choices=["codenames", "mafia", "blotto"])
+    parser.add_argument("--games", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.benchmark == "codenames":
+        print(pd.DataFrame(benchmark_codenames(args.games)).to_markdown(index=False))
+    elif args.benchmark == "mafia":
+        print(pd.DataFrame(benchmark_mafia(args.games)).to_markdown(index=False))
+    elif args.benchmark == "blotto":
+        print(pd.DataFrame(benchmark_blotto(args.games)).to_markdown(index=False))
@@ -0,0 +1,17 @@
+"""
+Loads the local env copies in envs/. The env folders are not packages, so each env.py is imported by path.
+"""
+import os
+import importlib.util
+
+
+ENVS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "envs")
+
+
+def load_env_module(name: str):
+    """ Import envs/<name>/env.py by path """
+    path = os.path.join(ENVS_DIR, name, "env.py")
+    spec = importlib.util.spec_from_file_location(f"envs_{name.lower()}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
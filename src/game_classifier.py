@@ -0,0 +1,77 @@
+import re
+from typing import Literal, Optional
+from pydantic import BaseModel
+
+
+# headers written by the env prompt functions in envs/*/env.py
+_BLOTTO_HEADER = re.compile(r"You are (Commander Alpha|Commander Beta) in a game of ColonelBlotto")
+_IPD_HEADER = re.compile(r"You are Player (\d+) in a 3-player Iterated Prisoner's Dilemma")
+_CODENAMES_HEADER = re.compile(r"You are Player (\d+), the (Spymaster|Operative) for (Red|Blue) team")
+_MAFIA_HEADER = re.compile(r"Welcome to Secret Mafia! You are Player (\d+)\.\s*Your role: (\w+)")
+
+# latest phase announcement wins, see ThreePlayerIPDEnv and SecretMafiaEnv._send_phase_prompts
+_IPD_PHASE_MARKERS = {
+    "Starting Round": "free-chat",
+    "Chat finished for round": "decision",
+}
+_MAFIA_PHASE_MARKERS = {
+    "Night has fallen. Mafia": "Night-Mafia",
+    "Night phase - choose one player to protect": "Night-Doctor",
+    "Night phase - choose one player to investigate": "Night-Detective",
+    "Day breaks.": "Day-Discussion",
+    "Voting phase": "Day-Voting",
+}
+
+_PLAYER_TYPES = {
+    ("ColonelBlotto", "Commander"): "colonel_blotto",
+    ("Codenames", "Spymaster"): "codenames_spy",
+    ("Codenames", "Operative"): "codenames_operative",
+    ("ThreePlayerIPD", "Player"): "three_player_IPD",
+}
+
+
+class GameInfo(BaseModel):
+    game: Optional[Literal["ColonelBlotto", "ThreePlayerIPD", "Codenames", "SecretMafia"]] = None
+    role: Optional[str] = None
+    player_id: Optional[int] = None
+    team: Optional[str] = None
+    phase: Optional[str] = None
+
+    @property
+    def is_free_chat(self) -> bool:
+        return self.phase in ("free-chat", "Day-Discussion")
+
+    @property
+    def action_type(self) -> str:
+        """ Same labels as models.Round.current_action_type """
+        return "free-chat" if self.is_free_chat else "structured command"
+
+    @property
+    def player_type(self) -> Optional[str]:
+        return _PLAYER_TYPES.get((self.game, self.role))
+
+    def describe(self) -> str:
+        return f"The game is {self.game}, I am player {self.player_id} ({self.role}) and the latest instruction is the {self.phase} phase"
+
+
+def _latest_phase(observation: str, markers: dict) -> Optional[str]:
+    position, phase = max((observation.rfind(marker), phase) for marker, phase in markers.items())
+    return phase if position >= 0 else None
+
+
+def classify(observation: str) -> GameInfo:
+    """ Identify game, role, seat and phase from the env prompt headers, without any LLM call """
+    if m := _BLOTTO_HEADER.search(observation):
+        return GameInfo(game="ColonelBlotto", role="Commander", player_id=0 if m.group(1) == "Commander Alpha" else 1,
+                        team=m.group(1), phase="allocation")
+    if m := _IPD_HEADER.search(observation):
+        return GameInfo(game="ThreePlayerIPD", role="Player", player_id=int(m.group(1)),
+                        phase=_latest_phase(observation, _IPD_PHASE_MARKERS) or "free-chat")
+    if m := _CODENAMES_HEADER.search(observation):
+        return GameInfo(game="Codenames", role=m.group(2), player_id=int(m.group(1)), team=m.group(3),
+                        phase="clue" if m.group(2) == "Spymaster" else "guess")
+    if m := _MAFIA_HEADER.search(observation):
+        return GameInfo(game="SecretMafia", role=m.group(2), player_id=int(m.group(1)),
+                        team="Mafia" if m.group(2) == "Mafia" else "Village",
+                        phase=_latest_phase(observation, _MAFIA_PHASE_MARKERS))
+    return GameInfo()
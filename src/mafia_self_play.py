@@ -0,0 +1,168 @@
+"""
+Local SecretMafia self-play with parallel inference.
+
+Within a game the env asks one seat at a time and every decision can depend on the ones before it, so the
+decisions that are really independent are those of different games: run() plays --concurrent-games games at
+once, their agents sharing one RequestGate so the backend sees at most --parallel generations (ollama batches
+them with OLLAMA_NUM_PARALLEL). Each game keeps the env's observation order exactly. The env draws from the
+global random module, so a seed only reproduces its game when games run one at a time.
+
+Experimental, --batch-votes: the driver snapshots the queued seats' observations when a voting phase (day vote,
+mafia night vote) starts, asks all of them at once (one batch call, or concurrent calls) and feeds the actions
+to the env in its own order. It changes the game: the env shows every vote to the other voters of the phase
+(day votes to all, mafia votes to the mafia), and batched voters decide without them.
+
+    uv run mafia_self_play.py --agent V9 --players 8 --games 8 --concurrent-games 4 --parallel 4
+    uv run mafia_self_play.py --agent LLM --model Qwen/Qwen3-4B --players 8 --games 2 --batch-votes
+"""
+import time
+import argparse
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from env_loader import load_env_module
+
+
+# phases whose queued seats can be asked at once, Phase values of envs/SecretMafia/env.py; not simultaneous in the
+# env, each vote is broadcast to the other voters, so batching them is opt-in
+BATCHABLE_PHASES = ("Day-Voting", "Night-Mafia")
+GAME_ID = -1
+
+
+class MafiaSelfPlay:
+
+    def __init__(self, agent_factory: Callable, num_players: int = 8, simultaneous_phases=(),
+                 batch_backend: Optional[Callable[[List[str]], List[str]]] = None, max_workers: int = 8,
+                 concurrent_games: int = 1):
+        """
+        Args:
+            agent_factory: builds the agent of one seat, called once per seat and game
+            simultaneous_phases: experimental, phases to batch, e.g. BATCHABLE_PHASES; the default () keeps the env's
+                one seat at a time
+            batch_backend: fn(observations) -> actions for several seats at once, e.g. LLMAgent.batch.
+                Without it the seats of a batch are called concurrently from a thread pool.
+            concurrent_games: games played at once by run()
+        """
+        self.agent_factory = agent_factory
+        self.num_players = num_players
+        self.simultaneous_phases = tuple(simultaneous_phases)
+        self.batch_backend = batch_backend
+        self.concurrent_games = concurrent_games
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.module = load_env_module("SecretMafia")
+        self.stats = {"decisions": 0, "batches": 0, "retries": 0, "discarded": 0, "model_s": 0.0}
+        self.batch_sizes: List[int] = []
+        self._lock = threading.Lock()
+
+    def _decision_seats(self, env) -> List[int]:
+        """ Seats that decide now: the current one, plus the rest of the queue in a simultaneous phase """
+        seats = [env.state.current_player_id]
+        if env.phase.value in self.simultaneous_phases:
+            seats += reversed(env.next_player_ids) # the env pops from the end
+        return seats
+
+    @staticmethod
+    def _observe(env, transcripts: Dict[int, List[str]], player_id: int) -> str:
+        """ Move the seat's pending env observations into its transcript, rendered like LLMObservationWrapper """
+        for from_id, message, _ in env.state.observations[player_id]:
+            sender = "GAME" if from_id == GAME_ID else f"Player {from_id}"
+            transcripts[player_id].append(f"[{sender}] {message}")
+        env.state.observations[player_id] = []
+        return "\n".join(transcripts[player_id])
+
+    def _act(self, agents: Dict[int, Callable], seats: List[int], observations: List[str]) -> List[str]:
+        start_time = time.time()
+        if len(seats) == 1:
+            actions = [agents[seats[0]](observations[0])]
+        elif self.batch_backend is not None:
+            actions = self.batch_backend(observations)
+        else:
+            actions = list(self.executor.map(lambda pair: agents[pair[0]](pair[1]), zip(seats, observations)))
+        with self._lock:
+            self.stats["model_s"] += time.time() - start_time
+            self.stats["decisions"] += len(seats)
+            self.stats["batches"] += 1
+            self.batch_sizes.append(len(seats))
+        return actions
+
+    def play_one(self, seed: Optional[int] = None) -> dict:
+        env = self.module.SecretMafiaEnv()
+        env.reset(num_players=self.num_players, seed=seed)
+        agents = {pid: self.agent_factory() for pid in range(self.num_players)}
+        transcripts = {pid: [] for pid in range(self.num_players)}
+        start_time = time.time()
+        done, steps = False, 0
+        while not done:
+            seats = self._decision_seats(env)
+            actions = self._act(agents, seats, [self._observe(env, transcripts, pid) for pid in seats])
+            for position, (pid, action) in enumerate(zip(seats, actions)):
+                if done or env.state.current_player_id != pid:
+                    # a fatal invalid move changed the queue, the remaining decisions are asked again
+                    with self._lock:
+                        self.stats["discarded"] += len(seats) - position
+                    break
+                while True:
+                    before = (env.phase, len(env.next_player_ids))
+                    done, _ = env.step(action=action)
+                    steps += 1
+                    if done or env.state.current_player_id != pid or (env.phase, len(env.next_player_ids)) != before:
+                        break
+                    # invalid move, the seat stays current and sees the error message
+                    with self._lock:
+                        self.stats["retries"] += 1
+                    action = self._act(agents, [pid], [self._observe(env, transcripts, pid)])[0]
+        rewards, game_info = env.close()
+        return {"seed": seed, "steps": steps, "seconds": time.time() - start_time, "rewards": rewards, "game_info": game_info}
+
+    def run(self, num_games: int) -> dict:
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=self.concurrent_games) as games_executor:
+            games = list(games_executor.map(self.play_one, range(num_games)))
+        return self.summary(games, time.time() - start_time)
+
+    def summary(self, games: List[dict], elapsed_s: float) -> dict:
+        seconds = sum(game["seconds"] for game in games)
+        return {
+            "games": len(games),
+            "players": self.num_players,
+            "concurrent_games": self.concurrent_games,
+            "elapsed_s": round(elapsed_s, 1),
+            "games_per_hour": round(len(games) / elapsed_s * 3600, 2) if elapsed_s else 0.0,
+            "simultaneous_phases": list(self.simultaneous_phases),
+            "steps_per_game": round(statistics.mean(game["steps"] for game in games), 1),
+            "seconds_per_game": round(seconds / len(games), 2),
+            "mean_batch_size": round(statistics.mean(self.batch_sizes), 2) if self.batch_sizes else 0.0,
+            **{k: round(v, 2) for k, v in self.stats.items()},
+        }
+
+
+if __name__ == "__main__":
+    from agent_registry import load_agent
+    from model_router import RequestGate
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agent", default="V9")
+    parser.add_argument("--model", default="qwen3:8b")
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--games", type=int, default=2)
+    parser.add_argument("--parallel", type=int, default=4, help="generations in flight, match OLLAMA_NUM_PARALLEL")
+    parser.add_argument("--concurrent-games", type=int, default=4, help="games in flight, their agents share the request gate")
+    parser.add_argument("--batch-votes", action="store_true", help="experimental: ask the queued voters of a phase at once, they no longer see each other's votes")
+    args = parser.parse_args()
+
+    simultaneous_phases = BATCHABLE_PHASES if args.batch_votes else ()
+    if args.agent == "LLM":
+        # one local model shared by every seat, LLMAgent keeps no per-game state; its pipeline is not shared across
+        # threads, so the games run one at a time
+        shared = load_agent("LLM", model_name=args.model)
+        self_play = MafiaSelfPlay(lambda: shared, args.players, simultaneous_phases, batch_backend=shared.batch)
+    else:
+        gate = RequestGate(args.parallel)
+        self_play = MafiaSelfPlay(lambda: load_agent(args.agent, model_name=args.model, request_gate=gate),
+                                  args.players, simultaneous_phases, max_workers=args.players,
+                                  concurrent_games=args.concurrent_games)
+    print(self_play.run(args.games))
+    if args.agent == "LLM":
+        print(f"observation budget: {shared.budgeter.stats}")
@@ -0,0 +1,251 @@
+"""
+Stand-in for the ollama server, so the agent pipeline can be benchmarked without a GPU.
+Implements the /api/tags, /api/generate and /api/chat endpoints used by ollama.list, ollama.generate and ollama.chat.
+
+Responses are replayed from a ResponseCache database recorded by real runs (StarsAgent(cache_path=...), generate
+and chat calls with cache=True), otherwise scripted: JSON formats get a minimal instance of the schema (pattern
+strings included), text prompts cycle through --script lines.
+Latency follows a simple profile: base + prefill per prompt token + decode per generated token,
+and at most --parallel requests are served at once, like OLLAMA_NUM_PARALLEL.
+
+    uv run mock_ollama.py --port 11435 --record-db cache/responses.sqlite --decode-ms 20
+    OLLAMA_HOST=http://127.0.0.1:11435 uv run benchmark.py --agents V9
+"""
+import re
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Optional
+
+from response_cache import ResponseCache
+
+
+class LatencyProfile:
+    def __init__(self, base_ms: float = 50, prefill_ms_per_token: float = 0.2, decode_ms_per_token: float = 20):
+        self.base_ms = base_ms
+        self.prefill_ms_per_token = prefill_ms_per_token
+        self.decode_ms_per_token = decode_ms_per_token
+
+    @staticmethod
+    def count_tokens(text: str) -> int:
+        return max(1, len(text) // 4)
+
+    def prefill_seconds(self, prompt: str) -> float:
+        return (self.base_ms + self.count_tokens(prompt) * self.prefill_ms_per_token) / 1000
+
+
+def pattern_instance(pattern: str) -> Optional[str]:
+    """
+    Shortest string matching a regex made of literals, escapes, character classes and quantifiers, the subset
+    action_grammar's answer schemas use (^\\[[A-Za-z]+ [1-9]\\]$); None for anything else
+    """
+    body, text, i = pattern.removeprefix("^").removesuffix("$"), [], 0
+    while i < len(body):
+        if body[i] == "\\":
+            atom = {"d": "0", "w": "a", "s": " "}.get(body[i + 1], body[i + 1])
+            i += 2
+        elif body[i] == "[":
+            atom = body[i + 1] # first member of the class, verified below
+            i = body.index("]", i + 2) + 1
+        elif body[i] in "().|":
+            return None
+        else:
+            atom = body[i]
+            i += 1
+        repeat = 1
+        if i < len(body) and body[i] == "{":
+            end = body.index("}", i)
+            repeat = int(body[i + 1:end].split(",")[0])
+            i = end + 1
+        elif i < len(body) and body[i] in "*+?":
+            repeat = int(body[i] == "+")
+            i += 1
+        text.append(atom * repeat)
+    text = "".join(text)
+    return text if re.fullmatch(pattern, text) else None
+
+
+def schema_instance(schema: dict):
+    """ Smallest value that satisfies the common JSON schema keywords our agents use """
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "pattern" in schema:
+        return pattern_instance(schema["pattern"]) or "mock"
+    match schema.get("type"):
+        case "object":
+            return {name: schema_instance(prop) for name, prop in schema.get("properties", {}).items()}
+        case "array":
+            return []
+        case "boolean":
+            return True
+        case "integer" | "number":
+            return schema.get("minimum", 0)
+        case _:
+            return "mock"
+
+
+class MockOllama:
+    def __init__(self, models: List[str], profile: LatencyProfile, script: List[str] = None, record_db: str = None, parallel: int = 1):
+        self.models = models
+        self.profile = profile
+        self.script = script or ["[Thinking] mock thinking\n[Answer] mock answer"]
+        self.recordings = ResponseCache(record_db) if record_db else None
+        self.slots = threading.BoundedSemaphore(parallel)
+        self._lock = threading.Lock()
+        self._script_index = 0
+        self.stats = {"requests": 0, "replayed": 0, "scripted": 0, "in_flight": 0, "max_in_flight": 0, "queue_wait_s": 0.0}
+
+    def respond(self, model: str, prompt: str, system: str, options: dict, output_format, messages: list = None) -> str:
+        """ messages: the turns of a chat request, keyed like StarsAgent.chat records them """
+        if self.recordings is not None:
+            key = (ResponseCache.make_chat_key(model, messages, options, output_format) if messages is not None
+                   else ResponseCache.make_key(model, prompt, system, options, output_format))
+            recorded = self.recordings.get(key)
+            if recorded is not None:
+                with self._lock:
+                    self.stats["replayed"] += 1
+                return recorded
+        with self._lock:
+            self.stats["scripted"] += 1
+            if isinstance(output_format, dict):
+                return json.dumps(schema_instance(output_format))
+            if output_format == "json":
+                return "{}"
+            text = self.script[self._script_index % len(self.script)]
+            self._script_index += 1
+            return text
+
+    def acquire(self):
+        start_time = time.time()
+        self.slots.acquire()
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["queue_wait_s"] += time.time() - start_time
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+    def release(self):
+        with self._lock:
+            self.stats["in_flight"] -= 1
+        self.slots.release()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def make_handler(server: MockOllama):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, payload: dict, status: int = 200):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._send_json({"models": [{"name": m, "model": m, "modified_at": _now(), "size": 0, "digest": ""} for m in server.models]})
+            elif self.path == "/api/version":
+                self._send_json({"version": "mock"})
+            elif self.path == "/api/stats":
+                self._send_json(server.stats)
+            else:
+                self._send_json({"error": f"unknown path {self.path}"}, 404)
+
+        def do_POST(self):
+            request = self._read_json()
+            if self.path == "/api/generate":
+                prompt, system = request.get("prompt") or "", request.get("system")
+                self._answer(request, prompt, system, lambda text, done: {"response": text})
+            elif self.path == "/api/chat":
+                messages = [{"role": message.get("role"), "content": message.get("content", "")} for message in request.get("messages") or []]
+                prompt = "\n".join(message["content"] for message in messages) # for the latency profile
+                self._answer(request, prompt, None, lambda text, done: {"message": {"role": "assistant", "content": text}}, messages)
+            else:
+                self._send_json({"error": f"unknown path {self.path}"}, 404)
+
+        def _answer(self, request: dict, prompt: str, system: str, wrap, messages: list = None):
+            model = request.get("model")
+            if model not in server.models:
+                self._send_json({"error": f"model '{model}' not found"}, 404)
+                return
+            server.acquire()
+            try:
+                text = "" if not prompt else server.respond(model, prompt, system, request.get("options"), request.get("format"), messages)
+                time.sleep(server.profile.prefill_seconds(prompt))
+                pieces = text.split(" ")
+                usage = {"prompt_eval_count": LatencyProfile.count_tokens(prompt), "eval_count": len(pieces)}
+                if request.get("stream", True):
+                    self._stream(model, pieces, usage, wrap)
+                else:
+                    time.sleep(len(pieces) * server.profile.decode_ms_per_token / 1000)
+                    self._send_json({"model": model, "created_at": _now(), **wrap(text, True), "done": True, "done_reason": "stop", **usage})
+            finally:
+                server.release()
+
+        def _stream(self, model: str, pieces: List[str], usage: dict, wrap):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for i, piece in enumerate(pieces):
+                    time.sleep(server.profile.decode_ms_per_token / 1000)
+                    self._write_chunk({"model": model, "created_at": _now(), **wrap(piece if i == 0 else " " + piece, False), "done": False})
+                self._write_chunk({"model": model, "created_at": _now(), **wrap("", True), "done": True, "done_reason": "stop", **usage})
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client closed the stream early, e.g. ActionStopper found an action
+
+        def _write_chunk(self, payload: dict):
+            data = (json.dumps(payload) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def serve(host: str = "127.0.0.1", port: int = 11435, **kwargs) -> ThreadingHTTPServer:
+    """ Start the mock in a daemon thread and return the http server, call shutdown() to stop it """
+    httpd = ThreadingHTTPServer((host, port), make_handler(MockOllama(**kwargs)))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--models", nargs="+", default=["qwen3:8b", "qwen3:1.7b"])
+    parser.add_argument("--record-db", default=None, help="ResponseCache database to replay responses from")
+    parser.add_argument("--script", default=None, help="text file, one scripted response per line ('\\n' escapes allowed)")
+    parser.add_argument("--parallel", type=int, default=1)
+    parser.add_argument("--base-ms", type=float, default=50)
+    parser.add_argument("--prefill-ms", type=float, default=0.2, help="ms per prompt token")
+    parser.add_argument("--decode-ms", type=float, default=20, help="ms per generated token")
+    args = parser.parse_args()
+
+    script = None
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = [line.rstrip("\n").replace("\\n", "\n") for line in f if line.strip()]
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(MockOllama(
+        models=args.models, profile=LatencyProfile(args.base_ms, args.prefill_ms, args.decode_ms),
+        script=script, record_db=args.record_db, parallel=args.parallel)))
+    print(f"mock ollama listening on http://{args.host}:{args.port}")
+    httpd.serve_forever()
@@ -0,0 +1,90 @@
+import statistics
+import time
+import threading
+from typing import Dict, List
+
+from ollama import generate
+
+
+STRATEGY = "strategy"
+EXTRACTION = "extraction"
+CLASSIFICATION = "classification"
+
+
+class ModelRouter:
+    """
+    Maps each call site tier to an ollama model, e.g. {"strategy": "qwen3:8b", "extraction": "qwen3:1.7b"}.
+    Tiers without a model fall back to the strategy model. With more than one distinct model, all of them are
+    loaded with keep_alive=-1 so they stay resident together (ollama needs OLLAMA_MAX_LOADED_MODELS >= number of
+    distinct models); a single model has nothing to swap with and keeps the server's default keep_alive.
+    """
+
+    def __init__(self, tier_models: Dict[str, str], keep_alive=-1):
+        if STRATEGY not in tier_models:
+            raise Exception(f"tier_models needs a '{STRATEGY}' model, got {tier_models}")
+        self.tier_models = dict(tier_models)
+        self.tier_models.setdefault(EXTRACTION, self.tier_models[STRATEGY])
+        self.tier_models.setdefault(CLASSIFICATION, self.tier_models[EXTRACTION])
+        self.keep_alive = keep_alive if len(self.models) > 1 else None  # None is left out of the request
+        self._latencies: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def models(self):
+        return sorted(set(self.tier_models.values()))
+
+    def model_for(self, tier: str = None) -> str:
+        return self.tier_models.get(tier or STRATEGY, self.tier_models[STRATEGY])
+
+    def warm_up(self):
+        for model in self.models:
+            generate(model=model, prompt="", keep_alive=self.keep_alive)  # empty prompt only loads the model
+
+    def record(self, tier: str, seconds: float):
+        with self._lock:
+            self._latencies.setdefault(tier or STRATEGY, []).append(seconds)
+
+    def report(self) -> Dict[str, dict]:
+        with self._lock:
+            latencies = {tier: list(values) for tier, values in self._latencies.items()}
+        report = {}
+        for tier, values in latencies.items():
+            values.sort()
+            report[tier] = {
+                "model": self.model_for(tier),
+                "calls": len(values),
+                "total_s": round(sum(values), 3),
+                "mean_s": round(statistics.mean(values), 3),
+                "p95_s": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+            }
+        return report
+
+
+class RequestGate:
+    """
+    Bounds how many generations are in flight against one ollama backend, shared by every agent of a session.
+    Set max_in_flight to OLLAMA_NUM_PARALLEL, further requests queue here instead of inside ollama.
+    """
+
+    def __init__(self, max_in_flight: int = 1):
+        self.max_in_flight = max_in_flight
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.wait_s = 0.0
+
+    def __enter__(self):
+        start_time = time.time()
+        self._slots.acquire()
+        with self._lock:
+            self.requests += 1
+            self.wait_s += time.time() - start_time
+        return self
+
+    def __exit__(self, *exc_info):
+        self._slots.release()
+
+    def report(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "mean_wait_s": round(self.wait_s / self.requests, 3) if self.requests else 0.0,
+                    "max_in_flight": self.max_in_flight}
@@ -9,6 +9,10 @@ class Question(BaseModel):
     question: str = ""
     format_name: str = None
     answer_key_in_format: str = None
+    stop_on_action: bool = False
+    output_format: dict = None
+    cacheable: bool = False
+    stable: str = None  # speculation.ROLE_SCOPE / PHASE_SCOPE when the answer can be reused on later turns
 
 class Round(BaseModel):
     current_action_type: Literal["free-chat", "structured command"]
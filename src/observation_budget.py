@@ -0,0 +1,107 @@
+"""
+Fits a long observation into a token budget, for models whose context window a full game transcript can exceed
+(SecretMafia with three discussion rounds a day). The role prompt before the first phase and the most recent
+phases stay verbatim; older day discussions first lose their player messages, replaced by an omission note,
+then older phases are dropped whole. Observations without phase markers are returned unchanged.
+"""
+import re
+import logging
+import threading
+from typing import Callable, List, Tuple
+
+
+# messages that open a phase, sent by SecretMafiaEnv._send_phase_prompts in envs/SecretMafia/env.py
+PHASE_MARKERS = ("Day breaks.", "Night has fallen.", "Night phase -", "Voting phase -")
+DISCUSSION_MARKER = "Day breaks."
+MESSAGE_PAT = re.compile(r"^\[(GAME|Player \d+)\] ?")
+
+logger = logging.getLogger(__name__)
+
+
+def split_messages(observation: str) -> List[str]:
+    """ One entry per '[GAME]' / '[Player x]' message, continuation lines attached to their message """
+    messages = []
+    for line in observation.split("\n"):
+        if messages and not MESSAGE_PAT.match(line):
+            messages[-1] += "\n" + line
+        else:
+            messages.append(line)
+    return messages
+
+
+def split_phases(observation: str) -> Tuple[List[str], List[List[str]]]:
+    """ (messages before the first phase, messages of each phase, in order) """
+    head, phases = [], []
+    for message in split_messages(observation):
+        if MESSAGE_PAT.sub("", message, count=1).startswith(PHASE_MARKERS):
+            phases.append([])
+        (phases[-1] if phases else head).append(message)
+    return head, phases
+
+
+def _without_discussion(phase: List[str]) -> List[str]:
+    """ A discussion phase's game messages, its player messages replaced by one note; other phases (votes) unchanged """
+    if DISCUSSION_MARKER not in phase[0]:
+        return phase
+    speakers = sorted({m.group(1) for m in map(MESSAGE_PAT.match, phase) if m and m.group(1) != "GAME"})
+    kept = [message for message in phase if not message.startswith("[Player ")]
+    if not speakers:
+        return phase
+    note = f"[GAME] ({len(phase) - len(kept)} messages from {', '.join(speakers)} omitted to fit the context)"
+    return kept[:1] + [note] + kept[1:]
+
+
+class ObservationBudgeter:
+
+    def __init__(self, count_tokens: Callable[[str], int], keep_recent_phases: int = 2):
+        """
+        Args:
+            count_tokens: token length of a text, e.g. the model's tokenizer
+            keep_recent_phases: phases at the end of the observation that are never shortened
+        """
+        self.count_tokens = count_tokens
+        self.keep_recent_phases = keep_recent_phases
+        self.stats = {"turns": 0, "truncated": 0, "over_budget": 0, "tokens_saved": 0}
+        self._lock = threading.Lock()
+
+    def fit(self, observation: str, max_tokens: int) -> str:
+        """ The observation shortened to max_tokens where old phases allow it, unchanged when it already fits """
+        with self._lock:
+            self.stats["turns"] += 1
+        before = self.count_tokens(observation)
+        head, phases = split_phases(observation)
+        num_phases = len(phases)
+        old = num_phases - self.keep_recent_phases
+        if before <= max_tokens or old <= 0:
+            if before > max_tokens:
+                with self._lock:
+                    self.stats["over_budget"] += 1
+            return observation
+
+        # per-message counts, the sum is close enough to the joined text's count to decide what to cut
+        cost = lambda messages: sum(self.count_tokens(message) + 1 for message in messages)
+        costs = [cost(phase) for phase in phases]
+        total = cost(head) + sum(costs)
+        for i in range(old):
+            if total <= max_tokens:
+                break
+            phases[i] = _without_discussion(phases[i])
+            total += cost(phases[i]) - costs[i]
+            costs[i] = cost(phases[i])
+        dropped, note = 0, []
+        while total + cost(note) > max_tokens and dropped < old:
+            total -= costs[dropped]
+            dropped += 1
+            note = [f"[GAME] ({dropped} earlier phases omitted to fit the context)"]
+        if dropped:
+            phases = [note] + phases[dropped:]
+
+        shortened = "\n".join(head + [message for phase in phases for message in phase])
+        after = self.count_tokens(shortened)
+        with self._lock:
+            self.stats["truncated"] += 1
+            self.stats["over_budget"] += after > max_tokens
+            self.stats["tokens_saved"] += before - after
+        logger.info(f"observation {before} -> {after} tokens ({before - after} saved, budget {max_tokens}, "
+                    f"{dropped} of {num_phases} phases dropped)")
+        return shortened
@@ -34,3 +34,4 @@ while not done:
     done, step_info = env.step(action=action)
 
 rewards, game_info = env.close() 
+print(f"[rewards] {rewards}  [game_info] {game_info}  [observation budget] {agent.budgeter.stats}")
@@ -17,7 +17,7 @@ image = (
         "torch",
         "accelerate",
     )
-    .add_local_python_source("agent")
+    .add_local_python_source("agent", "action_patterns", "game_classifier", "observation_budget")
 )
 
 @app.function(
@@ -64,11 +64,13 @@ def play_online():
     print(f"Game completed in {step_count} steps")
     print(f"Rewards: {rewards}")
     print(f"Game info: {game_info}")
+    print(f"Observation budget: {agent.budgeter.stats}")
     
     return {
         "rewards": rewards,
         "game_info": game_info,
-        "steps": step_count
+        "steps": step_count,
+        "observation_budget": agent.budgeter.stats
     }
 
 @app.local_entrypoint()
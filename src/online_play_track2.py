@@ -9,9 +9,9 @@ import time
 from agent import LLMAgent
 from dotenv import load_dotenv
 
-# from stars_agent_track2_baseline import StarsAgentTrack2BaseLine
-# from stars_agent_track2_v4 import StarsAgentTrack2V4
-from stars_agent_track2_v7 import StarsAgentTrack2V7
+from agent_registry import load_agent
+from game_classifier import classify
+from benchmark import capture_observation
 
 load_dotenv()
 
@@ -24,16 +24,19 @@ MODEL_NAME = "STARS Agent Track2 V7" # Replace with your model name
 MODEL_DESCRIPTION = "STARS Agent Track2 V7"
 team_hash = os.getenv("TEAM_HASH")  # Replace with your team hash
 
+AGENT_NAME = "V7"  # key in agent_registry.AGENT_REGISTRY, only this agent's dependencies get imported
+
 # Initialize your agent
-agent = StarsAgentTrack2V7()
+agent = load_agent(AGENT_NAME)
+
+
+# labels of the earlier substring checks, kept so valid_game_count reads as before
+GAME_LABELS = {"ThreePlayerIPD": "Iterated Prisoner"}
 
 
 def get_game_name(observation: str):
-    if "ColonelBlotto" in observation:
-        return "ColonelBlotto"
-    elif "Iterated Prisoner" in observation:
-        return "Iterated Prisoner"
-    return "Codenames"
+    game = classify(observation).game
+    return GAME_LABELS.get(game, game) or "Codenames"
 
 
 if __name__ == '__main__':
@@ -45,7 +48,7 @@ if __name__ == '__main__':
             print(f"==================================================")
             print(f"====================== {i+1} =====================")
             print(f"==================================================")
-            # This play 1 game, you could add for loop to play multiple games
+            # This play 1 game, online_session.py plays many games concurrently
             env = ta.make_mgc_online(
                 track="Generalization",
                 model_name=MODEL_NAME,
@@ -61,6 +64,7 @@ if __name__ == '__main__':
             while not done:
                 player_id, observation = env.get_observation()
                 game_name = get_game_name(observation)
+                capture_observation(observation)  # keyed by classify(), like online_session captures
                 action = agent(observation)
                 done, step_info = env.step(action=action)
 
@@ -0,0 +1,134 @@
+"""
+Online session: keeps several make_mgc_online games in flight at once. Every game gets its own agent
+(agents keep per-game state such as memory and the current action schema), while all agents share one
+RequestGate so the ollama backend sees at most --parallel generations at a time.
+Finished games are recorded in the opponent store (--opponent-db), pooled: the online env does not name the opponents.
+
+    uv run online_session.py --agent V9 --games 20 --concurrency 3 --parallel 2
+"""
+import os
+import time
+import inspect
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
+
+from dotenv import load_dotenv
+
+from agent_registry import agent_class, load_agent
+from game_classifier import GameInfo, classify
+from benchmark import capture_observation
+from model_router import RequestGate
+from opponent_store import OpponentStore, DEFAULT_STORE_PATH
+
+
+class OnlineSession:
+
+    def __init__(self, agent_factory: Callable, model_name: str, model_description: str, team_hash: str,
+                 concurrency: int = 2, small_category: bool = True, capture: bool = True, opponent_store: OpponentStore = None):
+        self.agent_factory = agent_factory
+        self.model_name = model_name
+        self.model_description = model_description
+        self.team_hash = team_hash
+        self.concurrency = concurrency
+        self.small_category = small_category
+        self.capture = capture
+        self.opponent_store = opponent_store
+        self.results = []
+        self.valid_game_count = {}
+        self._lock = threading.Lock()
+
+    def play_one(self, game_index: int) -> dict:
+        import textarena as ta
+
+        agent = self.agent_factory()
+        env = ta.make_mgc_online(
+            track="Generalization",
+            model_name=self.model_name,
+            model_description=self.model_description,
+            team_hash=self.team_hash,
+            agent=agent,
+            small_category=self.small_category
+        )
+        env.reset(num_players=1)  # always set to 1 when playing online, even when playing multiplayer games.
+
+        start_time = time.time()
+        done, turns, game_name, game_info_ = False, 0, "None", GameInfo()
+        while not done:
+            player_id, observation = env.get_observation()
+            info = classify(observation)
+            if info.game:
+                game_name, game_info_ = info.game, info
+            if self.capture:
+                capture_observation(observation, game_name)
+            action = agent(observation)
+            done, step_info = env.step(action=action)
+            turns += 1
+        rewards, game_info = env.close()
+        recorded = {}
+        if self.opponent_store is not None and turns:
+            recorded = self.opponent_store.record_game(observation, game_info_)
+        return {"index": game_index, "game": game_name, "turns": turns, "seconds": time.time() - start_time,
+                "valid": len(str(rewards)) > 5, "rewards": rewards, "game_info": game_info, "recorded": recorded}
+
+    def _record(self, result: dict):
+        with self._lock:
+            self.results.append(result)
+            if result.get("valid"):
+                self.valid_game_count[result["game"]] = self.valid_game_count.get(result["game"], 0) + 1
+
+    def run(self, num_games: int) -> dict:
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {executor.submit(self.play_one, i): i for i in range(num_games)}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except BaseException as e:
+                    result = {"index": futures[future], "game": "None", "valid": False, "error": repr(e)}
+                self._record(result)
+                print(f"[game {result['index'] + 1}/{num_games}] {result.get('game')} rewards={result.get('rewards')} error={result.get('error')}")
+                print(f"=================== {self.valid_game_count} ===================")
+        return self.summary(time.time() - start_time)
+
+    def summary(self, elapsed_s: float) -> dict:
+        finished = [result for result in self.results if "error" not in result]
+        return {
+            "games": len(self.results),
+            "valid_games": sum(self.valid_game_count.values()),
+            "errors": len(self.results) - len(finished),
+            "elapsed_s": round(elapsed_s, 1),
+            "games_per_hour": round(len(finished) / elapsed_s * 3600, 2) if elapsed_s else 0.0,
+            "valid_game_count": dict(self.valid_game_count),
+        }
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agent", default="V7")
+    parser.add_argument("--model", default="qwen3:8b")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=2, help="games in flight")
+    parser.add_argument("--parallel", type=int, default=1, help="generations in flight, match OLLAMA_NUM_PARALLEL")
+    parser.add_argument("--name", default="STARS Agent Track2 V7")
+    parser.add_argument("--description", default="STARS Agent Track2 V7")
+    parser.add_argument("--opponent-db", default=DEFAULT_STORE_PATH, help="opponent fingerprints, '' to disable")
+    args = parser.parse_args()
+
+    gate = RequestGate(args.parallel)
+    opponent_store = OpponentStore(args.opponent_db) if args.opponent_db else None
+    # agents with solver priors read the store the session writes, so its cached priors see every recorded game
+    store_kwargs = {"opponent_store": opponent_store} if "opponent_store" in inspect.signature(agent_class(args.agent)).parameters else {}
+    session = OnlineSession(
+        agent_factory=lambda: load_agent(args.agent, model_name=args.model, request_gate=gate, **store_kwargs),
+        model_name=args.name,
+        model_description=args.description,
+        team_hash=os.getenv("TEAM_HASH"),
+        concurrency=args.concurrency,
+        opponent_store=opponent_store,
+    )
+    print(session.run(args.games))
+    print(gate.report())
@@ -0,0 +1,192 @@
+"""
+Opponent fingerprints kept across online games: Blotto allocations, IPD cooperate / defect decisions and Codenames
+clues parsed from our observations, and the lookups solvers need at game start (blotto_prior, cooperation_rate,
+clue_style). The online env does not name the opponents (env.close() only returns our own seat's turn count,
+invalid move flag, reason and outcome), so online games are pooled under UNKNOWN_OPPONENT; callers that know who
+played, e.g. local self-play, pass the names to record_game. Lookups for an opponent without games use the pool
+(report() shows each opponent's own rows only).
+
+Blotto priors seed blotto_solver.blotto_candidates and the pooled cooperation rate seeds ipd_candidates below;
+clue_style is a fingerprint for the report only, no Codenames solver consumes it yet.
+
+    uv run opponent_store.py --db cache/opponents.sqlite
+"""
+import os
+import re
+import time
+import sqlite3
+import argparse
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from game_classifier import GameInfo
+from speculation import CANDIDATE_GENERATORS
+
+
+UNKNOWN_OPPONENT = "unknown"
+DEFAULT_STORE_PATH = "cache/opponents.sqlite"
+
+IPD_RESULT_PAT = re.compile(r"Player (\d+) vs Player (\d+) chose to (cooperate|defect) and (cooperate|defect)")
+CODENAMES_CLUE_PAT = re.compile(r"Spymaster of (Red|Blue) team, Player (\d+), submitted \[(\w+) (\d+)\]")
+
+
+class OpponentStore:
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._priors: Dict[tuple, Dict[tuple, float]] = {} # memoized blotto_prior results, cleared on every write
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS blotto_allocations (opponent TEXT NOT NULL, fields TEXT NOT NULL, units INTEGER NOT NULL,
+                                                           allocation TEXT NOT NULL, recorded REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS blotto_allocations_lookup ON blotto_allocations (fields, units, opponent);
+            CREATE TABLE IF NOT EXISTS ipd_decisions (opponent TEXT PRIMARY KEY, cooperations INTEGER NOT NULL, decisions INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS codenames_clues (opponent TEXT NOT NULL, clue TEXT NOT NULL, number INTEGER NOT NULL, recorded REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS codenames_clues_lookup ON codenames_clues (opponent);
+        """)
+        self._conn.commit()
+
+    # ---- recording ----
+
+    def record_blotto(self, opponent: str, field_names: Sequence[str], units: int, allocations: List[Sequence[int]]):
+        now = time.time()
+        rows = [(opponent, ",".join(field_names), units, ",".join(map(str, allocation)), now) for allocation in allocations]
+        with self._lock:
+            self._conn.executemany("INSERT INTO blotto_allocations VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+            self._priors.clear()
+
+    def record_ipd(self, opponent: str, cooperations: int, decisions: int):
+        with self._lock:
+            self._conn.execute("INSERT INTO ipd_decisions VALUES (?, ?, ?) ON CONFLICT(opponent) DO UPDATE SET "
+                               "cooperations = cooperations + excluded.cooperations, decisions = decisions + excluded.decisions",
+                               (opponent, cooperations, decisions))
+            self._conn.commit()
+
+    def record_codenames(self, opponent: str, clues: List[tuple]):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany("INSERT INTO codenames_clues VALUES (?, ?, ?, ?)", [(opponent, clue, number, now) for clue, number in clues])
+            self._conn.commit()
+
+    def record_game(self, observation: str, info: GameInfo, opponents: Optional[Dict[int, str]] = None) -> dict:
+        """
+        Parse a finished game's observation and record every opponent's moves, returns counts per table.
+        opponents maps player id -> name where the caller knows it, the other seats go to UNKNOWN_OPPONENT.
+        """
+        from blotto_solver import opponent_history
+
+        recorded = {}
+        name = lambda pid: (opponents or {}).get(pid, UNKNOWN_OPPONENT)
+        if info.game == "ColonelBlotto":
+            fields = re.findall(r"Available fields: ([A-Z](?:, [A-Z])*)", observation)
+            units = re.findall(r"Units to allocate: (\d+)", observation)
+            field_names = fields[-1].split(", ") if fields else ["A", "B", "C"]
+            history = opponent_history(observation, info.player_id or 0, field_names)
+            self.record_blotto(name(1 - (info.player_id or 0)), field_names, int(units[-1]) if units else 20, history)
+            recorded["blotto_allocations"] = len(history)
+        elif info.game == "ThreePlayerIPD":
+            counts: Dict[int, List[int]] = {}
+            for a, b, choice_a, choice_b in IPD_RESULT_PAT.findall(observation):
+                for pid, choice in [(int(a), choice_a), (int(b), choice_b)]:
+                    if pid != info.player_id:
+                        counts.setdefault(pid, [0, 0])
+                        counts[pid][0] += choice == "cooperate"
+                        counts[pid][1] += 1
+            for pid, (cooperations, decisions) in counts.items():
+                self.record_ipd(name(pid), cooperations, decisions)
+            recorded["ipd_decisions"] = sum(decisions for _, decisions in counts.values())
+        elif info.game == "Codenames":
+            clues: Dict[int, List[tuple]] = {}
+            for _, pid, clue, number in CODENAMES_CLUE_PAT.findall(observation):
+                if int(pid) != info.player_id:
+                    clues.setdefault(int(pid), []).append((clue.lower(), int(number)))
+            for pid, player_clues in clues.items():
+                self.record_codenames(name(pid), player_clues)
+            recorded["codenames_clues"] = sum(len(player_clues) for player_clues in clues.values())
+        return recorded
+
+    # ---- lookups ----
+
+    def blotto_prior(self, field_names: Sequence[str], units: int, opponent: Optional[str] = None) -> Dict[tuple, float]:
+        """ Allocation frequencies of this opponent, or of all opponents when it is unknown or has no games yet """
+        key = (",".join(field_names), units, opponent)
+        with self._lock:
+            if key in self._priors:
+                return self._priors[key]
+            query = "SELECT allocation, COUNT(*) FROM blotto_allocations WHERE fields = ? AND units = ?"
+            rows = []
+            if opponent is not None and opponent != UNKNOWN_OPPONENT:
+                rows = self._conn.execute(query + " AND opponent = ? GROUP BY allocation", (key[0], units, opponent)).fetchall()
+            if not rows:
+                rows = self._conn.execute(query + " GROUP BY allocation", (key[0], units)).fetchall()
+            total = sum(count for _, count in rows)
+            prior = {tuple(int(u) for u in allocation.split(",")): count / total for allocation, count in rows}
+            self._priors[key] = prior
+            return prior
+
+    def cooperation_rate(self, opponent: Optional[str] = None, fallback: bool = True) -> Optional[float]:
+        """ Share of cooperate decisions of this opponent, of all opponents when it is unknown or (fallback) has none yet """
+        with self._lock:
+            row = None
+            if opponent is not None:
+                row = self._conn.execute("SELECT cooperations, decisions FROM ipd_decisions WHERE opponent = ?", (opponent,)).fetchone()
+            if opponent is None or (fallback and not (row and row[1])):
+                row = self._conn.execute("SELECT SUM(cooperations), SUM(decisions) FROM ipd_decisions").fetchone()
+        return round(row[0] / row[1], 3) if row and row[1] else None
+
+    def clue_style(self, opponent: Optional[str] = None, fallback: bool = True) -> dict:
+        """ Number of clues, mean clue number and most used clue words, of all opponents when the opponent has none (fallback) """
+        def style(where: str, args: tuple) -> dict:
+            count, mean_number = self._conn.execute(f"SELECT COUNT(*), AVG(number) FROM codenames_clues {where}", args).fetchone()
+            top = self._conn.execute(f"SELECT clue, COUNT(*) AS n FROM codenames_clues {where} GROUP BY clue ORDER BY n DESC LIMIT 5", args).fetchall()
+            return {"clues": count, "mean_number": round(mean_number, 2) if mean_number else None, "top_clues": [clue for clue, _ in top]}
+
+        with self._lock:
+            result = style("WHERE opponent = ?", (opponent,)) if opponent is not None else style("", ())
+            if opponent is not None and fallback and not result["clues"]:
+                result = style("", ())
+        return result
+
+    def opponents(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT opponent FROM blotto_allocations UNION SELECT opponent FROM ipd_decisions "
+                                      "UNION SELECT opponent FROM codenames_clues").fetchall()
+        return sorted(opponent for (opponent,) in rows)
+
+    def report(self) -> dict:
+        return {opponent: {"cooperation_rate": self.cooperation_rate(opponent, fallback=False),
+                           "clue_style": self.clue_style(opponent, fallback=False)}
+                for opponent in self.opponents()}
+
+
+def ipd_candidates(observation: str, info: GameInfo, opponent_store: Optional[OpponentStore] = None) -> List[str]:
+    """
+    speculation.CANDIDATE_GENERATORS entry: tit-for-tat on each opponent's last decision towards us, and for opponents
+    without one yet the store's pooled cooperation rate (defect when most recorded decisions were defect)
+    """
+    if info.player_id is None:
+        return []
+    last = {}
+    for a, b, choice_a, choice_b in IPD_RESULT_PAT.findall(observation):
+        if int(a) == info.player_id:
+            last[int(b)] = choice_b
+        elif int(b) == info.player_id:
+            last[int(a)] = choice_a
+    rate = opponent_store.cooperation_rate() if opponent_store is not None else None
+    default = "defect" if rate is not None and rate < 0.5 else "cooperate"
+    return [" ".join(f"[{pid} {last.get(pid, default)}]" for pid in range(3) if pid != info.player_id)]
+
+
+CANDIDATE_GENERATORS["ThreePlayerIPD"] = ipd_candidates
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=DEFAULT_STORE_PATH)
+    args = parser.parse_args()
+    for opponent, fingerprint in OpponentStore(args.db).report().items():
+        print(opponent, fingerprint)
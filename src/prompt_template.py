@@ -0,0 +1,98 @@
+import re
+from typing import Dict, Iterable, List
+
+
+class PromptTemplate:
+    """
+    A prompt with placeholders, split once into literal segments so render() is a single join instead of
+    one full-string copy per str.replace. Placeholders inside substituted values are left untouched.
+    """
+
+    def __init__(self, template: str, placeholders: Iterable[str]):
+        pattern = re.compile("|".join(re.escape(p) for p in sorted(placeholders, key=len, reverse=True)))
+        self.template = template
+        self.segments: List[str] = []
+        self.slots: List[str] = []
+        position = 0
+        for m in pattern.finditer(template):
+            self.segments.append(template[position:m.start()])
+            self.slots.append(m.group(0))
+            position = m.end()
+        self.segments.append(template[position:])
+
+    def render(self, **values: str) -> str:
+        parts = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            parts.append(values[slot])
+            parts.append(segment)
+        return "".join(parts)
+
+
+class ObservationRewriter:
+    """
+    Literal rewrite rules compiled once into a tuple. A single-pass alternation regex was measured at about
+    2x slower than chained str.replace (see __main__), and replace returns the same object when a rule does not
+    match, so the chain does no copies for rules absent from the observation.
+    """
+
+    def __init__(self, rules: Dict[str, str]):
+        self.rules = tuple(rules.items())
+        self.pattern = re.compile("|".join(re.escape(old) for old, _ in sorted(self.rules, key=lambda rule: len(rule[0]), reverse=True)))
+
+    def rewrite(self, text: str) -> str:
+        for old, new in self.rules:
+            text = text.replace(old, new)
+        return text
+
+    def rewrite_single_pass(self, text: str) -> str:
+        rules = dict(self.rules)
+        return self.pattern.sub(lambda m: rules[m.group(0)], text)
+
+
+if __name__ == "__main__":
+    import json
+    import timeit
+    from copy import deepcopy
+    from stars_agent import OBSERVATION_REWRITES
+    from stars_agent_track2_v9 import StarsAgentTrack2V9
+
+    with open("samples.json", "r", encoding="utf-8") as f:
+        observations = [observation for samples in json.load(f).values() for observation in samples]
+    rewriter = ObservationRewriter(OBSERVATION_REWRITES)
+    base_template = StarsAgentTrack2V9._base_template
+    number = 200
+
+    def old_rewrite():
+        for observation in observations:
+            observation_ = observation
+            for old, new in OBSERVATION_REWRITES.items():
+                observation_ = observation_.replace(old, new)
+
+    def single_pass_rewrite():
+        for observation in observations:
+            rewriter.rewrite_single_pass(observation)
+
+    def new_rewrite():
+        for observation in observations:
+            rewriter.rewrite(observation)
+
+    def old_render():
+        for observation in observations:
+            deepcopy(StarsAgentTrack2V9._base_prompt).replace("OBSERVATION_PLACEHOLDER", observation)
+
+    def new_render():
+        for observation in observations:
+            base_template.render(OBSERVATION_PLACEHOLDER=observation)
+
+    for observation in observations:
+        expected = observation
+        for old, new in OBSERVATION_REWRITES.items():
+            expected = expected.replace(old, new)
+        assert rewriter.rewrite(observation) == expected == rewriter.rewrite_single_pass(observation)
+        assert base_template.render(OBSERVATION_PLACEHOLDER=observation) == StarsAgentTrack2V9._base_prompt.replace("OBSERVATION_PLACEHOLDER", observation)
+
+    for name, fn in [("rewrite, chained replace", old_rewrite), ("rewrite, alternation regex", single_pass_rewrite),
+                     ("rewrite, ObservationRewriter", new_rewrite), ("render, deepcopy + replace", old_render),
+                     ("render, PromptTemplate", new_render)]:
+        seconds = timeit.timeit(fn, number=number) / number / len(observations)
+        print(f"{name:<30} {seconds * 1e6:8.2f}us per observation")
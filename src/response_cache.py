@@ -0,0 +1,69 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+
+
+class ResponseCache:
+    """
+    Content addressed on-disk cache for LLM responses, keyed by model, prompt, system, options and format.
+    The least recently used rows are evicted once the cache holds more than max_entries responses.
+    """
+
+    def __init__(self, path: str = "cache/responses.sqlite", max_entries: int = 20000):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, last_access REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, system: str = None, options: dict = None, output_format=None) -> str:
+        payload = json.dumps([model, prompt, system, options, output_format], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_chat_key(model: str, messages: list, options: dict = None, output_format=None) -> str:
+        """ Key of a chat request, its (role, content) turns stand in for the prompt and system """
+        turns = [[message["role"], message["content"]] for message in messages]
+        return ResponseCache.make_key(model, turns, None, options, output_format)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, response: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO responses (key, response, last_access) VALUES (?, ?, ?)", (key, response, time.time()))
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                    (count - self.max_entries,))
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0, "entries": entries}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,329 @@
+"""
+Warm-worker executor for trivial generated snippets (arithmetic, comprehensions, small enumerations), so they do not
+pay a python subprocess start. A snippet runs here only when static analysis finds it safe-pure:
+    - imports limited to SAFE_MODULES, which are handed over without their private names and submodules
+    - no names or attributes starting with '_', no string constants containing '__', no str.format, no frame access
+    - no builtins outside SAFE_BUILTINS (no open / eval / getattr / ...), no bare except or except BaseException
+    - no helpers that evaluate strings (EVALUATING_HELPERS; typing.get_type_hints is why typing is not allowed)
+    - no huge integer constants or large powers
+It then runs with a restricted namespace and a captured print in a fork of a persistent worker process, never in the agent:
+a line / time budget enforced by sys.settrace stops python-level loops, and the worker is killed past
+HARD_TIMEOUT_S, which also bounds the loops that run in C (sum(range(10 ** 12))), and capped at WORKER_MEMORY_MB.
+Anything else, a snippet over budget or a killed worker returns None and the caller uses the subprocess sandbox.
+"""
+import os
+import ast
+import sys
+import json
+import time
+import types
+import select
+import signal
+import builtins
+import importlib
+import threading
+import traceback
+import subprocess
+from io import StringIO
+from typing import List, Optional, Tuple
+
+
+SAFE_MODULES = {"math", "cmath", "itertools", "functools", "collections", "collections.abc", "heapq", "bisect",
+                "statistics", "fractions", "decimal", "re", "json", "copy"}
+# helpers of SAFE_MODULES that compile or evaluate strings: singledispatch.register evaluates string annotations
+# with typing.get_type_hints, namedtuple builds its __new__ with eval
+EVALUATING_HELPERS = {"singledispatch", "singledispatchmethod", "namedtuple"}
+SAFE_BUILTINS = {
+    "abs", "all", "any", "ascii", "bin", "bool", "bytes", "callable", "chr", "complex", "dict", "divmod", "enumerate",
+    "filter", "float", "format", "frozenset", "hex", "int", "isinstance", "issubclass", "iter", "len", "list", "map",
+    "max", "min", "next", "object", "oct", "ord", "pow", "range", "repr", "reversed", "round", "set", "slice", "sorted",
+    "str", "sum", "tuple", "type", "zip", "property", "staticmethod", "classmethod", "super", "NotImplemented",
+    "Ellipsis", "True", "False", "None",
+    "Exception", "ArithmeticError", "AssertionError", "AttributeError", "IndexError", "KeyError", "LookupError",
+    "NameError", "NotImplementedError", "OverflowError", "RecursionError", "RuntimeError", "StopIteration",
+    "TypeError", "ValueError", "ZeroDivisionError",
+}
+# str.format reaches attributes through its format string, frames and tracebacks reach this module's globals
+FORBIDDEN_ATTRIBUTES = {"format", "format_map", "vformat", "gi_frame", "gi_code", "cr_frame", "ag_frame", "tb_frame",
+                        "tb_next", "f_back", "f_globals", "f_locals", "f_builtins", "f_code"}
+MAX_INT_CONSTANT = 10 ** 6
+MAX_POWER = 64
+
+# a python subprocess starts in about 20ms, anything near the budget is better off there
+MAX_LINES = 200_000
+TIME_BUDGET_S = 0.1
+# the worker is killed past this, C-level loops do not reach the tracer
+HARD_TIMEOUT_S = 1.0
+WORKER_MEMORY_MB = 512
+MAX_WORKERS = 2
+
+SAFE_EXEC_STATS = {"restricted": 0, "unsafe": 0, "over_budget": 0, "killed": 0, "seconds": 0.0}
+_stats_lock = threading.Lock()
+
+
+class BudgetExceeded(BaseException):
+    """ BaseException so `except Exception` in the snippet cannot swallow it """
+
+
+def unsafe_reason(source: str) -> Optional[str]:
+    """ Why the snippet has to run in the subprocess, None when it is safe-pure """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return "syntax error"
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.name not in SAFE_MODULES:
+                    return f"import {alias.name}"
+        elif isinstance(node, ast.ImportFrom):
+            if node.level or node.module not in SAFE_MODULES:
+                return f"from {node.module} import"
+            if any(alias.name == "*" or alias.name.startswith("_") or alias.name in EVALUATING_HELPERS for alias in node.names):
+                return f"from {node.module} import {[alias.name for alias in node.names]}"
+        elif isinstance(node, ast.Name):
+            if node.id.startswith("_") or node.id in EVALUATING_HELPERS:
+                return f"name {node.id}"
+            if hasattr(builtins, node.id) and node.id not in SAFE_BUILTINS and node.id != "print":
+                return f"builtin {node.id}"
+        elif isinstance(node, ast.Attribute):
+            if node.attr.startswith("_") or node.attr in FORBIDDEN_ATTRIBUTES or node.attr in EVALUATING_HELPERS:
+                return f"attribute {node.attr}"
+        elif isinstance(node, (ast.FunctionDef, ast.ClassDef, ast.arg, ast.alias)):
+            name = getattr(node, "name", None) or getattr(node, "arg", None) or getattr(node, "asname", None)
+            if name and name.startswith("_"):
+                return f"name {name}"
+        elif isinstance(node, ast.Constant):
+            if isinstance(node.value, str) and "__" in node.value:
+                return "dunder string"
+            if isinstance(node.value, int) and not isinstance(node.value, bool) and abs(node.value) > MAX_INT_CONSTANT:
+                return f"constant {node.value}"
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Pow, ast.LShift)):
+            exponent = node.right
+            if not (isinstance(exponent, ast.Constant) and isinstance(exponent.value, (int, float)) and exponent.value <= MAX_POWER):
+                return "large power"
+        elif isinstance(node, ast.ExceptHandler):
+            if node.type is None or any(isinstance(n, ast.Name) and n.id == "BaseException" for n in ast.walk(node.type)):
+                return "bare except"
+        elif isinstance(node, (ast.AsyncFunctionDef, ast.Await, ast.Global, ast.Nonlocal)):
+            return type(node).__name__
+    return None
+
+
+def _public_module(name: str) -> types.SimpleNamespace:
+    """ The module without private names and without the modules it imported (statistics.sys, typing.sys, ...) """
+    module = importlib.import_module(name)
+    return types.SimpleNamespace(**{attr: value for attr, value in vars(module).items()
+                                    if not attr.startswith("_") and not isinstance(value, types.ModuleType)})
+
+
+def _restricted_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name not in SAFE_MODULES:
+        raise ImportError(f"import of {name} is not allowed here")
+    if fromlist or "." not in name:
+        return _public_module(name)
+    # `import collections.abc` binds the top package, with the submodule as an attribute
+    package = _public_module(name.split(".")[0])
+    setattr(package, name.split(".", 1)[1], _public_module(name))
+    return package
+
+
+def _exec_restricted(source: str, max_lines: int, time_budget_s: float) -> Optional[Tuple[int, str, str]]:
+    """ Runs in the worker: (returncode, stdout, stderr), None when the snippet went over its line / time / memory budget """
+    stdout = StringIO()
+
+    def restricted_print(*args, sep=" ", end="\n", file=None, flush=False):
+        stdout.write((" " if sep is None else str(sep)).join(map(str, args)) + ("\n" if end is None else str(end)))
+
+    namespace = {"__builtins__": {**{name: getattr(builtins, name) for name in SAFE_BUILTINS},
+                                  "print": restricted_print, "__import__": _restricted_import,
+                                  "__build_class__": builtins.__build_class__},
+                 "__name__": "__main__"}
+    lines = 0
+    deadline = time.perf_counter() + time_budget_s
+
+    def tracer(frame, event, arg):
+        nonlocal lines
+        if frame.f_code.co_filename != "<snippet>":
+            return None # only snippet frames are counted, library code runs untraced
+        if event == "line":
+            lines += 1
+            if lines > max_lines or (lines % 1000 == 0 and time.perf_counter() > deadline):
+                raise BudgetExceeded()
+        return tracer
+
+    code = compile(source, "<snippet>", "exec")
+    previous_trace = sys.gettrace()
+    returncode, stderr = 0, ""
+    sys.settrace(tracer)
+    try:
+        exec(code, namespace)
+    except (BudgetExceeded, MemoryError):
+        return None # the subprocess has more memory and a longer timeout
+    except RecursionError as e:
+        returncode, stderr = 1, f"RecursionError: {e}\n"
+    except Exception as e:
+        # same shape as the interpreter's report, without the frames of this module
+        returncode, stderr = 1, "".join(traceback.format_exception(type(e), e, e.__traceback__.tb_next))
+    finally:
+        sys.settrace(previous_trace)
+    return returncode, stdout.getvalue(), stderr
+
+
+# the worker loop: one json request per stdin line, one json reply per stdout line. Every request runs in a fork
+# of the warm worker, so whatever a snippet changes in the modules it was handed (Counter.most_common = ...)
+# dies with the fork and never reaches the next snippet
+_WORKER = r"""
+import os, sys, json, importlib
+sys.path.insert(0, sys.argv[1])
+try:
+    import resource
+    resource.setrlimit(resource.RLIMIT_AS, (int(sys.argv[2]) * 1024 * 1024,) * 2)
+except (ImportError, ValueError, OSError):
+    pass
+from safe_exec import _exec_restricted, SAFE_MODULES
+for name in SAFE_MODULES:
+    importlib.import_module(name) # imported once here, every fork starts with them
+for line in sys.stdin:
+    request = json.loads(line)
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            reply = json.dumps({"result": _exec_restricted(request["source"], request["max_lines"], request["time_budget_s"])})
+        except BaseException:
+            reply = json.dumps({"result": None})
+        with os.fdopen(write_fd, "w", encoding="utf-8") as pipe:
+            pipe.write(reply)
+        os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd, encoding="utf-8") as pipe:
+        reply = pipe.read()
+    os.waitpid(pid, 0)
+    sys.stdout.write((reply or json.dumps({"result": None})) + "\n") # an empty reply: the fork died, e.g. out of memory
+    sys.stdout.flush()
+"""
+
+
+class _Worker:
+    """ One warm python process forking a child per _exec_restricted call; killed and forgotten on timeout or any protocol error """
+
+    def __init__(self):
+        env = os.environ.copy()
+        env["PYTHONHASHSEED"] = "0" # same set / dict-of-str order as the sandbox, so both tiers print the same
+        env["PYTHONIOENCODING"] = "utf-8"
+        self.process = subprocess.Popen([sys.executable, "-c", _WORKER, os.path.dirname(os.path.abspath(__file__)), str(WORKER_MEMORY_MB)],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                        text=True, encoding="utf-8", env=env, start_new_session=True)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def kill(self):
+        if self.process is not None:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL) # the worker and the fork running the snippet
+            except OSError:
+                self.process.kill()
+            self.process.wait()
+            self.process = None
+
+    def run(self, source: str, max_lines: int, time_budget_s: float, timeout_s: float) -> Tuple[bool, Optional[tuple]]:
+        """ (answered, result); not answered means the worker was killed """
+        try:
+            self.process.stdin.write(json.dumps({"source": source, "max_lines": max_lines, "time_budget_s": time_budget_s}) + "\n")
+            self.process.stdin.flush()
+            ready, _, _ = select.select([self.process.stdout], [], [], timeout_s)
+            line = self.process.stdout.readline() if ready else ""
+            reply = json.loads(line) if line else None
+        except (OSError, ValueError):
+            reply = None
+        if reply is None:
+            self.kill()
+            return False, None
+        return True, tuple(reply["result"]) if reply["result"] is not None else None
+
+
+_idle_workers: List[_Worker] = []
+_live_workers = 0
+
+
+def _take_worker() -> Optional[_Worker]:
+    global _live_workers
+    with _stats_lock:
+        if _idle_workers:
+            return _idle_workers.pop()
+        if _live_workers >= MAX_WORKERS:
+            return None # every worker is busy, the caller uses the subprocess
+        _live_workers += 1
+    try:
+        return _Worker()
+    except OSError:
+        with _stats_lock:
+            _live_workers -= 1
+        return None
+
+
+def _release_worker(worker: _Worker):
+    global _live_workers
+    with _stats_lock:
+        if worker.alive:
+            _idle_workers.append(worker)
+        else:
+            _live_workers -= 1
+
+
+def run_restricted(source: str, max_lines: int = MAX_LINES, time_budget_s: float = TIME_BUDGET_S,
+                   timeout_s: float = HARD_TIMEOUT_S) -> Optional[Tuple[int, str, str]]:
+    """ (returncode, stdout, stderr) like the subprocess runner, or None when the snippet must run in the subprocess """
+    reason = unsafe_reason(source)
+    if reason is not None:
+        with _stats_lock:
+            SAFE_EXEC_STATS["unsafe"] += 1
+        return None
+    if os.name != "posix": # select() cannot wait on pipes elsewhere
+        return None
+    worker = _take_worker()
+    if worker is None:
+        return None
+    start_time = time.perf_counter()
+    try:
+        answered, result = worker.run(source, max_lines, time_budget_s, timeout_s)
+    finally:
+        _release_worker(worker)
+    with _stats_lock:
+        if not answered:
+            SAFE_EXEC_STATS["killed"] += 1
+        elif result is None:
+            SAFE_EXEC_STATS["over_budget"] += 1
+        else:
+            SAFE_EXEC_STATS["restricted"] += 1
+            SAFE_EXEC_STATS["seconds"] += time.perf_counter() - start_time
+    return result
+
+
+if __name__ == "__main__":
+    from utils import _run_python_source
+
+    snippets = [
+        "import itertools\nbest = max((a, b, 20 - a - b) for a, b in itertools.product(range(21), repeat=2) if a + b <= 20)\nprint(best)",
+        "from collections import Counter\nprint(Counter('cooperate defect cooperate'.split()).most_common(1))",
+        "total = 0\nfor i in range(10 ** 6):\n    total += i\nprint(total)",
+        "print(1 / 0)",
+        "import os\nprint(os.getcwd())",
+        "print(().__class__)",
+        "print(sum(range(10 ** 6 * 300)))",  # seconds in C, the tracer never sees it
+    ]
+    for snippet in snippets:
+        start_time = time.perf_counter()
+        result = run_restricted(snippet)
+        worker_s = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        expected = _run_python_source(snippet, 20)
+        subprocess_s = time.perf_counter() - start_time
+        same = result is None or (result[0], result[1]) == (expected[0], expected[1])
+        print(f"worker {worker_s * 1000:7.2f}ms  subprocess {subprocess_s * 1000:7.2f}ms  "
+              f"ran_here={result is not None} same={same} reason={unsafe_reason(snippet)}")
+    print(SAFE_EXEC_STATS)
@@ -0,0 +1,177 @@
+"""
+Subprocess sandbox for generated python: the child applies rlimits to itself before running the snippet
+(address space, CPU seconds, file size, process count), lowers its priority and optionally joins a cgroup,
+so a runaway script cannot starve the ollama server sharing the box. Each run reports its resource usage.
+
+The limits are set by a bootstrap inside the child rather than preexec_fn, which is not safe in a process with
+threads (the speculation and online session threads call run_python_blocks).
+
+    SANDBOX_CGROUP=/sys/fs/cgroup/sandbox   # optional, a cgroup v2 directory we may write to; set its cpu.weight once
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+import subprocess
+from collections import deque
+from typing import Optional, Tuple
+
+
+class SandboxLimits:
+    def __init__(self, memory_mb: int = 2048, cpu_s: int = 20, file_size_mb: int = 16, nproc: int = 512,
+                 nice: int = 10, cgroup: Optional[str] = None):
+        """
+        Args:
+            memory_mb: RLIMIT_AS, MemoryError past it
+            cpu_s: RLIMIT_CPU, the child is killed by SIGXCPU past it (the wall-clock timeout still applies)
+            file_size_mb: RLIMIT_FSIZE
+            nproc: RLIMIT_NPROC, counts every process and thread of the user, not only the child's
+            nice: added to the child's niceness, so the model server wins CPU contention
+            cgroup: cgroup v2 directory the child moves itself into, default $SANDBOX_CGROUP
+        """
+        self.memory_mb = memory_mb
+        self.cpu_s = cpu_s
+        self.file_size_mb = file_size_mb
+        self.nproc = nproc
+        self.nice = nice
+        self.cgroup = cgroup if cgroup is not None else os.getenv("SANDBOX_CGROUP")
+
+    def rlimits(self) -> dict:
+        return {"RLIMIT_AS": self.memory_mb * 1024 * 1024, "RLIMIT_CPU": self.cpu_s,
+                "RLIMIT_FSIZE": self.file_size_mb * 1024 * 1024, "RLIMIT_NPROC": self.nproc}
+
+
+# runs in the child: limits first, then the snippet as __main__, then its own usage to the metrics file
+_BOOTSTRAP = r"""
+import os, sys, json, traceback
+config = json.loads(sys.argv[1])
+path, metrics_path = sys.argv[2], sys.argv[3]
+try:
+    import resource
+except ImportError: # windows, no rlimits
+    resource = None
+for name, value in (config["rlimits"] if resource is not None else {}).items():
+    try:
+        soft, hard = resource.getrlimit(getattr(resource, name))
+        value = value if hard == resource.RLIM_INFINITY else min(value, hard)
+        # a CPU hard limit above the soft one, so the child gets SIGXCPU rather than SIGKILL
+        resource.setrlimit(getattr(resource, name), (value, value + 1 if name == "RLIMIT_CPU" and value != hard else value))
+    except (AttributeError, ValueError, OSError):
+        pass
+if config["nice"] and hasattr(os, "nice"):
+    os.nice(config["nice"])
+if config["cgroup"]:
+    try:
+        with open(os.path.join(config["cgroup"], "cgroup.procs"), "w") as f:
+            f.write(str(os.getpid()))
+    except OSError:
+        pass
+sys.argv = [path]
+sys.path[0] = os.path.dirname(path)
+exit_code = 0
+try:
+    with open(path, encoding="utf-8") as f:
+        code = compile(f.read(), path, "exec")
+    exec(code, {"__name__": "__main__", "__file__": path, "__builtins__": __builtins__})
+except SystemExit as e:
+    if e.code is not None and not isinstance(e.code, int):
+        print(e.code, file=sys.stderr)
+    exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+except BaseException as e:
+    traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+    exit_code = 1
+finally:
+    if resource is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        with open(metrics_path, "w") as f:
+            json.dump({"cpu_s": usage.ru_utime + usage.ru_stime, "max_rss_mb": usage.ru_maxrss / 1024}, f)
+    sys.stdout.flush()
+sys.exit(exit_code)
+"""
+
+# signals the kernel sends when a limit is hit
+_LIMIT_SIGNALS = {24: "cpu", 25: "file_size", 9: "killed"}
+
+SANDBOX_STATS = {"runs": 0, "timeouts": 0, "memory_errors": 0, "limit_kills": 0, "cpu_s": 0.0, "wall_s": 0.0}
+SANDBOX_HISTORY = deque(maxlen=512) # per execution metrics, newest last
+_stats_lock = threading.Lock()
+DEFAULT_LIMITS = SandboxLimits()
+
+
+def _record(metrics: dict):
+    with _stats_lock:
+        SANDBOX_STATS["runs"] += 1
+        SANDBOX_STATS["timeouts"] += metrics["timeout"]
+        SANDBOX_STATS["memory_errors"] += metrics["memory_error"]
+        SANDBOX_STATS["limit_kills"] += metrics["limit"] is not None
+        SANDBOX_STATS["cpu_s"] += metrics.get("cpu_s") or 0.0
+        SANDBOX_STATS["wall_s"] += metrics["wall_s"]
+        SANDBOX_HISTORY.append(metrics)
+
+
+def run_sandboxed(source: str, timeout_s: float = 20, limits: SandboxLimits = DEFAULT_LIMITS) -> Tuple[int, str, str]:
+    """ (returncode, stdout, stderr) of the source run in a resource-limited child python """
+    config = json.dumps({"rlimits": limits.rlimits(), "nice": limits.nice, "cgroup": limits.cgroup})
+    with tempfile.TemporaryDirectory(prefix="sandbox_") as workdir:
+        path = os.path.join(workdir, "snippet.py")
+        metrics_path = os.path.join(workdir, "metrics.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(source)
+        env = os.environ.copy()
+        env["PYTHONIOENCODING"] = "utf-8"
+        env["PYTHONHASHSEED"] = "0" # fixed set / dict-of-str iteration order, so cached results replay what a rerun prints
+        for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+            env[name] = "1" # thread pools count against RLIMIT_NPROC
+        metrics = {"timeout": False, "runner_error": False, "memory_error": False, "limit": None, "returncode": None}
+        start_time = time.time()
+        try:
+            completed = subprocess.run([sys.executable, "-c", _BOOTSTRAP, config, path, metrics_path], cwd=workdir,
+                                       capture_output=True, text=True, timeout=timeout_s, env=env)
+            result = (completed.returncode, completed.stdout, completed.stderr)
+        except subprocess.TimeoutExpired:
+            metrics["timeout"] = True
+            result = (-1, "", f"Execution Timeout, over {timeout_s} seconds")
+        except BaseException as e:
+            metrics["runner_error"] = True
+            result = (-1, "", f"{e}")
+        metrics["wall_s"] = round(time.time() - start_time, 4)
+        metrics["returncode"] = result[0]
+        metrics["memory_error"] = "MemoryError" in result[2][-200:]
+        # -1 is also the timeout / runner error sentinel, only a child that ran to its end was killed by a signal
+        if result[0] < 0 and not metrics["timeout"] and not metrics["runner_error"]:
+            metrics["limit"] = _LIMIT_SIGNALS.get(-result[0], f"signal {-result[0]}")
+            result = (result[0], result[1], result[2] + f"\nKilled by the sandbox: {metrics['limit']} limit")
+        if os.path.exists(metrics_path):
+            with open(metrics_path) as f:
+                metrics.update(json.load(f))
+    _record(metrics)
+    return result
+
+
+def sandbox_report() -> dict:
+    """ Totals and tail latencies, to tune the limits against turn latency """
+    with _stats_lock:
+        history = list(SANDBOX_HISTORY)
+        report = {k: round(v, 3) for k, v in SANDBOX_STATS.items()}
+    if history:
+        walls = sorted(m["wall_s"] for m in history)
+        rss = [m["max_rss_mb"] for m in history if m.get("max_rss_mb")]
+        report.update({"p50_wall_s": walls[len(walls) // 2], "p95_wall_s": walls[min(len(walls) - 1, int(len(walls) * 0.95))],
+                       "max_rss_mb": round(max(rss), 1) if rss else None})
+    return report
+
+
+if __name__ == "__main__":
+    snippets = [
+        "print(sum(i * i for i in range(1000)))",
+        "blob = bytearray(4 * 1024 ** 3)\nprint(len(blob))",
+        "while True:\n    pass",
+        "print(1 / 0)",
+    ]
+    limits = SandboxLimits(memory_mb=512, cpu_s=2)
+    for snippet in snippets:
+        code, out, err = run_sandboxed(snippet, timeout_s=5, limits=limits)
+        print(code, out.strip()[:60], err.strip().split("\n")[-1][:80], SANDBOX_HISTORY[-1])
+    print(sandbox_report())
@@ -1,5 +1,3 @@
-
-from nltk.corpus import wordnet as wn
 from utils import replace_code
 
 
@@ -0,0 +1,116 @@
+import time
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from game_classifier import GameInfo
+
+
+# how long a stable answer stays true: for the seat's whole game, or only within one phase of it
+ROLE_SCOPE = "role"
+PHASE_SCOPE = "phase"
+
+# candidate action generators by game, fn(observation, info, opponent_store) -> list of actions; solvers register here
+CANDIDATE_GENERATORS: Dict[str, Callable] = {}
+
+
+def speculation_key(scope: Optional[str], question: str, info: GameInfo) -> Optional[Tuple]:
+    if scope is None or info.game is None:
+        return None
+    seat = (info.game, info.role, info.team, info.player_id)
+    return (scope, question) + seat + ((info.phase,) if scope == PHASE_SCOPE else ())
+
+
+class SpeculationStore:
+    """
+    Work that stays valid across our turns: answers to stable questions and solver candidate actions.
+    The agent fills it in a background thread after returning an action, i.e. while the other seats play,
+    and reads it on its next turn instead of asking the model again.
+    """
+
+    def __init__(self, opponent_store=None):
+        """
+        Args:
+            opponent_store: the session's OpponentStore the candidate generators seed their priors from, None for none
+        """
+        self.opponent_store = opponent_store
+        self.answers: Dict[Tuple, Tuple[str, float]] = {}
+        self.candidates: Dict[Tuple, list] = {}
+        self.stats = {"hits": 0, "misses": 0, "saved_s": 0.0, "waited_s": 0.0, "background_s": 0.0}
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def get(self, key: Optional[Tuple]) -> Optional[str]:
+        if key is None:
+            return None
+        with self._lock:
+            stored = self.answers.get(key)
+            if stored is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            self.stats["saved_s"] += stored[1]
+            return stored[0]
+
+    def put(self, key: Optional[Tuple], thinking_answer: str, seconds: float):
+        if key is None:
+            return
+        with self._lock:
+            self.answers[key] = (thinking_answer, seconds)
+
+    def contains(self, key: Optional[Tuple]) -> bool:
+        with self._lock:
+            return key in self.answers
+
+    def peek(self, key: Optional[Tuple]) -> Optional[str]:
+        """ The stored answer without counting a hit or miss, for the speculation itself """
+        with self._lock:
+            stored = self.answers.get(key)
+        return stored[0] if stored is not None else None
+
+    def clear(self):
+        """ Forget the answers and candidates when the agent starts another game, the keys only name the seat """
+        self.wait()
+        with self._lock:
+            self.answers.clear()
+            self.candidates.clear()
+
+    def compute_candidates(self, observation: str, info: GameInfo):
+        generator = CANDIDATE_GENERATORS.get(info.game)
+        if generator is None:
+            return
+        candidates = generator(observation, info, self.opponent_store)
+        with self._lock:
+            self.candidates[(info.game, info.role, info.team, info.player_id)] = candidates
+
+    def get_candidates(self, info: GameInfo) -> list:
+        with self._lock:
+            return self.candidates.pop((info.game, info.role, info.team, info.player_id), [])
+
+    def run_in_background(self, job: Callable):
+        def target():
+            start_time = time.time()
+            try:
+                job()
+            except Exception as e:
+                print(f"speculation failed: {e}")
+            with self._lock:
+                self.stats["background_s"] += time.time() - start_time
+        self._thread = threading.Thread(target=target, daemon=True)
+        self._thread.start()
+
+    def wait(self):
+        """ Called when our turn starts, the speculation shares the model with the turn so it finishes first """
+        if self._thread is None:
+            return
+        start_time = time.time()
+        self._thread.join()
+        self._thread = None
+        with self._lock:
+            self.stats["waited_s"] += time.time() - start_time
+
+    def report(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {**{k: round(v, 3) for k, v in self.stats.items()},
+                    "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+                    "net_saved_s": round(self.stats["saved_s"] - self.stats["waited_s"], 3)}
@@ -1,56 +1,96 @@
 import re
+import time
 import ollama
 import json
+import itertools
+import threading
+from contextlib import nullcontext
 from ollama import chat, generate, ChatResponse, GenerateResponse
 from typing import List, Dict
-from utils import time_monitor, my_logger, timeout
+from utils import time_monitor, my_logger, timeout, approx_tokens
 from agent import Agent
 from datetime import datetime
 from models import *
+from action_patterns import ActionStopper
+from model_router import ModelRouter, RequestGate, STRATEGY, EXTRACTION
+from response_cache import ResponseCache
+from prompt_template import ObservationRewriter
+from codenames_board import compact_observation
+
+
+OBSERVATION_REWRITES = {
+    "Win the majority of fields to win the round!":
+        "Win the majority of fields to win the round (win 2 fields out of 3)!",
+    "Format: '[A4 B2 C2]'":
+        "Format: '[A6 B7 C7]'",
+    "1 free-chat turns":
+        "1 free-chat turns (Format: 'Let us cooperate'. Notice chat will be shared with other players, do not express your inner thought)",
+    "(the clue may not contain any of the words on the board).":
+        ". The clue may not contain any of the words on the board (the Codenames Words list) or you will lose the game instantly!",
+    "The Operative guesses up to N+1 words (e.g., '[breeze]') based on the clue. They can also '[pass]'.":
+        "The Operative guesses up to N+1 words (e.g., '[breeze]') based on the clue. "
+        "But Operative should guess 1 word at one time, and there will be N+1 rounds for Operative to guess. They can also '[pass]' to finish guessing. But do not add 'guess'!! Here is sample: [cat]",
+}
+OBSERVATION_REWRITER = ObservationRewriter(OBSERVATION_REWRITES)
+
+# agents of concurrent games write the same log files: only the first truncation in the process happens,
+# and every entry names its agent
+_truncated_logs = set()
+_log_lock = threading.Lock()
+_agent_ids = itertools.count()
 
 
 class StarsAgent(Agent):
     memory: list
 
-    def __init__(self, model_name: str="qwen3:8b", think_tags: str = r'<think>.*?</think>', system_prompt: str=None, model_option: dict=None):
-        available_models = [model.model for model in ollama.list().models]
-        if not model_name in available_models:
-            raise Exception(f"model name {model_name} not available, {available_models}")
+    def __init__(self, model_name: str="qwen3:8b", think_tags: str = r'<think>.*?</think>', system_prompt: str=None, model_option: dict=None,
+                 tier_models: dict=None, cache_path: str=None, cache_max_entries: int=20000,
+                 request_gate: RequestGate=None):
+        self.router = ModelRouter({STRATEGY: model_name, **(tier_models or {})})
+        # checking and loading models takes seconds, so it runs in the background until the first generation needs them
+        self._models_error = None
+        self._models_ready = threading.Thread(target=self._check_models, daemon=True)
+        self._models_ready.start()
         self.model_name = model_name
         self.think_tags = think_tags
         self.system_prompt = system_prompt
         self.model_option = model_option if not model_option else {"temperature": 0.2, "num_predict": 2048}
         self.memory = []
+        self.usage = {"llm_calls": 0, "prompt_tokens": 0, "eval_tokens": 0}
+        self.response_cache = ResponseCache(cache_path, cache_max_entries) if cache_path else None
+        # shared with the other agents of a session that talk to the same ollama backend
+        self.request_gate = request_gate
+        self.agent_id = next(_agent_ids)
+
+    def _check_models(self):
+        try:
+            available_models = [model.model for model in ollama.list().models]
+            for tier_model in self.router.models:
+                if not tier_model in available_models:
+                    raise Exception(f"model name {tier_model} not available, {available_models}")
+            if len(self.router.models) > 1:
+                self.router.warm_up()
+        except Exception as e:
+            self._models_error = e
+
+    def wait_for_models(self):
+        self._models_ready.join()
+        if self._models_error is not None:
+            raise self._models_error
 
     def _log_to_txt(self, content: str, file_name: str="agent.txt", mode: str='a'):
-        with open(f"logs/{file_name}.txt", mode, encoding="utf-8") as f:
-            f.writelines([
-                "\n ========== %s  ==========" % datetime.now().strftime("%Y-%m-%d %H:%M:%S"), content
-            ])
+        path = f"logs/{file_name}.txt"
+        with _log_lock:
+            if path in _truncated_logs:
+                mode = 'a' # another agent of this process, e.g. a concurrent game, already writes it
+            _truncated_logs.add(path)
+            with open(path, mode, encoding="utf-8") as f:
+                f.writelines([
+                    "\n ========== %s agent %d ==========" % (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), self.agent_id), content
+                ])
 
     def _observation_wrapper(self, observation: str) -> str:
-        observation_ = observation.replace(
-            "Win the majority of fields to win the round!",
-            "Win the majority of fields to win the round (win 2 fields out of 3)!"
-        )
-        observation_ = observation_.replace(
-            "Format: '[A4 B2 C2]'",
-            "Format: '[A6 B7 C7]'"
-        )
-        observation_ = observation_.replace(
-            "1 free-chat turns",
-            "1 free-chat turns (Format: 'Let us cooperate'. Notice chat will be shared with other players, do not express your inner thought)"
-        )
-        observation_ = observation_.replace(
-            "(the clue may not contain any of the words on the board).",
-            ". The clue may not contain any of the words on the board (the Codenames Words list) or you will lose the game instantly!"
-        )
-        observation_ = observation_.replace(
-            "The Operative guesses up to N+1 words (e.g., '[breeze]') based on the clue. They can also '[pass]'.",
-            "The Operative guesses up to N+1 words (e.g., '[breeze]') based on the clue. "
-            "But Operative should guess 1 word at one time, and there will be N+1 rounds for Operative to guess. They can also '[pass]' to finish guessing. But do not add 'guess'!! Here is sample: [cat]"
-        )
-        return observation_
+        return OBSERVATION_REWRITER.rewrite(compact_observation(observation))
 
 
     def _split_think_tags(self, origin_text: str):
@@ -62,43 +102,117 @@ class StarsAgent(Agent):
         else:
             return "", origin_text.strip()
 
-    def generate_with_format(self, prompt: str, output_format: dict, system: str=None, options: dict=None, print_log: bool = False):
-        thinking, content = self.generate(prompt=prompt, system=system, print_log=print_log)
+    def generate_with_format(self, prompt: str, output_format: dict, system: str=None, options: dict=None, print_log: bool = False, cache: bool = False):
+        thinking, content = self.generate(prompt=prompt, system=system, print_log=print_log, cache=cache)
         _, content = self.generate(
-            prompt=f"""This content contains a Json output: {content}. Extract the Json part and output in following format: {output_format}""", output_format=output_format, print_log=print_log)
+            prompt=f"""This content contains a Json output: {content}. Extract the Json part and output in following format: {output_format}""", output_format=output_format, print_log=print_log,
+            tier=EXTRACTION, cache=cache)
         return content
 
-    def generate_with_format2(self, prompt: str, format_name: str, system: str=None, options: dict=None, print_log: bool = False ):
+    def generate_with_format2(self, prompt: str, format_name: str, system: str=None, options: dict=None, print_log: bool = False, tier: str=None,
+                              cache: bool = False):
         cl = globals().get(format_name)
-        thinking, content = self.generate(prompt=prompt, system=system, print_log=print_log)
+        thinking, content = self.generate(prompt=prompt, system=system, print_log=print_log, tier=tier, cache=cache)
         _, content = self.generate(
-            prompt=f"""From this content: {content}. According to this following format: {cl.model_json_schema()}, extract content and output in json""", output_format=cl.model_json_schema(), print_log=print_log)
+            prompt=f"""From this content: {content}. According to this following format: {cl.model_json_schema()}, extract content and output in json""", output_format=cl.model_json_schema(), print_log=print_log,
+            tier=EXTRACTION, cache=cache)
         if print_log:
             print(f"\033[31m{prompt}\033[0m")
             print(f"\033[33m{thinking}\033[0m")
             print(f"\033[34m{content}\033[0m")
         return cl(**json.loads(content))
 
-    def generate_rtn_content_only(self, prompt: str, system: str=None, options: dict=None, output_format=None, print_log=False):
-        _, content = self.generate(prompt, system, options, output_format, print_log=print_log)
+    def generate_with_schema(self, prompt: str, schema: dict, system: str=None, options: dict=None, print_log: bool = False, tier: str=None,
+                             cache: bool = False) -> dict:
+        """ One structured-output call, ollama compiles the schema into a grammar so the reply always matches it """
+        _, content = self.generate(prompt=prompt, system=system, options=options, output_format=schema, print_log=print_log, tier=tier, cache=cache)
+        return json.loads(content)
+
+    def generate_rtn_content_only(self, prompt: str, system: str=None, options: dict=None, output_format=None, print_log=False,
+                                  action_stopper: ActionStopper = None, tier: str=None, cache: bool = False):
+        _, content = self.generate(prompt, system, options, output_format, print_log=print_log, action_stopper=action_stopper, tier=tier,
+                                   cache=cache)
         return content
 
 
+    def _generate_until_action(self, model: str, prompt: str, system: str, options: dict, output_format, action_stopper: ActionStopper):
+        text, chunks, counted = "", 0, False
+        self.usage["llm_calls"] += 1
+        stream = generate(model=model, prompt=prompt, system=system, options=options, format=output_format, stream=True,
+                          keep_alive=self.router.keep_alive)
+        try:
+            for chunk in stream:
+                text += chunk.response
+                chunks += 1
+                if chunk.done:  # only the final chunk carries the server's counts
+                    self.usage["prompt_tokens"] += chunk.prompt_eval_count or 0
+                    self.usage["eval_tokens"] += chunk.eval_count or chunks
+                    counted = True
+                if "]" in chunk.response:
+                    cut = action_stopper.cut(text)
+                    if cut is not None:
+                        return cut
+        finally:
+            stream.close()  # closing the stream drops the connection, so ollama stops generating
+            if not counted:  # aborted before the final chunk: one token per streamed chunk, the prompt estimated
+                self.usage["prompt_tokens"] += approx_tokens(f"{system or ''}\n{prompt}")
+                self.usage["eval_tokens"] += chunks
+        return text
+
     @my_logger("generate.txt")
-    def generate(self, prompt: str, system: str=None, options: dict=None, output_format=None, print_log: bool = False):
+    def generate(self, prompt: str, system: str=None, options: dict=None, output_format=None, print_log: bool = False,
+                 action_stopper: ActionStopper = None, tier: str=None, cache: bool = False):
         if not options: options = self.model_option
-
-        response = generate(model=self.model_name, prompt=prompt, system=system, options=options, format=output_format)
-        thinking, content = self._split_think_tags(response.response)
+        self.wait_for_models()
+
+        model = self.router.model_for(tier)
+        use_cache = cache and self.response_cache is not None and action_stopper is None
+        cache_key = ResponseCache.make_key(model, prompt, system, options, output_format) if use_cache else None
+        response_text = self.response_cache.get(cache_key) if use_cache else None
+        if response_text is None:
+            with self.request_gate or nullcontext():
+                start_time = time.time()
+                if action_stopper is None:
+                    response = generate(model=model, prompt=prompt, system=system, options=options, format=output_format,
+                                        keep_alive=self.router.keep_alive)
+                    response_text = response.response
+                    self._count_usage(response)
+                else:
+                    response_text = self._generate_until_action(model, prompt, system, options, output_format, action_stopper)
+                self.router.record(tier, time.time() - start_time)
+            if use_cache:
+                self.response_cache.put(cache_key, response_text)
+        thinking, content = self._split_think_tags(response_text)
         if print_log:
             print(f"\033[31m{prompt}\033[0m")
             print(f"\033[33m{thinking}\033[0m")
             print(f"\033[34m{content}\033[0m")
         return thinking, content
 
-    def chat(self, messages: List[Dict[str, str]]):
-        chat_response: ChatResponse = chat(model=self.model_name, messages=messages)
-        content = chat_response['message']['content']
+    def _count_usage(self, response):
+        self.usage["llm_calls"] += 1
+        self.usage["prompt_tokens"] += response.prompt_eval_count or 0
+        self.usage["eval_tokens"] += response.eval_count or 0
+
+    def tier_report(self) -> Dict[str, dict]:
+        return self.router.report()
+
+    def cache_stats(self) -> dict:
+        return self.response_cache.stats() if self.response_cache else {}
+
+    def chat(self, messages: List[Dict[str, str]], tier: str=None, cache: bool = False):
+        self.wait_for_models()
+        model = self.router.model_for(tier)
+        use_cache = cache and self.response_cache is not None
+        cache_key = ResponseCache.make_chat_key(model, messages) if use_cache else None
+        content = self.response_cache.get(cache_key) if use_cache else None
+        if content is None:
+            with self.request_gate or nullcontext():
+                chat_response: ChatResponse = chat(model=model, messages=messages, keep_alive=self.router.keep_alive)
+            self._count_usage(chat_response)
+            content = chat_response['message']['content']
+            if use_cache:
+                self.response_cache.put(cache_key, content)
         thinking, content = self._split_think_tags(content)
         return thinking, content
 
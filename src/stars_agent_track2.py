@@ -2,8 +2,6 @@ import json
 import time
 from pydantic import BaseModel
 from typing import List, Dict, Literal
-from crewai import Agent, LLM, Crew, Task, Process
-from langchain_ollama import OllamaLLM
 
 from stars_agent import StarsAgent
 from utils import timeout, time_monitor
@@ -16,13 +14,26 @@ class StarsAgentTrack2(StarsAgent):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-
-    # @timeout(seconds=150)
-    def call_with_multi_agents(self, observation: str) -> str:
-        ollama_llm = LLM(
-            model=f"ollama/{self.model_name}",
-            base_url="http://localhost:11434"
-        )
+        # crewai objects are built on first use and reused for every move, only the task inputs change
+        self._llm = None
+        self._crew = None
+        self._single_player = None
+        self.timings = {"construction_s": [], "kickoff_s": []}
+
+    def _get_llm(self):
+        from crewai import LLM  # crewai takes seconds to import, only this agent needs it
+
+        if self._llm is None:
+            self._llm = LLM(
+                model=f"ollama/{self.model_name}",
+                base_url="http://localhost:11434"
+            )
+        return self._llm
+
+    def _build_crew(self):
+        from crewai import Agent, Crew, Task, Process
+
+        ollama_llm = self._get_llm()
         current_player = Agent(
             role="Main Game Player",
             goal="Generate action according to game instructions and current game observation",
@@ -61,40 +72,60 @@ class StarsAgentTrack2(StarsAgent):
             verbose=True
         )
 
+        # {observation} is filled in by crew.kickoff(inputs=...), so the same task serves every move
         game_task = Task(
-            description=f"""This is current game observation (also may contains history) \n{observation}\n. Make an action / message that meets game requirements!! and has a high possibility to win!
+            description="""This is current game observation (also may contains history) \n{observation}\n. Make an action / message that meets game requirements!! and has a high possibility to win!
 """,
             expected_output="""An action / message that meets game requirements!! and has a high possibility to win!
                     """
         )
 
-        crew = Crew(
+        return Crew(
             agents=[current_player, teammate_player, opponent_player],
             tasks=[game_task],
             manager_agent=game_manager,
             process=Process.hierarchical,
             verbose=True
         )
-        generation = crew.kickoff()
+
+    # @timeout(seconds=150)
+    def call_with_multi_agents(self, observation: str) -> str:
+        if self._crew is None:
+            start_time = time.time()
+            self._crew = self._build_crew()
+            self.timings["construction_s"].append(time.time() - start_time)
+        start_time = time.time()
+        generation = self._crew.kickoff(inputs={"observation": observation})
+        self.timings["kickoff_s"].append(time.time() - start_time)
         return  generation.raw
 
     def call_with_single_agent(self, observation: str) -> str:
-        ollama_llm = LLM(
-            model=f"ollama/{self.model_name}",
-            base_url="http://localhost:11434"
-        )
-        default_player = Agent(
-            role="Game Player",
-            goal="Generate action according to game instructions and current game observation",
-            backstory="Experienced game player, you understand game role well and can generate a reasonable answer",
-            llm=ollama_llm,
-            allow_delegation=False,
-            verbose=True
-        )
-
-        generation = default_player.kickoff(messages=observation)
+        from crewai import Agent
+
+        if self._single_player is None:
+            start_time = time.time()
+            self._single_player = Agent(
+                role="Game Player",
+                goal="Generate action according to game instructions and current game observation",
+                backstory="Experienced game player, you understand game role well and can generate a reasonable answer",
+                llm=self._get_llm(),
+                allow_delegation=False,
+                verbose=True
+            )
+            self.timings["construction_s"].append(time.time() - start_time)
+
+        generation = self._single_player.kickoff(messages=observation)
         return generation.raw
 
+    def timing_report(self) -> Dict[str, float]:
+        """ One-off construction cost against the per-move kickoff time it no longer adds to """
+        kickoffs = self.timings["kickoff_s"]
+        return {
+            "construction_s": round(sum(self.timings["construction_s"]), 3),
+            "moves": len(kickoffs),
+            "kickoff_mean_s": round(sum(kickoffs) / len(kickoffs), 3) if kickoffs else 0.0,
+        }
+
     @time_monitor(log_file="stars_agent_track2.txt")
     def __call__(self, observation: str) -> str:
         try:
@@ -129,4 +160,5 @@ The player(s) with the highest score at the end of all rounds wins.
 [GAME] ─── Starting Round 1 ───	You can converse freely for the next 1 rounds.
 Please enter the action: 
 """)
-    print(answer)
\ No newline at end of file
+    print(answer)
+    print(agent.timing_report())
\ No newline at end of file
@@ -2,6 +2,8 @@ import json
 from pydantic import BaseModel
 from typing import List, Dict, Literal
 from stars_agent import StarsAgent
+from game_classifier import classify
+from model_router import CLASSIFICATION
 
 STANDARD_GAME_PROMPT = "You are a competitive game player. Make sure you read the game instructions carefully, and always follow the required format."
 
@@ -33,13 +35,19 @@ class StarsAgentTrack2BaseLine(StarsAgent):
             kwargs["system_prompt"] = STANDARD_GAME_PROMPT
         super().__init__(*args, **kwargs)
 
-    def __call__(self, observation: str) -> str:
+    def _identify_player(self, observation: str) -> Player:
+        player_type = classify(observation).player_type
+        if player_type is not None:
+            return Player(player_type=player_type)
         identify_prompt = (f"{observation}\n Upper content is game observation. You should identify which game and which role are you playing."
                            f"If it says about ColonelBlotto, you are player for colonel_blotto. If it says 3-player Iterated Prisoner's Dilemma, you are player for three_player_IPD."
                            f"If it says Codenames, you should notice if you are Spymaster or Operative.")
         thinking, content = self.generate(prompt=identify_prompt, system=self.system_prompt,
-                                          output_format=Player.model_json_schema())
-        player = Player(**json.loads(content))
+                                          output_format=Player.model_json_schema(), tier=CLASSIFICATION)
+        return Player(**json.loads(content))
+
+    def __call__(self, observation: str) -> str:
+        player = self._identify_player(observation)
         if player.player_type == "colonel_blotto":
             thinking, content = self.generate(prompt=observation, system=self.system_prompt,
                                               output_format=ColonelBlottoAction.model_json_schema())
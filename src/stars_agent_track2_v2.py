@@ -2,8 +2,6 @@ import json
 import time
 from pydantic import BaseModel
 from typing import List, Dict, Literal
-from crewai import Agent, LLM, Crew, Task, Process
-from langchain_ollama import OllamaLLM
 
 from stars_agent import StarsAgent
 from utils import timeout, time_monitor
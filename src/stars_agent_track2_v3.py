@@ -2,11 +2,14 @@ import json
 import time
 from pydantic import BaseModel
 from typing import List, Dict, Literal
-from crewai import Agent, LLM, Crew, Task, Process
-from langchain_ollama import OllamaLLM
 
 from stars_agent import StarsAgent
 from utils import timeout, time_monitor
+from game_classifier import classify
+
+
+# classify() games -> GameObservation.game_name
+GAME_NAMES = {"ColonelBlotto": "ColonelBlotto", "ThreePlayerIPD": "3-player Iterated Prisoner's Dilemma", "Codenames": "Codenames"}
 
 
 class GameObservation(BaseModel):
@@ -77,6 +80,8 @@ You are a competitive game player. Make sure you read the game instructions care
         )
         print(json.dumps(json.loads(content), indent=2))
         game_observation = GameObservation(**json.loads(content))
+        # the env header names the game, the model's answer only counts for observations classify() does not know
+        game_observation.game_name = GAME_NAMES.get(classify(observation).game, game_observation.game_name)
 
         content = self.generate_with_format(
             prompt=f"""
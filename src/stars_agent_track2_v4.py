@@ -2,11 +2,10 @@ import json
 import time
 from pydantic import BaseModel
 from typing import List, Dict, Literal
-from crewai import Agent, LLM, Crew, Task, Process
-from langchain_ollama import OllamaLLM
 
 from stars_agent import StarsAgent
 from utils import timeout, time_monitor
+from game_classifier import classify
 
 
 ACTION_FORMAT = {
@@ -51,6 +50,9 @@ ACTION_FORMAT = {
     }
 }
 
+# classify() games -> the game_name literals below and the ACTION_FORMAT keys
+GAME_NAMES = {"ColonelBlotto": "ColonelBlotto", "ThreePlayerIPD": "Iterated Prisoner's Dilemma", "Codenames": "Codenames"}
+
 class ActionSample(BaseModel):
     game_name: Literal["ColonelBlotto", "Iterated Prisoner's Dilemma", "Codenames"]
     current_round: str
@@ -149,7 +151,7 @@ After you have answered these questions, re-organize them into following JSON st
                 print_log=False
             )
             # print(json.dumps(json.loads(content), indent=2))
-            return ActionSample(**json.loads(content))
+            return ActionSample(**{**json.loads(content), "game_name": round_action.game_name})
 
     def _get_action_info(self, observation: str) -> RoundAction:
         content = self.generate_rtn_content_only(
@@ -181,7 +183,10 @@ and history rounds (if the game has begun). """,
             output_format=RoundAction.model_json_schema(),
             print_log=False
         )
-        return RoundAction(**json.loads(content))
+        round_action = RoundAction(**json.loads(content))
+        # the env header names the game, the model's answer only counts for observations classify() does not know
+        round_action.game_name = GAME_NAMES.get(classify(observation).game, round_action.game_name)
+        return round_action
 
     def _analysis_game(self, observation: str) -> AnalysisGame:
         content = self.generate_rtn_content_only(
@@ -211,7 +216,9 @@ After you have answered these questions, re-organize them into following JSON st
             print_log=False
         )
         # print(json.dumps(json.loads(content), indent=2))
-        return AnalysisGame(**json.loads(content))
+        analysis_game = AnalysisGame(**json.loads(content))
+        analysis_game.game_name = GAME_NAMES.get(classify(observation).game, analysis_game.game_name)
+        return analysis_game
 
     def _analysis_round(self, observation: str, action_sample: ActionSample, game_analysis: AnalysisGame) -> AnalysisRound:
             content = self.generate_rtn_content_only(
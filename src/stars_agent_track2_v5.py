@@ -3,11 +3,11 @@ import time
 import numpy as np
 from pydantic import BaseModel
 from typing import List, Dict, Literal
-from crewai import Agent, LLM, Crew, Task, Process
 import statistics
 from stars_agent import StarsAgent
 from utils import timeout, my_logger, time_monitor, extract_python_blocks, run_python_blocks
 from models import *
+from game_classifier import classify
 
 
 
@@ -62,8 +62,15 @@ now start:
                      answer_key_in_format="current_action_type")
         ]
         action_type = "structured command"
+        game_info = classify(observation)
         for question in question_list:
             chat_prompt += self._question_prompt.replace("QUESTION_PLACEHOLDER", str(question.question))
+            if question.format_name == "ReActWithRound" and game_info.game is not None:
+                # the env headers already tell the round type, no need to ask the model
+                action_type = game_info.action_type
+                chat_prompt += self._react_prompt.replace("THINKING_PLACEHOLDER", game_info.describe()).replace(
+                    "ANSWER_PLACEHOLDER", action_type).strip()
+                continue
             chat_prompt, blocks, react = self.answer_question(question, chat_prompt)
             if question.format_name == "ReActWithRound":
                 action_type = react.answer.current_action_type
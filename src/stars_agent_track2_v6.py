@@ -4,6 +4,7 @@ from copy import deepcopy
 from stars_agent import StarsAgent
 from utils import timeout, time_monitor, extract_python_blocks, run_python_blocks
 from models import *
+from game_classifier import classify
 
 
 
@@ -72,8 +73,14 @@ it does not meet the format, so please rewrite it into two parts, (1) Thinking (
                      answer_key_in_format="current_action_type")
         ]
 
+        game_info = classify(observation)
         for question in question_list:
             chat_prompt += self._question_prompt.replace("QUESTION_PLACEHOLDER", str(question.question))
+            if question.format_name == "ReActWithRound" and game_info.game is not None:
+                # the env headers already tell the round type, no need to ask the model
+                chat_prompt += self._react_prompt.replace("THINKING_PLACEHOLDER", game_info.describe()).replace(
+                    "ANSWER_PLACEHOLDER", game_info.action_type).strip()
+                continue
             chat_prompt, blocks = self.answer_question(question, chat_prompt)
 
         return chat_prompt, chat_prompt.split("[Answer]")[-1].strip()
@@ -1,18 +1,22 @@
 import json
 import time
-from copy import deepcopy
 import random
 from warnings import deprecated
 
 from stars_agent import StarsAgent
 from utils import timeout, time_monitor, extract_python_blocks, run_python_blocks, replace_code
 from models import *
+from prompt_template import PromptTemplate
+from game_classifier import classify
 from typing import List
 
 
 
 class StarsAgentTrack2V8(StarsAgent):
     _temperature: float = 0.1
+    # repairs of failing code stop after this many prompt + eval tokens per question
+    _repair_token_budget: int = 16000
+    _max_error_lines: int = 20
     _validation_prompt = """
 Your team are competitive game players, You are playing a game based on text, and the text contains all game observation with rules, instructions, current round
 and history rounds (if the game has begun). This text is called "observation".
@@ -80,6 +84,12 @@ REWRITE_PROMPT
 }}    
 """
 
+    # parsed once, each render is a single join
+    _validation_template = PromptTemplate(_validation_prompt, ["ACTION_PLACEHOLDER", "VALIDATION_PLACEHOLDER"])
+    _base_template = PromptTemplate(_base_prompt, ["OBSERVATION_PLACEHOLDER"])
+    _react_template = PromptTemplate(_react_prompt, ["THINKING_PLACEHOLDER", "ANSWER_PLACEHOLDER"])
+    _rewrite_template = PromptTemplate(_rewrite_prompt, ["REWRITE_PROMPT"])
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._log_to_txt("Hello", mode="w", file_name="StarsAgentTrack2V7")
@@ -115,8 +125,8 @@ REWRITE_PROMPT
         return f"{prompt}\n[Question] {q.question}"
 
     def _rewrite_thinking_answer(self, thinking_answer, options: dict):
-        obj = self._generate_with_format(deepcopy(self._rewrite_prompt).replace("REWRITE_PROMPT", thinking_answer), Question(question="", format_name="ReAct"), options)
-        return deepcopy(self._react_prompt).replace("THINKING_PLACEHOLDER", obj.thinking).replace("ANSWER_PLACEHOLDER", obj.answer)
+        obj = self._generate_with_format(self._rewrite_template.render(REWRITE_PROMPT=thinking_answer), Question(question="", format_name="ReAct"), options)
+        return self._react_template.render(THINKING_PLACEHOLDER=obj.thinking, ANSWER_PLACEHOLDER=obj.answer)
 
     def _answer_question_without_format(self, prompt: str, options: dict):
         content = self.generate_rtn_content_only(
@@ -133,39 +143,54 @@ REWRITE_PROMPT
         return content
 
 
-    def _answer_question(self, chat_prompt: str, question: Question, code_exe_times=0, llm_options=None):
-        if llm_options is None:
-            llm_options = {}
-        prompt = self._add_question_to_prompt(chat_prompt, question)
+    def _answer_once(self, prompt: str, question: Question, llm_options: dict) -> str:
         if not question.format_name:
             thinking_answer = self._answer_question_without_format(prompt, llm_options)
         else:
             obj = self._generate_with_format(prompt, question, llm_options)
             answer = obj.answer if isinstance(obj.answer, str) else getattr(obj.answer, question.answer_key_in_format)
-            thinking_answer = deepcopy(self._react_prompt).replace("THINKING_PLACEHOLDER", obj.thinking).replace("ANSWER_PLACEHOLDER", answer)
-
-        code_blocks = self._fetch_code_blocks(thinking_answer)
-        observation = None
-        if code_blocks:
+            thinking_answer = self._react_template.render(THINKING_PLACEHOLDER=obj.thinking, ANSWER_PLACEHOLDER=answer)
+        return thinking_answer
+
+    def _run_and_repair(self, prompt: str, thinking_answer: str, code_exe_times: int, llm_options: dict):
+        """
+        Runs the code in an answer and asks for a fix while it fails. Each repair prompt only carries the latest
+        failing answer and the tail of its error, and repairs stop once they spent _repair_token_budget tokens.
+        """
+        repair_tokens = 0
+        while True:
+            code_blocks = self._fetch_code_blocks(thinking_answer)
+            if not code_blocks:
+                return thinking_answer, None
             code, out, err = self._run_code_blocks(code_blocks, code_exe_times)
             if code == 0:
                 self._log_to_txt(f"\n************ Origin Code Start ************\n{code_blocks}\n************ Origin Code End ************\n", "StarsAgentTrack2V7")
-                thinking_answer = replace_code(thinking_answer)
-                observation = out
-            else:
-                prompt__, thinking_answer__, observation__ = self._answer_question(
-                    prompt + thinking_answer, Question(question=f"This is the execution result of your code, it meets error: \n'{err}'\n Now think it twice, and update your code"),
-                    code_exe_times+1, llm_options
-                )
-                thinking_answer = thinking_answer__
-                observation = observation__
+                return replace_code(thinking_answer), out
+            if repair_tokens >= self._repair_token_budget:
+                self._log_to_txt(f"\n[Repair] budget used up, {repair_tokens} tokens\n", "StarsAgentTrack2V7")
+                return replace_code(thinking_answer), "Code execution failed too many times. NO Python Code result, please continue"
+            error = "\n".join(str(err).strip().split("\n")[-self._max_error_lines:])
+            repair_question = Question(question=f"This is the execution result of your code, it meets error: \n'{error}'\n Now think it twice, and update your code")
+            tokens_before = self.usage["prompt_tokens"] + self.usage["eval_tokens"]
+            thinking_answer = self._answer_once(self._add_question_to_prompt(prompt + thinking_answer, repair_question), repair_question, llm_options)
+            repair_cost = self.usage["prompt_tokens"] + self.usage["eval_tokens"] - tokens_before
+            repair_tokens += repair_cost
+            code_exe_times += 1
+            self._log_to_txt(f"\n[Repair {code_exe_times}] {repair_cost} tokens, {repair_tokens}/{self._repair_token_budget} for this question\n", "StarsAgentTrack2V7")
+
+    def _answer_question(self, chat_prompt: str, question: Question, code_exe_times=0, llm_options=None):
+        if llm_options is None:
+            llm_options = {}
+        prompt = self._add_question_to_prompt(chat_prompt, question)
+        thinking_answer, observation = self._run_and_repair(prompt, self._answer_once(prompt, question, llm_options), code_exe_times, llm_options)
         thinking_answer_split = thinking_answer.split("[Answer]")
         return prompt, f"{thinking_answer_split[0].strip()}\n[Answer] {thinking_answer_split[1].strip()}", observation
 
     def get_base_chat_prompt(self, observation: str, llm_options=None):
         if llm_options is None:
             llm_options = {}
-        base_prompt = deepcopy(self._base_prompt).replace("OBSERVATION_PLACEHOLDER", observation)
+        base_prompt = self._base_template.render(OBSERVATION_PLACEHOLDER=observation)
+        game_info = classify(observation)
         question_list = [
             Question(
                 question="What game are you playing? What's the rule and winning condition in this game?"),
@@ -181,6 +206,10 @@ REWRITE_PROMPT
                 format_name="ReActWithRound", answer_key_in_format="current_action_type"),
         ]
         for q in question_list:
+            if q.format_name == "ReActWithRound" and game_info.game is not None:
+                # the env headers already tell the round type, no need to ask the model
+                base_prompt = f"{self._add_question_to_prompt(base_prompt, q)}\n[Thinking] {game_info.describe()}\n[Answer] {game_info.action_type}"
+                continue
             prompt_with_q, thinking_answer, observation_ = self._answer_question(base_prompt, q, 0, llm_options)
             if observation_ is None:
                 base_prompt = f"{prompt_with_q}\n{thinking_answer}"
@@ -193,7 +222,7 @@ REWRITE_PROMPT
             additional_questions = []
         if llm_options is None:
             llm_options = {}
-        base_prompt = deepcopy(chat_prompt)
+        base_prompt = chat_prompt
         round_phase = chat_prompt.split("[Answer]")[-1].strip()
         if round_phase == "free-chat":
             question_list = additional_questions + [
@@ -234,7 +263,7 @@ REWRITE_PROMPT
             additional_questions = []
         if llm_options is None:
             llm_options = {}
-        base_prompt = deepcopy(chat_prompt)
+        base_prompt = chat_prompt
         question_list = additional_questions + [
             Question(
                 question="Analysis step by step, and you can try the eas"),
@@ -253,7 +282,7 @@ REWRITE_PROMPT
     def valid_action(self, chat_prompt: str, action: str, llm_options=None):
         if llm_options is None:
             llm_options = {}
-        base_prompt = deepcopy(chat_prompt)
+        base_prompt = chat_prompt
         round_phase = chat_prompt.split("[Answer]")[-1].strip()
         if round_phase == "free-chat":
             question_list = [
@@ -280,10 +309,7 @@ REWRITE_PROMPT
         return  base_prompt.split("[Answer]")[-1].strip()
 
     def get_validation_obj(self, observation: str, action: str, validation: str):
-        validation_prompt = (deepcopy(self._validation_prompt)
-                             .replace("OBSERVATION_PLACEHOLDER", observation)
-                             .replace("ACTION_PLACEHOLDER", action)
-                             .replace("VALIDATION_PLACEHOLDER", validation))
+        validation_prompt = self._validation_template.render(ACTION_PLACEHOLDER=action, VALIDATION_PLACEHOLDER=validation)
         content = self.generate_rtn_content_only(
             prompt=validation_prompt, system="/nothink",
             options={
@@ -1,18 +1,31 @@
 import json
 import time
-from copy import deepcopy
 import random
 from warnings import deprecated
 
 from stars_agent import StarsAgent
 from utils import timeout, time_monitor, extract_python_blocks, run_python_blocks, replace_code
 from models import *
+from prompt_template import PromptTemplate
+from game_classifier import GameInfo, classify
+from speculation import SpeculationStore, speculation_key, ROLE_SCOPE, PHASE_SCOPE
+import blotto_solver  # registers CANDIDATE_GENERATORS["ColonelBlotto"]
+import opponent_store  # registers CANDIDATE_GENERATORS["ThreePlayerIPD"]
+from action_patterns import ActionStopper
+from action_grammar import react_action_schema
+from action_validators import validate_action
+from model_router import EXTRACTION
 from typing import List
 
 
 
 class StarsAgentTrack2V9(StarsAgent):
     _temperature: float = 0.1
+    # repairs of failing code stop after this many prompt + eval tokens per question
+    _repair_token_budget: int = 16000
+    _max_error_lines: int = 20
+    _action_stopper: ActionStopper = None
+    _action_schema: dict = None
     _validation_prompt = """
 Your team are competitive game players, You are playing a game based on text, and the text contains all game observation with rules, instructions, current round
 and history rounds (if the game has begun). This text is called "observation".
@@ -80,8 +93,15 @@ REWRITE_PROMPT
 }}    
 """
 
-    def __init__(self, *args, **kwargs):
+    # parsed once, each render is a single join
+    _validation_template = PromptTemplate(_validation_prompt, ["ACTION_PLACEHOLDER", "VALIDATION_PLACEHOLDER"])
+    _base_template = PromptTemplate(_base_prompt, ["OBSERVATION_PLACEHOLDER"])
+    _react_template = PromptTemplate(_react_prompt, ["THINKING_PLACEHOLDER", "ANSWER_PLACEHOLDER"])
+    _rewrite_template = PromptTemplate(_rewrite_prompt, ["REWRITE_PROMPT"])
+
+    def __init__(self, *args, opponent_store=None, **kwargs):
         super().__init__(*args, **kwargs)
+        self.speculation = SpeculationStore(opponent_store)
         self._log_to_txt("Hello", mode="w", file_name="StarsAgentTrack2V9")
         self._log_to_txt("Hello", mode="w", file_name="generate")
 
@@ -98,7 +118,7 @@ REWRITE_PROMPT
             return 1, "Too many log lines, please update your logging logic or processing logic", "Too many log lines, please update your logging logic or processing logic"
         return code, out, err
 
-    def _generate_with_format(self, prompt: str, q: Question, options: dict):
+    def _generate_with_format(self, prompt: str, q: Question, options: dict, tier: str = None, cache: bool = False):
         react = self.generate_with_format2(
             prompt=prompt, system="/nothink",
             options={
@@ -107,18 +127,21 @@ REWRITE_PROMPT
                 "stop": ["[Question]", "Please enter the action"],
                 "repeat_penalty": 2
             } if len(options)==0 else options,
-            format_name=q.format_name
+            format_name=q.format_name,
+            tier=tier,
+            cache=cache
         )
         return react
 
     def _add_question_to_prompt(self, prompt: str, q: Question):
         return f"{prompt}\n[Question] {q.question}"
 
-    def _rewrite_thinking_answer(self, thinking_answer, options: dict):
-        obj = self._generate_with_format(deepcopy(self._rewrite_prompt).replace("REWRITE_PROMPT", thinking_answer), Question(question="", format_name="ReAct"), options)
-        return deepcopy(self._react_prompt).replace("THINKING_PLACEHOLDER", obj.thinking).replace("ANSWER_PLACEHOLDER", obj.answer)
+    def _rewrite_thinking_answer(self, thinking_answer, options: dict, cache: bool = False):
+        obj = self._generate_with_format(self._rewrite_template.render(REWRITE_PROMPT=thinking_answer), Question(question="", format_name="ReAct"), options,
+                                         tier=EXTRACTION, cache=cache)
+        return self._react_template.render(THINKING_PLACEHOLDER=obj.thinking, ANSWER_PLACEHOLDER=obj.answer)
 
-    def _answer_question_without_format(self, prompt: str, options: dict):
+    def _answer_question_without_format(self, prompt: str, options: dict, action_stopper: ActionStopper = None, cache: bool = False):
         content = self.generate_rtn_content_only(
             prompt=prompt, system="/nothink",
             options={
@@ -126,74 +149,151 @@ REWRITE_PROMPT
                 "num_predict": 4096,
                 "stop": ["[Question]", "Please enter the action"],
                 "repeat_penalty": 2
-            } if len(options)==0 else options
+            } if len(options)==0 else options,
+            action_stopper=action_stopper,
+            cache=cache
         )
         if not "[Thinking]" in content or not "[Answer]" in content:
-            return self._rewrite_thinking_answer(content, options)
+            return self._rewrite_thinking_answer(content, options, cache)
         return content
 
 
-    def _answer_question(self, chat_prompt: str, question: Question, code_exe_times=0, llm_options=None):
-        if llm_options is None:
-            llm_options = {}
-        prompt = self._add_question_to_prompt(chat_prompt, question)
-        if not question.format_name:
-            thinking_answer = self._answer_question_without_format(prompt, llm_options)
+    def _answer_once(self, prompt: str, question: Question, llm_options: dict) -> str:
+        if question.output_format:  # a schema answer is never streamed, stop_on_action only applies below
+            obj = self.generate_with_schema(
+                prompt=prompt, schema=question.output_format, system="/nothink",
+                options={
+                    "temperature": self._temperature or 0.1,
+                    "num_predict": 4096,
+                    "repeat_penalty": 2
+                } if len(llm_options)==0 else llm_options,
+                cache=question.cacheable
+            )
+            thinking_answer = self._react_template.render(THINKING_PLACEHOLDER=obj["thinking"], ANSWER_PLACEHOLDER=obj["answer"])
+        elif not question.format_name:
+            action_stopper = self._action_stopper if question.stop_on_action else None
+            thinking_answer = self._answer_question_without_format(prompt, llm_options, action_stopper, question.cacheable)
         else:
-            obj = self._generate_with_format(prompt, question, llm_options)
+            obj = self._generate_with_format(prompt, question, llm_options, cache=question.cacheable)
             answer = obj.answer if isinstance(obj.answer, str) else getattr(obj.answer, question.answer_key_in_format)
-            thinking_answer = deepcopy(self._react_prompt).replace("THINKING_PLACEHOLDER", obj.thinking).replace("ANSWER_PLACEHOLDER", answer)
-
-        code_blocks = self._fetch_code_blocks(thinking_answer)
-        observation = None
-        if code_blocks:
+            thinking_answer = self._react_template.render(THINKING_PLACEHOLDER=obj.thinking, ANSWER_PLACEHOLDER=answer)
+        return thinking_answer
+
+    def _run_and_repair(self, prompt: str, thinking_answer: str, code_exe_times: int, llm_options: dict):
+        """
+        Runs the code in an answer and asks for a fix while it fails. Each repair prompt only carries the latest
+        failing answer and the tail of its error, and repairs stop once they spent _repair_token_budget tokens.
+        """
+        repair_tokens = 0
+        while True:
+            code_blocks = self._fetch_code_blocks(thinking_answer)
+            if not code_blocks:
+                return thinking_answer, None
             code, out, err = self._run_code_blocks(code_blocks, code_exe_times)
             if code == 0:
                 self._log_to_txt(f"\n************ Origin Code Start ************\n{code_blocks}\n************ Origin Code End ************\n", "StarsAgentTrack2V9")
-                thinking_answer = replace_code(thinking_answer)
-                observation = out
-            else:
-                prompt__, thinking_answer__, observation__ = self._answer_question(
-                    prompt + thinking_answer, Question(question=f"This is the execution result of your code, it meets error: \n'{err}'\n Now think it twice, and update your code"),
-                    code_exe_times+1, llm_options
-                )
-                thinking_answer = thinking_answer__
-                observation = observation__
-        thinking_answer_split = thinking_answer.split("[Answer]")
-        return prompt, f"{thinking_answer_split[0].strip()}\n[Answer] {thinking_answer_split[1].strip()}", observation
+                return replace_code(thinking_answer), out
+            if repair_tokens >= self._repair_token_budget:
+                self._log_to_txt(f"\n[Repair] budget used up, {repair_tokens} tokens\n", "StarsAgentTrack2V9")
+                return replace_code(thinking_answer), "Code execution failed too many times. NO Python Code result, please continue"
+            error = "\n".join(str(err).strip().split("\n")[-self._max_error_lines:])
+            repair_question = Question(question=f"This is the execution result of your code, it meets error: \n'{error}'\n Now think it twice, and update your code")
+            tokens_before = self.usage["prompt_tokens"] + self.usage["eval_tokens"]
+            thinking_answer = self._answer_once(self._add_question_to_prompt(prompt + thinking_answer, repair_question), repair_question, llm_options)
+            repair_cost = self.usage["prompt_tokens"] + self.usage["eval_tokens"] - tokens_before
+            repair_tokens += repair_cost
+            code_exe_times += 1
+            self._log_to_txt(f"\n[Repair {code_exe_times}] {repair_cost} tokens, {repair_tokens}/{self._repair_token_budget} for this question\n", "StarsAgentTrack2V9")
 
-    def get_base_chat_prompt(self, observation: str, llm_options=None):
+    def _answer_question(self, chat_prompt: str, question: Question, code_exe_times=0, llm_options=None):
         if llm_options is None:
             llm_options = {}
-        base_prompt = deepcopy(self._base_prompt).replace("OBSERVATION_PLACEHOLDER", observation)
-        question_list = [
+        prompt = self._add_question_to_prompt(chat_prompt, question)
+        thinking_answer, observation = self._run_and_repair(prompt, self._answer_once(prompt, question, llm_options), code_exe_times, llm_options)
+        thinking_answer_split = thinking_answer.split("[Answer]")
+        return prompt, f"{thinking_answer_split[0].strip()}\n[Answer] {thinking_answer_split[1].strip()}", observation
+
+    def _base_questions(self):
+        return [
             Question(
-                question="What game are you playing? What's the rule and winning condition in this game?"),
+                question="What game are you playing? What's the rule and winning condition in this game?", cacheable=True, stable=ROLE_SCOPE),
             Question(
-                question="What's the role and name of the player you are playing?"),
+                question="What's the role and name of the player you are playing?", cacheable=True, stable=ROLE_SCOPE),
             Question(
-                question="Does the game begin? What round is current round"),
+                question="Does the game begin? What round is current round", cacheable=True),
             Question(
-                question="Analysis, what should be the structure or format of the 'action' in this round?"),
+                question="Analysis, what should be the structure or format of the 'action' in this round?", cacheable=True, stable=PHASE_SCOPE),
             Question(
                 question="In this round, you are required to output an action, you don't need to decide this action immediately,"
                          "but first make sure it is a command with structured format or a free-chat (if the instruction hints you can converse freely for next 1 round in bottom lines, it means you need to give free-chat right now!)?",
                 format_name="ReActWithRound", answer_key_in_format="current_action_type"),
         ]
-        for q in question_list:
+
+    def get_base_chat_prompt(self, observation: str, llm_options=None):
+        if llm_options is None:
+            llm_options = {}
+        base_prompt = self._base_template.render(OBSERVATION_PLACEHOLDER=observation)
+        game_info = classify(observation)
+        for q in self._base_questions():
+            if q.format_name == "ReActWithRound" and game_info.game is not None:
+                # the env headers already tell the round type, no need to ask the model
+                base_prompt = f"{self._add_question_to_prompt(base_prompt, q)}\n[Thinking] {game_info.describe()}\n[Answer] {game_info.action_type}"
+                continue
+            key = speculation_key(q.stable, q.question, game_info)
+            stored = self.speculation.get(key)
+            if stored is not None:
+                # answered on an earlier turn of this seat, or speculatively while the other seats played
+                base_prompt = f"{self._add_question_to_prompt(base_prompt, q)}\n{stored}"
+                continue
+            start_time = time.time()
             prompt_with_q, thinking_answer, observation_ = self._answer_question(base_prompt, q, 0, llm_options)
             if observation_ is None:
+                self.speculation.put(key, thinking_answer, time.time() - start_time)
                 base_prompt = f"{prompt_with_q}\n{thinking_answer}"
             else:
                 base_prompt = f"{prompt_with_q}\n{thinking_answer}\n[Observation]{observation_}"
         return base_prompt
 
+    def _add_candidates_to_prompt(self, chat_prompt: str, game_info: GameInfo) -> str:
+        candidates = self.speculation.get_candidates(game_info)
+        if not candidates:
+            return chat_prompt
+        question = Question(question="Which candidate actions did the solver compute for you?")
+        return (f"{self._add_question_to_prompt(chat_prompt, question)}\n[Thinking] The solver ran before the latest moves, "
+                f"so check the candidates against the current observation\n[Answer] {', '.join(candidates)}")
+
+    def _speculate(self, observation: str):
+        """ Runs while the other seats play: solver candidates for our next turn, and the stable answers still missing """
+        game_info = classify(observation)
+        self.speculation.compute_candidates(observation, game_info)
+        base_prompt = self._base_template.render(OBSERVATION_PLACEHOLDER=observation)
+        for q in self._base_questions():
+            if not q.stable:
+                continue # only true for the turn just answered
+            key = speculation_key(q.stable, q.question, game_info)
+            stored = self.speculation.peek(key)
+            if stored is not None:
+                base_prompt = f"{self._add_question_to_prompt(base_prompt, q)}\n{stored}"
+                continue
+            start_time = time.time()
+            prompt_with_q, thinking_answer, observation_ = self._answer_question(base_prompt, q, 0, {})
+            if observation_ is None:
+                self.speculation.put(key, thinking_answer, time.time() - start_time)
+                base_prompt = f"{prompt_with_q}\n{thinking_answer}"
+            else:
+                base_prompt = f"{prompt_with_q}\n{thinking_answer}\n[Observation]{observation_}"
+
+    def new_game(self):
+        """ The speculation keys name the seat, not the game: a reused agent forgets them between games """
+        self.speculation.clear()
+
     def get_action_by_python(self, chat_prompt: str, additional_questions=None, llm_options=None):
         if additional_questions is None:
             additional_questions = []
         if llm_options is None:
             llm_options = {}
-        base_prompt = deepcopy(chat_prompt)
+        base_prompt = chat_prompt
+        round_phase = chat_prompt.split("[Answer]")[-1].strip()
         question_list = additional_questions + [
             Question(
                 question="You can use Python to help your decisions, for current around, how would you like to use Python to help your decisions, also how would you use Python to valid your choice? Provide a good idea, but no code needed."
@@ -201,7 +301,9 @@ REWRITE_PROMPT
             Question(
                 question="According to your idea in last question, now implement it, write a Python script (format: ```python(.*?)```) to help your decision, but avoid printing too many logs, only print key logs, also avoid UnicodeDecodeError"),
             Question(
-                question="Now according to the above code execution result in [Observation], considering game instructions, action format, history rounds and our whole chat history, think twice, put thinking in [Thinking] and provide only 1 final action in [Answer] (basically, if python code is executed successfully, trust code result)"),
+                question="Now according to the above code execution result in [Observation], considering game instructions, action format, history rounds and our whole chat history, think twice, put thinking in [Thinking] and provide only 1 final action in [Answer] (basically, if python code is executed successfully, trust code result)",
+                stop_on_action=round_phase != "free-chat",
+                output_format=self._action_schema if round_phase != "free-chat" else None),
         ]
 
 
@@ -217,7 +319,7 @@ REWRITE_PROMPT
     def valid_action(self, chat_prompt: str, action: str, llm_options=None):
         if llm_options is None:
             llm_options = {}
-        base_prompt = deepcopy(chat_prompt)
+        base_prompt = chat_prompt
         question_list = [
             Question(
                 question="For your current role, what are the red lines? What are the action requirement? And point out the most important one. For example, number constraints? or the words must not contain? or the words must contain.  Only one red line!"),
@@ -237,30 +339,41 @@ REWRITE_PROMPT
         return  base_prompt.split("[Answer]")[-1].strip()
 
     def get_validation_obj(self, observation: str, action: str, validation: str):
-        validation_prompt = (deepcopy(self._validation_prompt)
-                             .replace("OBSERVATION_PLACEHOLDER", observation)
-                             .replace("ACTION_PLACEHOLDER", action)
-                             .replace("VALIDATION_PLACEHOLDER", validation))
+        validation_prompt = self._validation_template.render(ACTION_PLACEHOLDER=action, VALIDATION_PLACEHOLDER=validation)
         content = self.generate_rtn_content_only(
             prompt=validation_prompt, system="/nothink",
             options={
                 "temperature": self._temperature or 0.1, "stop": ["[Question]"], "repeat_penalty": 2
             },
-            output_format=ReActWithValidation.model_json_schema()
+            output_format=ReActWithValidation.model_json_schema(),
+            tier=EXTRACTION,
+            cache=True
         )
         return ReActWithValidation(**json.loads(content))
 
     def main_process(self, observation: str):
         meet_requirements = False
-        chat_prompt = self.get_base_chat_prompt(observation)
+        info = classify(observation)
+        chat_prompt = self._add_candidates_to_prompt(self.get_base_chat_prompt(observation), info)
+        round_phase = chat_prompt.split("[Answer]")[-1].strip()
+        # probe with an empty action: None means free chat or no validator (env not loadable, no board parsed)
+        mechanically_checkable = validate_action(observation, "", info) is not None
+        if self._action_schema is not None and round_phase != "free-chat" and not mechanically_checkable:
+            # the final answer is decoded under the action grammar, so it cannot be malformed
+            return self.output_wrapper(self.get_action_by_python(chat_prompt))
 
         action = ""
         get_action_additions = []
         fail_count = 0
         fail_action_map = {}
         while not meet_requirements:
-            action, validation = self.get_action_and_validate(chat_prompt, get_action_additions)
-            validation_obj = self.get_validation_obj(observation, action, validation)
+            if mechanically_checkable:
+                # the env's own parsing decides, the LLM validation is only needed for free chat
+                action = self.get_action_by_python(chat_prompt, get_action_additions)
+                validation_obj = validate_action(observation, action, info)
+            else:
+                action, validation = self.get_action_and_validate(chat_prompt, get_action_additions)
+                validation_obj = self.get_validation_obj(observation, action, validation)
             print(validation_obj)
             if validation_obj.is_action_valid:
                 meet_requirements = True
@@ -297,7 +410,12 @@ REWRITE_PROMPT
 
     @time_monitor()
     def __call__(self, observation: str) -> str:
+        self.speculation.wait()
         observation = self._observation_wrapper(observation)
+        # one early-exit path per turn: structured turns decode under the action schema, which cannot run past the
+        # action, and the streamed ActionStopper is only used for structured turns that have no schema
+        self._action_schema = react_action_schema(observation)
+        self._action_stopper = ActionStopper.from_observation(observation, answer_marker="[Answer]") if self._action_schema is None else None
         # print(f"\033[31m{observation}\033[0m")
         actions = []
         action1, time1 = self._get_one_action(observation, 0.1)
@@ -308,12 +426,13 @@ REWRITE_PROMPT
 
         self._log_to_txt("\n"+"*"*300+"\n", "StarsAgentTrack2V9")
         # print(" | ".join(actions))
+        self.speculation.run_in_background(lambda: self._speculate(observation))
         return random.choice(actions)
 
 
 if __name__ == "__main__":
 
-    agent = StarsAgentTrack2V9("qwen3:8b")
+    agent = StarsAgentTrack2V9("qwen3:8b", tier_models={"extraction": "qwen3:1.7b"}, cache_path="cache/responses.sqlite")
 
     with open("samples.json", "r", encoding="utf-8") as f:
         samples = json.load(f)
@@ -324,6 +443,9 @@ if __name__ == "__main__":
             for sample in samples[game_name]:
                 result = agent(sample)
                 print(result)
+                print(agent.tier_report())
+                print(agent.cache_stats())
+                print(agent.speculation.report())
                 print("*" * 300)
                 break
             # break
@@ -0,0 +1,73 @@
+"""
+Startup benchmark: imports each registered agent class in a fresh interpreter with `python -X importtime`
+and fails when the import takes longer than its budget or pulls in a heavy dependency it should not need.
+
+    uv run startup_benchmark.py --agents V7 V9
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+from typing import Dict, List
+
+from agent_registry import AGENT_REGISTRY
+
+
+# cumulative import time budget per agent, in milliseconds
+STARTUP_BUDGETS_MS = {name: 1500 for name in AGENT_REGISTRY}
+
+# modules that must stay out of the import graph of the prompt-based agents, crewai is only imported when a crew runs
+HEAVY_MODULES = ["crewai", "langchain_ollama", "langchain", "nltk", "transformers", "torch"]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_import(name: str) -> Dict:
+    """ Import the agent class in a new interpreter and parse the -X importtime report """
+    code = f"import agent_registry; agent_registry.agent_class({name!r})"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    modules = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if not m:
+            continue
+        self_us, cumulative_us, indent, module = int(m.group(1)), int(m.group(2)), m.group(3), m.group(4)
+        modules[module] = cumulative_us
+        if len(indent) == 1:  # top level import, nested imports are already in its cumulative time
+            total_us += cumulative_us
+    error = result.stderr.strip().splitlines()[-1] if result.returncode != 0 else None
+    return {"agent": name, "total_ms": total_us / 1000, "modules": modules, "error": error}
+
+
+def check(name: str, report: Dict) -> List[str]:
+    problems = []
+    if report["error"]:
+        problems.append(f"import failed: {report['error']}")
+    if report["total_ms"] > STARTUP_BUDGETS_MS[name]:
+        problems.append(f"{report['total_ms']:.0f}ms over budget {STARTUP_BUDGETS_MS[name]}ms")
+    if name != "LLM":
+        heavy = sorted({m.split(".")[0] for m in report["modules"]} & set(HEAVY_MODULES))
+        if heavy:
+            problems.append(f"imports heavy modules {heavy}")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", nargs="+", default=sorted(AGENT_REGISTRY), choices=sorted(AGENT_REGISTRY))
+    parser.add_argument("--top", type=int, default=5, help="slowest modules to show per agent")
+    args = parser.parse_args()
+
+    failed = False
+    for name in args.agents:
+        report = measure_import(name)
+        problems = check(name, report)
+        failed = failed or bool(problems)
+        slowest = sorted(report["modules"].items(), key=lambda item: item[1], reverse=True)[:args.top]
+        print(f"{name:<10} {report['total_ms']:8.1f}ms  {'FAIL ' + '; '.join(problems) if problems else 'ok'}")
+        for module, cumulative_us in slowest:
+            print(f"    {cumulative_us / 1000:8.1f}ms  {module}")
+    sys.exit(1 if failed else 0)
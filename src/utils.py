@@ -1,32 +1,34 @@
 import os
 import re
 import regex
-import sys
-import tempfile
 import time
 import logging
-import subprocess
+import threading
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError
 
+from code_cache import CodeCache
+from safe_exec import run_restricted
+from sandbox import run_sandboxed
+
 
 LOG_DIR = "logs"
 if not os.path.exists(LOG_DIR):
     os.makedirs(LOG_DIR)
 
 
-def setup_logger(log_filename: str, log_level=logging.INFO):
-    logger = logging.getLogger(__name__)
-
-    if logger.hasHandlers():
-        logger.handlers.clear()
-
-    logger.setLevel(log_level)
+_setup_lock = threading.Lock()
 
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(filename)s[%(lineno)d] ----- %(message)s')
-    file_handler = logging.FileHandler(os.path.join(LOG_DIR, log_filename), encoding='utf-8')
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
 
+def setup_logger(log_filename: str, log_level=logging.INFO):
+    """ One logger per log file, its handler created by the first call; later calls (from any thread) reuse it """
+    logger = logging.getLogger(f"{__name__}.{os.path.splitext(log_filename)[0]}")
+    with _setup_lock:
+        if not logger.handlers:
+            logger.setLevel(log_level)
+            formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(filename)s[%(lineno)d] ----- %(message)s')
+            file_handler = logging.FileHandler(os.path.join(LOG_DIR, log_filename), encoding='utf-8')
+            file_handler.setFormatter(formatter)
+            logger.addHandler(file_handler)
     return logger
 
 def my_logger(log_file="log.txt"):
@@ -46,13 +48,15 @@ def my_logger(log_file="log.txt"):
     return out_wrapper
 
 
-def time_monitor():
+def time_monitor(log_file=None):
     def out_wrapper(func):
         def wrapper(*args, **kwargs):
             start_time = time.time()
             res = func(*args, **kwargs)
             used_time = time.time() - start_time
             print("function [%s] cost time %.2f seconds" % (func.__name__, used_time))
+            if log_file:
+                setup_logger(log_file).info("function [%s] cost time %.2f seconds" % (func.__name__, used_time))
             return res
         return wrapper
     return out_wrapper
@@ -83,6 +87,15 @@ _EMOJI_ONLY = regex.compile(
 def strip_emoji(text: str) -> str:
     return _EMOJI_ONLY.sub("", text)
 
+def approx_tokens(text: str) -> int:
+    """ Token estimate where no tokenizer count is available, the len // 4 rule env_benchmark and mock_ollama use """
+    return max(1, len(text) // 4)
+
+
+# counters read by benchmark.py
+EXECUTION_STATS = {"runs": 0, "seconds": 0.0, "cache_hits": 0, "restricted": 0}
+CODE_CACHE = CodeCache()
+
 PY_BLOCK_RE = re.compile(f'```python(.*?)```', re.DOTALL)
 
 
@@ -98,19 +111,26 @@ def extract_python_blocks(text: str):
 
 @time_monitor()
 def run_python_blocks(blocks, timeout_s=20):
-    origin_source = '\n\n'.join(blocks)
-    full_source = strip_emoji(origin_source)
-    # print(f"\n======<<<========\n{origin_source}\n=======<<<>>>>=======\n{full_source}\n=======>>>=======\n")
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as f:
-        f.write(full_source)
-        f.flush()
-        env = os.environ.copy()
-        env["PYTHONIOENCODING"] = "utf-8"
-        try:
-            completed = subprocess.run([sys.executable, f.name],
-                                       capture_output=True, text=True, timeout=timeout_s, env=env)
-        except subprocess.TimeoutExpired as e:
-            return -1, "", f"Execution Timeout, over {timeout_s} seconds"
-        except BaseException as e2:
-            return -1, "", f"{e2}"
-    return completed.returncode, completed.stdout, completed.stderr
\ No newline at end of file
+    EXECUTION_STATS["runs"] += 1
+    start_time = time.time()
+    try:
+        full_source = strip_emoji('\n\n'.join(blocks))
+        key = CODE_CACHE.key(full_source)
+        cached = CODE_CACHE.get(key)
+        if cached is not None:
+            EXECUTION_STATS["cache_hits"] += 1
+            return cached
+        result = run_restricted(full_source)
+        if result is None:
+            result = _run_python_source(full_source, timeout_s)
+        else:
+            EXECUTION_STATS["restricted"] += 1
+        CODE_CACHE.put(key, result, time.time() - start_time)
+        return result
+    finally:
+        EXECUTION_STATS["seconds"] += time.time() - start_time
+
+
+def _run_python_source(full_source, timeout_s):
+    # print(f"\n======<<<========\n{full_source}\n=======>>>=======\n")
+    return run_sandboxed(full_source, timeout_s)
\ No newline at end of file
@@ -0,0 +1,31 @@
+import pytest
+
+from action_patterns import ActionStopper
+
+
+BLOTTO = "[GAME] You are Commander Alpha in a game of ColonelBlotto. Each round, you have to allocate exactly 20 units across fields: A, B, C\n"
+
+
+@pytest.mark.parametrize("text, action", [
+    ("Round [2] was lost, so now [A7 B7 C6] and more", "[A7 B7 C6]"),
+    ("[A7 A3 C10] no, [A:10, B:5, C:5]", "[A:10, B:5, C:5]"),
+    ("still thinking [A7 B", None),
+])
+def test_blotto_finder_skips_brackets_that_are_not_allocations(text, action):
+    assert ActionStopper.from_observation(BLOTTO).find(text) == action
+
+
+def test_found_action_is_what_the_env_parses():
+    pytest.importorskip("textarena")
+    from env_loader import load_env_module
+
+    env = load_env_module("ColonelBlotto").ColonelBlottoEnv(num_fields=3, num_total_units=20)
+    stopper = ActionStopper.from_observation(BLOTTO)
+    text = "Round [2] was lost, so now [A7 B7 C6] and more"
+    assert env._parse_allocation_input(stopper.cut(text))[0] is None # the env reads the first bracket, [2]
+    assert env._parse_allocation_input(stopper.find(text))[0] == [7, 7, 6]
+
+
+def test_free_chat_has_no_stopper():
+    assert ActionStopper.from_observation("[GAME] Welcome to Secret Mafia! You are Player 1.\nYour role: Villager\n"
+                                          "[GAME] Day breaks. Discuss for 3 rounds, then a vote will follow.") is None
@@ -0,0 +1,104 @@
+import pytest
+
+from game_classifier import classify
+from action_validators import validate_action
+
+
+CODENAMES_SPYMASTER = """[GAME] You are Player 0, the Spymaster for Red team. Give a one-word clue and number.
+[GAME] Codenames Words:
+glove    R
+knife    B
+sunflower N
+weather  A
+"""
+
+CODENAMES_OPERATIVE = """[GAME] You are Player 1, the Operative for Red team. Guess words based on the clue.
+[GAME] Spymaster of Red team, Player 0, submitted [fight 2].
+[GAME] Codenames Words:
+glove
+knife
+weather
+[GAME] Codenames Words revealed:
+knife    B
+"""
+
+BLOTTO = """[GAME] You are Commander Alpha in a game of ColonelBlotto. Each round, you have to allocate exactly 20 units across fields: A, B, C
+Available fields: A, B, C
+Units to allocate: 20
+"""
+
+IPD = """[GAME] You are Player 1 in a 3-player Iterated Prisoner's Dilemma. The match lasts 5 rounds.
+[GAME] Chat finished for round 1. Submit your decisions.
+"""
+
+MAFIA = """[GAME] Welcome to Secret Mafia! You are Player 2.
+Your role: Villager
+[GAME] Day breaks. Discuss for 3 rounds, then a vote will follow.
+[Player 0] I trust Player 3.
+[GAME] Voting phase - submit one vote in format [X]. Valid: [0], [1], [3]
+"""
+
+
+@pytest.mark.parametrize("action, is_valid, final", [
+    ("[fight 2]", True, "[fight 2]"),
+    ("[Glove 1]", False, ""), # lowercased, the env would let it pass
+    ("[sun 2]", False, ""), # contained in a board word
+    ("no clue here", False, ""),
+])
+def test_clue(action, is_valid, final):
+    result = validate_action(CODENAMES_SPYMASTER, action)
+    assert (result.is_action_valid, result.action) == (is_valid, final)
+
+
+@pytest.mark.parametrize("action, is_valid, final", [
+    ("I guess [Glove]", True, "[glove]"),
+    ("[pass]", True, "[pass]"),
+    ("[knife]", False, ""), # already revealed
+    ("[spoon]", False, ""),
+])
+def test_guess(action, is_valid, final):
+    result = validate_action(CODENAMES_OPERATIVE, action)
+    assert (result.is_action_valid, result.action) == (is_valid, final)
+
+
+def test_free_chat_and_unknown_games_are_left_to_the_llm():
+    assert validate_action("Hello there", "[A20]") is None
+    free_chat = IPD.replace("Chat finished for round 1. Submit your decisions.", "Starting Round 1")
+    assert classify(free_chat).is_free_chat
+    assert validate_action(free_chat, "[0 cooperate]") is None
+
+
+class TestEnvBacked:
+
+    @pytest.fixture(autouse=True)
+    def _textarena(self):
+        pytest.importorskip("textarena")
+
+    @pytest.mark.parametrize("action, is_valid, final", [
+        ("[A7 B7 C6]", True, "[A7 B7 C6]"),
+        ("a: 10, c: 10", True, "[A10 B0 C10]"),
+        ("[A10 B10 C10]", False, ""),
+        ("[A7 D13]", False, ""),
+    ])
+    def test_blotto(self, action, is_valid, final):
+        result = validate_action(BLOTTO, action)
+        assert (result.is_action_valid, result.action) == (is_valid, final)
+
+    @pytest.mark.parametrize("action, is_valid, final", [
+        ("[0 cooperate] [2 defect]", True, "[0 cooperate] [2 defect]"),
+        ("[2 defect] [0 defect] [0 Cooperate]", True, "[0 cooperate] [2 defect]"), # the last token per opponent wins
+        ("[0 cooperate] [1 defect]", False, ""), # no decision for player 2, own seat ignored
+    ])
+    def test_ipd(self, action, is_valid, final):
+        result = validate_action(IPD, action)
+        assert (result.is_action_valid, result.action) == (is_valid, final)
+
+    @pytest.mark.parametrize("action, is_valid, final", [
+        ("I vote [3]", True, "[3]"),
+        ("[Player 1]", True, "[1]"),
+        ("[2]", False, ""),
+        ("nobody", False, ""),
+    ])
+    def test_vote(self, action, is_valid, final):
+        result = validate_action(MAFIA, action)
+        assert (result.is_action_valid, result.action) == (is_valid, final)
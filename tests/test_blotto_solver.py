@@ -0,0 +1,53 @@
+import time
+import random
+
+import pytest
+
+from blotto_solver import BlottoSolver, all_allocations, random_allocation, format_allocation
+
+
+@pytest.mark.parametrize("num_fields, units", [(2, 5), (3, 8), (4, 6)])
+def test_best_response_matches_brute_force(num_fields, units):
+    solver = BlottoSolver(num_fields, units, values=[1 + i for i in range(num_fields)], seed=0)
+    allocations = list(all_allocations(num_fields, units))
+    rng = random.Random(num_fields * 100 + units)
+    for opponent in rng.sample(allocations, min(10, len(allocations))):
+        best = max(solver.round_score(x, opponent) for x in allocations)
+        response = solver.best_response(opponent)
+        assert sum(response) == units
+        assert solver.round_score(response, opponent) == best
+
+
+def test_solve_is_exhaustive_and_optimal_on_small_spaces():
+    solver = BlottoSolver(3, 10, seed=0)
+    opponent = {(4, 3, 3): 0.5, (0, 5, 5): 0.3, (10, 0, 0): 0.2}
+    result = solver.solve(opponent, time_budget_s=2.0)
+    best = max(solver.expected_score(x, opponent) for x in all_allocations(3, 10))
+    assert result["exhaustive"]
+    assert result["scores"][0] == round(best, 4)
+
+
+@pytest.mark.parametrize("num_fields, units, budget", [(10, 100, 0.05), (26, 2000, 0.05), (26, 5000, 0.02)])
+def test_solve_respects_the_time_budget(num_fields, units, budget):
+    # margin_response alone is O(fields * units^2), seconds for these sizes
+    solver = BlottoSolver(num_fields, units, seed=0)
+    start_time = time.perf_counter()
+    result = solver.solve(time_budget_s=budget)
+    assert time.perf_counter() - start_time < budget + 0.1
+    assert result["allocations"] and all(sum(allocation) == units for allocation in result["allocations"])
+
+
+def test_margin_response_gives_up_past_the_deadline():
+    solver = BlottoSolver(26, 2000, seed=0)
+    assert solver.margin_response(solver.uniform_opponent(), deadline=time.perf_counter()) is None
+
+
+def test_random_allocation_uses_every_unit():
+    rng = random.Random(0)
+    for _ in range(100):
+        allocation = random_allocation(5, 30, rng)
+        assert len(allocation) == 5 and sum(allocation) == 30 and min(allocation) >= 0
+
+
+def test_format_allocation():
+    assert format_allocation((7, 7, 6), ["A", "B", "C"]) == "[A7 B7 C6]"
@@ -0,0 +1,63 @@
+import pytest
+
+from code_cache import CodeCache, nondeterminism, source_key
+
+
+def test_key_ignores_formatting_and_comments():
+    assert source_key("x = max(1, 2)\nprint(x)") == source_key("# pick\nx = max( 1,2 )\n\nprint(x)  # done")
+    assert source_key("print(1)") != source_key("print(2)")
+    assert source_key("print(") is None
+
+
+@pytest.mark.parametrize("source", [
+    "import random\nprint(random.randint(0, 9))",
+    "from datetime import datetime\nprint(datetime.now())",
+    "import numpy as np\nprint(np.random.choice(3))",
+    "from numpy.random import random\nprint(random())",
+    "print(id(object()))",
+    "print(hash(object()))",
+    "print(open('board.txt').read())",
+    "import os.path\nprint(os.path.exists('x'))",
+])
+def test_nondeterministic_snippets_are_not_cached(source):
+    cache = CodeCache()
+    assert nondeterminism(source) is not None
+    assert cache.key(source) is None
+    assert cache.stats["uncacheable"] == 1
+
+
+def test_hits_replay_the_stored_result():
+    cache = CodeCache()
+    key = cache.key("import itertools\nprint(max(itertools.product(range(3), repeat=2)))")
+    assert key is not None and cache.get(key) is None
+    cache.put(key, (0, "(2, 2)\n", ""), 0.5)
+    assert cache.get(key) == (0, "(2, 2)\n", "")
+    report = cache.report()
+    assert (report["hits"], report["misses"], report["saved_s"], report["hit_rate"]) == (1, 1, 0.5, 0.5)
+
+
+def test_output_with_object_addresses_is_not_stored():
+    cache = CodeCache()
+    key = cache.key("print(object())")
+    assert key is not None
+    cache.put(key, (0, "<object object at 0x7f3a2c1b4e50>\n", ""), 0.1)
+    assert cache.get(key) is None and cache.stats["uncacheable"] == 1
+
+
+@pytest.mark.parametrize("returncode", [-1, -9])
+def test_timeouts_and_kills_are_not_stored(returncode):
+    cache = CodeCache()
+    key = source_key("print(1)")
+    cache.put(key, (returncode, "", "Execution Timeout"), 20.0)
+    assert cache.get(key) is None
+
+
+def test_least_recently_used_is_evicted():
+    cache = CodeCache(max_entries=2)
+    keys = [source_key(f"print({i})") for i in range(3)]
+    cache.put(keys[0], (0, "0\n", ""), 0.1)
+    cache.put(keys[1], (0, "1\n", ""), 0.1)
+    cache.get(keys[0])
+    cache.put(keys[2], (0, "2\n", ""), 0.1)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == (0, "0\n", "") and cache.stats["evictions"] == 1
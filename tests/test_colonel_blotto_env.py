@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+pytest.importorskip("textarena")
+from env_loader import load_env_module
+
+
+@pytest.fixture(scope="module")
+def env():
+    return load_env_module("ColonelBlotto").ColonelBlottoEnv(num_fields=3, num_total_units=20)
+
+
+@pytest.mark.parametrize("action, units", [
+    ("[A7 B7 C6]", [7, 7, 6]),
+    ("[A:5, B:10, C:5]", [5, 10, 5]),
+    ("I go with [a 4 , c: 16]", [4, 0, 16]),
+    ("A10 B10", [10, 10, 0]),
+])
+def test_parse_valid_allocation(env, action, units):
+    assert env._parse_allocation_input(action) == (units, "Allocation is good.")
+
+
+@pytest.mark.parametrize("action, message", [
+    ("", "Invalid input format. Use: A:5, B:10, C:5"),
+    ("[A7 B7 C6 !]", "Invalid input format. Use: A:5, B:10, C:5"),
+    ("[A7 A3 C6]", "Invalid input format. Use: A:5, B:10, C:5"),
+    ("[A7 D3]", "Invalid field name(s). Valid fields: A, B, C"),
+    ("[A10 B10 C10]", "You cannot allocate more than 20 units. Current sum: 30"),
+])
+def test_parse_invalid_allocation(env, action, message):
+    assert env._parse_allocation_input(action) == (None, message)
+
+
+@pytest.mark.parametrize("tokens", [8, 12, 200])
+def test_parse_rejects_malformed_input_in_linear_time(env, tokens):
+    # spaces around an optional colon used to backtrack exponentially in the number of tokens
+    action = ("A" + " " * 8 + "5") * tokens + " !"
+    start_time = time.perf_counter()
+    assert env._parse_allocation_input(action)[0] is None
+    assert time.perf_counter() - start_time < 0.5
@@ -0,0 +1,48 @@
+import os
+import json
+
+import pytest
+
+from game_classifier import GameInfo, classify
+
+
+with open(os.path.join(os.path.dirname(__file__), "..", "src", "samples.json")) as f:
+    SAMPLES = json.load(f)
+
+
+@pytest.mark.parametrize("index, expected", [
+    (0, GameInfo(game="Codenames", role="Spymaster", player_id=0, team="Red", phase="clue")),
+    (1, GameInfo(game="Codenames", role="Operative", player_id=1, team="Red", phase="guess")),
+    (4, GameInfo(game="Codenames", role="Spymaster", player_id=2, team="Blue", phase="clue")),
+])
+def test_codenames(index, expected):
+    assert classify(SAMPLES["Codenames"][index]) == expected
+
+
+def test_blotto():
+    info = classify(SAMPLES["ColonelBlotto"][0])
+    assert info == GameInfo(game="ColonelBlotto", role="Commander", player_id=0, team="Commander Alpha", phase="allocation")
+    assert info.player_type == "colonel_blotto" and info.action_type == "structured command"
+
+
+@pytest.mark.parametrize("index, player_id, phase", [(0, 0, "free-chat"), (2, 2, "decision")])
+def test_ipd_phase_follows_the_latest_announcement(index, player_id, phase):
+    info = classify(SAMPLES["3-player Iterated Prisoner's Dilemma"][index])
+    assert (info.game, info.player_id, info.phase) == ("ThreePlayerIPD", player_id, phase)
+    assert info.is_free_chat == (phase == "free-chat")
+
+
+@pytest.mark.parametrize("tail, phase", [
+    ("[GAME] Night has fallen. Mafia, agree on a victim.\nValid targets: [0], [1]", "Night-Mafia"),
+    ("[GAME] Day breaks. Discuss for 3 rounds, then a vote will follow.", "Day-Discussion"),
+    ("[GAME] Day breaks. Discuss for 3 rounds, then a vote will follow.\n[GAME] Voting phase - submit one vote in format [X]. Valid: [0], [1]", "Day-Voting"),
+])
+def test_mafia(tail, phase):
+    info = classify(f"[GAME] Welcome to Secret Mafia! You are Player 3.\nYour role: Mafia\n{tail}")
+    assert (info.game, info.role, info.player_id, info.team, info.phase) == ("SecretMafia", "Mafia", 3, "Mafia", phase)
+    assert info.is_free_chat == (phase == "Day-Discussion")
+
+
+def test_unknown_game():
+    info = classify("Hello, how are you?")
+    assert info == GameInfo() and info.player_type is None
@@ -0,0 +1,41 @@
+import re
+import time
+import random
+import threading
+
+import pytest
+
+pytest.importorskip("textarena")
+from mafia_self_play import MafiaSelfPlay
+
+
+def scripted_agent_factory(in_flight: list):
+    lock = threading.Lock()
+
+    def factory():
+        def agent(observation: str) -> str:
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight[1], in_flight[0])
+            time.sleep(0.001)
+            with lock:
+                in_flight[0] -= 1
+            options = re.findall(r"\[(\d+)\]", observation.split("\n")[-1])
+            return f"[{random.choice(options)}]" if options else "Let us vote carefully."
+        return agent
+    return factory
+
+
+def test_games_run_concurrently():
+    in_flight = [0, 0] # current, max
+    self_play = MafiaSelfPlay(scripted_agent_factory(in_flight), num_players=6, concurrent_games=3)
+    summary = self_play.run(6)
+    assert summary["games"] == 6 and summary["discarded"] == 0
+    assert summary["mean_batch_size"] == 1 # every game keeps the env's one seat at a time
+    assert in_flight[1] > 1
+
+
+def test_one_game_at_a_time_by_default():
+    in_flight = [0, 0]
+    MafiaSelfPlay(scripted_agent_factory(in_flight), num_players=6).run(2)
+    assert in_flight[1] == 1
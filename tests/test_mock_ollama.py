@@ -0,0 +1,83 @@
+import re
+import json
+import urllib.request
+
+import pytest
+
+from action_grammar import react_action_schema
+from mock_ollama import LatencyProfile, serve
+from response_cache import ResponseCache
+
+
+SPYMASTER = "[GAME] You are Player 0, the Spymaster for Red team. Give a one-word clue and number.\n[GAME] Codenames Words:\nglove    R\nknife    B\n"
+BLOTTO_LARGE = ("[GAME] You are Commander Alpha in a game of ColonelBlotto.\nAvailable fields: A, B, C, D, E, F, G, H\n"
+                "Units to allocate: 200\n")
+
+
+def conforms(value, schema: dict) -> bool:
+    """ The JSON schema keywords the agents use: enum, pattern, type, properties, required """
+    if "enum" in schema:
+        return value in schema["enum"]
+    if "pattern" in schema:
+        return isinstance(value, str) and re.search(schema["pattern"], value) is not None
+    if schema.get("type") == "object":
+        return (isinstance(value, dict) and all(name in value for name in schema.get("required", []))
+                and all(conforms(value[name], prop) for name, prop in schema.get("properties", {}).items() if name in value))
+    return isinstance(value, {"string": str, "integer": int, "number": (int, float), "boolean": bool, "array": list}.get(schema.get("type"), object))
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    schema = react_action_schema(SPYMASTER)
+    messages = [{"role": "system", "content": "You are a player."}, {"role": "user", "content": "Say hi"}]
+    cache.put(ResponseCache.make_key("qwen3:8b", SPYMASTER, "/nothink", {"temperature": 0.1}, schema),
+              json.dumps({"thinking": "one red word", "answer": "[hand 1]"}))
+    cache.put(ResponseCache.make_chat_key("qwen3:8b", messages), "hi")
+    cache.close()
+    return str(tmp_path / "responses.sqlite"), schema, messages
+
+
+@pytest.fixture
+def mock_server(recorded):
+    httpd = serve(port=0, models=["qwen3:8b"], profile=LatencyProfile(0, 0, 0), record_db=recorded[0])
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def post(url: str, payload: dict) -> dict:
+    request = urllib.request.Request(url, data=json.dumps({**payload, "stream": False}).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def stats(url: str) -> dict:
+    with urllib.request.urlopen(f"{url}/api/stats", timeout=10) as response:
+        return json.loads(response.read())
+
+
+def test_recorded_generate_is_replayed(mock_server, recorded):
+    _, schema, _ = recorded
+    reply = post(f"{mock_server}/api/generate", {"model": "qwen3:8b", "prompt": SPYMASTER, "system": "/nothink",
+                                                 "options": {"temperature": 0.1}, "format": schema})
+    answer = json.loads(reply["response"])
+    assert answer == {"thinking": "one red word", "answer": "[hand 1]"} and conforms(answer, schema)
+    assert stats(mock_server)["replayed"] == 1
+
+
+def test_recorded_chat_is_replayed(mock_server, recorded):
+    _, _, messages = recorded
+    reply = post(f"{mock_server}/api/chat", {"model": "qwen3:8b", "messages": messages})
+    assert reply["message"] == {"role": "assistant", "content": "hi"}
+    assert stats(mock_server)["replayed"] == 1
+
+
+@pytest.mark.parametrize("observation", [SPYMASTER, BLOTTO_LARGE])
+def test_scripted_answers_satisfy_pattern_schemas(mock_server, observation):
+    schema = react_action_schema(observation)
+    assert "pattern" in schema["properties"]["answer"]
+    reply = post(f"{mock_server}/api/generate", {"model": "qwen3:8b", "prompt": observation + "\nscripted", "format": schema})
+    assert conforms(json.loads(reply["response"]), schema)
+    assert stats(mock_server)["scripted"] == 1
@@ -0,0 +1,67 @@
+import pytest
+
+from observation_budget import ObservationBudgeter, split_phases
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+def mafia_observation(days: int) -> str:
+    messages = ["[GAME] Welcome to Secret Mafia! You are Player 2.\nYour role: Villager"]
+    for day in range(days):
+        messages.append("[GAME] Night has fallen. Mafia, agree on a victim.\nValid targets: [0], [1], [3]")
+        messages.append(f"[GAME] Day breaks. Discuss for 3 rounds, then a vote will follow. (day {day})")
+        messages += [f"[Player {pid}] I think Player {(pid + 1) % 4} acts like the mafia on day {day}." for pid in range(4)]
+        messages.append(f"[Player 1] voted for Player 3 (day {day})")
+        messages.append("[GAME] Voting phase - submit one vote in format [X]. Valid: [0], [1], [3]")
+        messages.append(f"[Player 0] [3] (day {day})")
+    return "\n".join(messages)
+
+
+@pytest.fixture
+def budgeter():
+    return ObservationBudgeter(count_words, keep_recent_phases=2)
+
+
+def test_observation_within_budget_is_unchanged(budgeter):
+    observation = mafia_observation(3)
+    assert budgeter.fit(observation, count_words(observation)) == observation
+    assert budgeter.stats["truncated"] == 0
+
+
+def test_observation_without_phases_is_unchanged(budgeter):
+    observation = "[GAME] You are Commander Alpha in a game of ColonelBlotto.\n" * 50
+    assert budgeter.fit(observation, 10) == observation
+    assert budgeter.stats["over_budget"] == 1
+
+
+def test_old_discussions_are_shortened_first(budgeter):
+    observation = mafia_observation(3)
+    shortened = budgeter.fit(observation, count_words(observation) - 10)
+    head, phases = split_phases(shortened)
+    assert len(phases) == 9 # nothing dropped
+    assert "[GAME] (5 messages from Player 0, Player 1, Player 2, Player 3 omitted to fit the context)" in phases[1]
+    assert "[Player 0] [3] (day 0)" in phases[2] # votes stay
+    assert phases[-2:] == split_phases(observation)[1][-2:]
+
+
+@pytest.mark.parametrize("max_tokens", range(115, 400, 7))
+def test_result_fits_the_budget_with_the_omission_note(budgeter, max_tokens):
+    observation = mafia_observation(10)
+    original_head, original_phases = split_phases(observation)
+    shortened = budgeter.fit(observation, max_tokens)
+    head, phases = split_phases(shortened)
+    # the per-message estimate counts one token per separator, so it is an upper bound of the joined text
+    assert count_words(shortened) <= max_tokens
+    assert head[:len(original_head)] == original_head and phases[-2:] == original_phases[-2:]
+    if len(phases) < len(original_phases):
+        # the note has no phase marker, it ends up in the head
+        assert head[-1] == f"[GAME] ({len(original_phases) - len(phases)} earlier phases omitted to fit the context)"
+
+
+def test_recent_phases_are_kept_over_budget(budgeter):
+    observation = mafia_observation(10)
+    shortened = budgeter.fit(observation, 60)
+    assert split_phases(shortened)[1] == split_phases(observation)[1][-2:]
+    assert budgeter.stats["over_budget"] == 1
@@ -0,0 +1,70 @@
+import pytest
+
+from game_classifier import GameInfo
+from blotto_solver import BlottoSolver, blotto_candidates
+from opponent_store import OpponentStore, UNKNOWN_OPPONENT, ipd_candidates
+
+
+BLOTTO_OBSERVATION = """[GAME] Available fields: A, B, C
+Units to allocate: 20
+Round 1
+Commander Alpha allocated: A: 7 , B: 7 , C: 6
+Commander Beta allocated:  A: 10, B: 10, C: 0
+Round 2
+Commander Alpha allocated: A: 6 , B: 7 , C: 7
+Commander Beta allocated:  A: 10, B: 10, C: 0
+"""
+
+IPD_OBSERVATION = """[GAME] Player 0 vs Player 1 chose to cooperate and defect
+[GAME] Player 0 vs Player 2 chose to cooperate and cooperate
+[GAME] Player 1 vs Player 2 chose to defect and cooperate
+"""
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OpponentStore(str(tmp_path / "opponents.sqlite"))
+
+
+def test_online_games_are_pooled(store):
+    recorded = store.record_game(BLOTTO_OBSERVATION, GameInfo(game="ColonelBlotto", player_id=0))
+    assert recorded == {"blotto_allocations": 2}
+    assert store.opponents() == [UNKNOWN_OPPONENT]
+    assert store.blotto_prior(["A", "B", "C"], 20) == {(10, 10, 0): 1.0}
+
+
+def test_named_opponents_fall_back_to_the_pool(store):
+    store.record_game(IPD_OBSERVATION, GameInfo(game="ThreePlayerIPD", player_id=0), opponents={1: "model-x"})
+    assert store.cooperation_rate("model-x") == 0.0
+    assert store.cooperation_rate(UNKNOWN_OPPONENT) == 1.0
+    assert store.blotto_prior(["A", "B", "C"], 20, opponent="model-x") == {}
+    store.record_game(BLOTTO_OBSERVATION, GameInfo(game="ColonelBlotto", player_id=0))
+    assert store.blotto_prior(["A", "B", "C"], 20, opponent="model-x") == {(10, 10, 0): 1.0}
+
+
+def test_blotto_candidates_use_the_session_store(store):
+    info = GameInfo(game="ColonelBlotto", player_id=0)
+    observation = "Available fields: A, B, C\nUnits to allocate: 20\n"
+    blotto_candidates(observation, info, store) # memoizes the empty prior
+    store.record_game(BLOTTO_OBSERVATION, info)
+    solver = BlottoSolver(3, 20)
+    for candidate in blotto_candidates(observation, info, store):
+        allocation = tuple(int(units) for units in candidate.strip("[]").replace("A", "").replace("B", "").replace("C", "").split())
+        assert solver.round_score(allocation, (10, 10, 0)) == 1
+
+
+def test_lookups_fall_back_to_the_pool(store):
+    store.record_game(IPD_OBSERVATION, GameInfo(game="ThreePlayerIPD", player_id=0))
+    store.record_game("[GAME] Spymaster of Blue team, Player 2, submitted [ocean 3].", GameInfo(game="Codenames", player_id=0))
+    assert store.cooperation_rate("model-y") == 0.5
+    assert store.clue_style("model-y") == {"clues": 1, "mean_number": 3.0, "top_clues": ["ocean"]}
+    assert store.cooperation_rate("model-y", fallback=False) is None
+    assert store.report() == {UNKNOWN_OPPONENT: {"cooperation_rate": 0.5, "clue_style": {"clues": 1, "mean_number": 3.0, "top_clues": ["ocean"]}}}
+
+
+def test_ipd_candidates(store):
+    info = GameInfo(game="ThreePlayerIPD", player_id=0)
+    assert ipd_candidates("", info) == ["[1 cooperate] [2 cooperate]"]
+    assert ipd_candidates(IPD_OBSERVATION, info) == ["[1 defect] [2 cooperate]"] # tit-for-tat
+    store.record_ipd(UNKNOWN_OPPONENT, 1, 4)
+    assert ipd_candidates("", info, store) == ["[1 defect] [2 defect]"] # the pool mostly defects
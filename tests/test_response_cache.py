@@ -0,0 +1,51 @@
+import itertools
+
+import pytest
+
+import response_cache
+from response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    clock = itertools.count()
+    monkeypatch.setattr(response_cache.time, "time", lambda: float(next(clock)))
+    cache = ResponseCache(str(tmp_path / "cache" / "responses.sqlite"), max_entries=2)
+    yield cache
+    cache.close()
+
+
+def test_key_covers_every_argument():
+    key = ResponseCache.make_key("m", "p", "s", {"temperature": 0, "seed": 1}, {"type": "string"})
+    assert key == ResponseCache.make_key("m", "p", "s", {"seed": 1, "temperature": 0}, {"type": "string"})
+    assert len({key,
+                ResponseCache.make_key("m2", "p", "s", {"temperature": 0, "seed": 1}, {"type": "string"}),
+                ResponseCache.make_key("m", "p", None, {"temperature": 0, "seed": 1}, {"type": "string"}),
+                ResponseCache.make_key("m", "p", "s", {"temperature": 0, "seed": 2}, {"type": "string"}),
+                ResponseCache.make_key("m", "p", "s", {"temperature": 0, "seed": 1}, None)}) == 5
+
+
+def test_hits_and_misses(cache):
+    assert cache.get("a") is None
+    cache.put("a", "response a")
+    assert cache.get("a") == "response a"
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+
+
+def test_least_recently_used_is_evicted(cache):
+    cache.put("a", "response a")
+    cache.put("b", "response b")
+    cache.get("a")
+    cache.put("c", "response c")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("response a", "response c")
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "responses.sqlite")
+    cache = ResponseCache(path)
+    cache.put("a", "response a")
+    cache.close()
+    reopened = ResponseCache(path)
+    assert reopened.get("a") == "response a"
+    reopened.close()
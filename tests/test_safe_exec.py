@@ -0,0 +1,71 @@
+import os
+import time
+
+import pytest
+
+from safe_exec import run_restricted, unsafe_reason, HARD_TIMEOUT_S
+
+posix_only = pytest.mark.skipif(os.name != "posix", reason="the restricted tier only runs on posix")
+
+
+@pytest.mark.parametrize("source", [
+    "import os\nprint(os.getpid())",
+    "print(().__class__)",
+    "print(open('x'))",
+    "print('{0.__class__}'.format(1))",
+    "s = '_' + '_import' + '_' + \"_('os').getpid()\"\nclass C:\n    x: s\nimport typing\nprint(typing.get_type_hints(C))",
+    "from functools import singledispatch\nprint(singledispatch)",
+    "import functools\nprint(functools.singledispatch)",
+    "import collections\nprint(collections.namedtuple('P', 'x'))",
+    "def f():\n    yield 1\ng = f()\nprint(g.gi_frame.f_back)",
+    "try:\n    pass\nexcept BaseException:\n    pass",
+    "print(2 ** 10000)",
+])
+def test_unsafe_snippets_are_refused(source):
+    assert unsafe_reason(source) is not None
+    assert run_restricted(source) is None
+
+
+@posix_only
+def test_safe_snippet_runs_like_the_interpreter():
+    source = "import itertools\nbest = max(itertools.product(range(4), repeat=2), key=sum)\nprint(best)"
+    assert unsafe_reason(source) is None
+    assert run_restricted(source) == (0, "(3, 3)\n", "")
+
+
+@posix_only
+def test_errors_are_reported_with_returncode_1():
+    returncode, stdout, stderr = run_restricted("print('before')\nprint(1 / 0)")
+    assert (returncode, stdout) == (1, "before\n")
+    assert "ZeroDivisionError" in stderr
+
+
+@posix_only
+def test_python_loops_over_budget_fall_back():
+    assert run_restricted("total = 0\nfor i in range(10 ** 6):\n    total += i\nprint(total)") is None
+
+
+@posix_only
+@pytest.mark.parametrize("source", [
+    "import itertools\nprint(sum(map(sum, itertools.product(range(21), repeat=6))))",
+    "print(sum(range(999999 * 9999)))",
+])
+def test_c_level_loops_are_killed(source):
+    # the tracer never sees these, the worker is killed at HARD_TIMEOUT_S
+    start_time = time.perf_counter()
+    assert run_restricted(source) is None
+    assert time.perf_counter() - start_time < HARD_TIMEOUT_S + 2
+    assert run_restricted("print(1)") == (0, "1\n", "")
+
+
+@posix_only
+def test_memory_is_capped():
+    assert run_restricted("x = [0] * 1000000 * 100\nprint(len(x))") is None
+
+
+@posix_only
+def test_patched_library_classes_do_not_leak_into_the_next_snippet():
+    # the worker is persistent, every snippet runs in a fork of it
+    patch = "from collections import Counter\nCounter.most_common = lambda self, n=None: [('patched', 0)]\nprint(Counter('a').most_common(1))"
+    assert run_restricted(patch) == (0, "[('patched', 0)]\n", "")
+    assert run_restricted("from collections import Counter\nprint(Counter('aab').most_common(1))") == (0, "[('a', 2)]\n", "")
@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+from sandbox import run_sandboxed, SandboxLimits, SANDBOX_HISTORY
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="the sandbox limits only apply on posix")
+
+
+def test_timeout_is_not_reported_as_a_signal():
+    returncode, stdout, stderr = run_sandboxed("while True:\n    pass", timeout_s=1)
+    assert returncode == -1 and "Timeout" in stderr
+    assert SANDBOX_HISTORY[-1]["timeout"] and SANDBOX_HISTORY[-1]["limit"] is None
+
+
+def test_sighup_is_reported_as_a_signal():
+    # returncode -1, the same value as the timeout result
+    returncode, stdout, stderr = run_sandboxed("import os, signal\nos.kill(os.getpid(), signal.SIGHUP)")
+    assert returncode == -1
+    assert not SANDBOX_HISTORY[-1]["timeout"] and SANDBOX_HISTORY[-1]["limit"] == "signal 1"
+
+
+def test_clean_run():
+    assert run_sandboxed("print(1)") == (0, "1\n", "")
+    assert SANDBOX_HISTORY[-1]["limit"] is None
+
+
+def test_memory_limit_raises_memory_error():
+    returncode, stdout, stderr = run_sandboxed("x = bytearray(300 * 1024 * 1024)\nprint(len(x))", timeout_s=10,
+                                               limits=SandboxLimits(memory_mb=200))
+    assert returncode == 1 and "MemoryError" in stderr and stdout == ""
+    assert SANDBOX_HISTORY[-1]["memory_error"]
+
+
+def test_cpu_limit_kills_a_busy_loop():
+    returncode, stdout, stderr = run_sandboxed("while True:\n    pass", timeout_s=10, limits=SandboxLimits(cpu_s=1))
+    assert returncode < 0 and "cpu limit" in stderr
+    assert SANDBOX_HISTORY[-1]["limit"] == "cpu" and not SANDBOX_HISTORY[-1]["timeout"]
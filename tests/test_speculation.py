@@ -0,0 +1,30 @@
+from game_classifier import GameInfo
+from speculation import SpeculationStore, speculation_key, ROLE_SCOPE, PHASE_SCOPE
+
+
+INFO = GameInfo(game="SecretMafia", role="Villager", player_id=2, team="Village", phase="Day-Voting")
+
+
+def test_keys_follow_the_scope():
+    assert speculation_key(None, "q", INFO) is None
+    assert speculation_key(ROLE_SCOPE, "q", INFO) == speculation_key(ROLE_SCOPE, "q", INFO.model_copy(update={"phase": "Night-Mafia"}))
+    assert speculation_key(PHASE_SCOPE, "q", INFO) != speculation_key(PHASE_SCOPE, "q", INFO.model_copy(update={"phase": "Night-Mafia"}))
+
+
+def test_peek_does_not_count():
+    store = SpeculationStore()
+    key = speculation_key(ROLE_SCOPE, "q", INFO)
+    assert store.peek(key) is None
+    store.put(key, "answer", 2.0)
+    assert store.peek(key) == "answer"
+    assert (store.stats["hits"], store.stats["misses"]) == (0, 0)
+    assert store.get(key) == "answer" and store.stats["saved_s"] == 2.0
+
+
+def test_clear_forgets_the_previous_game():
+    store = SpeculationStore()
+    key = speculation_key(ROLE_SCOPE, "q", INFO)
+    store.put(key, "answer", 1.0)
+    store.run_in_background(lambda: store.put(speculation_key(PHASE_SCOPE, "q", INFO), "late answer", 1.0))
+    store.clear()
+    assert store.get(key) is None and store.peek(speculation_key(PHASE_SCOPE, "q", INFO)) is None
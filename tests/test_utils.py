@@ -0,0 +1,27 @@
+import threading
+
+import utils
+from utils import setup_logger
+
+
+def test_setup_logger_creates_one_handler_per_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "LOG_DIR", str(tmp_path))
+    loggers = []
+    threads = [threading.Thread(target=lambda: loggers.append(setup_logger("test_utils_a.txt"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    other = setup_logger("test_utils_b.txt")
+    assert len({id(logger) for logger in loggers}) == 1 and len(loggers[0].handlers) == 1
+    assert other is not loggers[0] and len(other.handlers) == 1
+    loggers[0].info("a")
+    other.info("b")
+    for handler in loggers[0].handlers + other.handlers:
+        handler.flush()
+    assert (tmp_path / "test_utils_a.txt").read_text().endswith("----- a\n")
+    assert (tmp_path / "test_utils_b.txt").read_text().endswith("----- b\n")
+    for logger in (loggers[0], other):
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()